@@ -1,7 +1,8 @@
 #!/bin/bash
 # CAPTURE — Extract structured memories from session transcripts
 # Run: ./capture.sh [session_log_path]
-# Extracts facts, preferences, decisions, corrections into store.json
+# Extracts facts, preferences, decisions, corrections into the memory store
+# (memory/store.db or store.jsonl if migrated, else memory/store.json)
 
 set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
@@ -10,9 +11,14 @@ STORE="$WORKSPACE/memory/store.json"
 DAILY_DIR="$WORKSPACE/memory"
 TODAY=$(date +%Y-%m-%d)
 CONFIG="$SCRIPT_DIR/config.json"
-
-# Initialize store if needed
-if [ ! -f "$STORE" ]; then
+STORE_CLI=(python3 "$WORKSPACE/scripts/taskrunner/runner.py" store --memory-dir "$DAILY_DIR")
+
+if [ -f "$DAILY_DIR/store.db" ]; then
+  STORE="$DAILY_DIR/store.db"
+elif [ -f "$DAILY_DIR/store.jsonl" ]; then
+  STORE="$DAILY_DIR/store.jsonl"
+elif [ ! -f "$STORE" ]; then
+  # Initialize store if needed
   echo '{"memories": [], "meta": {"created": "'$TODAY'", "lastCapture": null, "lastDecay": null, "lastLearn": null}}' > "$STORE"
 fi
 
@@ -59,13 +65,12 @@ if [ "$CANDIDATE_COUNT" -eq 0 ]; then
   exit 0
 fi
 
-# Deduplicate against existing store
-EXISTING_COUNT=$(jq '.memories | length' "$STORE")
+EXISTING_COUNT=$("${STORE_CLI[@]}" info | jq '.count')
 echo "   Existing memories: $EXISTING_COUNT"
 
-# Add new memories with metadata
+# Build new memories with metadata; the store adds them in one batch
 TIMESTAMP=$(date -u +%Y-%m-%dT%H:%M:%SZ)
-NEW_COUNT=0
+NEW=$(mktemp)
 
 while IFS= read -r line; do
   # Skip empty lines and very short ones
@@ -75,45 +80,42 @@ while IFS= read -r line; do
   CLEAN=$(echo "$line" | sed 's/^[[:space:]]*[-*#>]*[[:space:]]*//' | sed 's/[[:space:]]*$//')
   [ ${#CLEAN} -lt 10 ] && continue
   
-  # Check for near-duplicate (exact match on first 50 chars)
-  PREFIX=$(echo "$CLEAN" | cut -c1-50)
-  DUPE=$(jq --arg p "$PREFIX" '[.memories[].content | startswith($p)] | any' "$STORE" 2>/dev/null || echo "false")
+  # Detect category from content
+  CAT="fact"  # default fallback
+  LOWER=$(echo "$CLEAN" | tr '[:upper:]' '[:lower:]')
   
-  if [ "$DUPE" = "false" ]; then
-    # Detect category from content
-    CAT="fact"  # default fallback
-    LOWER=$(echo "$CLEAN" | tr '[:upper:]' '[:lower:]')
-    
-    if echo "$LOWER" | grep -qiE "(don't|dont|never |always |wrong|fix:|mistake|correction:|should be|that's wrong|actually[, ])"; then
-      CAT="correction"
-    elif echo "$LOWER" | grep -qiE "(decided|chose|approved|rejected|switched to|going with|let's (do|go|use)|confirmed|picked|selected)"; then
-      CAT="decision"
-    elif echo "$LOWER" | grep -qiE "(prefers?|likes?[[:space:]]|dislikes?|wants?[[:space:]]|hates?|values?[[:space:]]|loves?[[:space:]]|favorite)"; then
-      CAT="preference"
-    elif echo "$LOWER" | grep -qiE "(todo|\\[ \\]|still need|pending|awaiting|need to|remind me|don't forget|follow up|next step)"; then
-      CAT="todo"
-    elif echo "$LOWER" | grep -qiE "(repo:|stack:|built[[:space:]]|shipped|deployed|pr[[:space:]]#|pr[[:space:]][0-9]|github\.com|vercel\.app|launched|published)"; then
-      CAT="project"
-    elif echo "$LOWER" | grep -qiE "(@[a-z]|username|contact|email:|twitter:|github:|linkedin:|phone:)" || echo "$CLEAN" | grep -qE "([A-Z][a-z]{2,} [A-Z][a-z]{2,})"; then
-      CAT="people"
-    elif echo "$LOWER" | grep -qiE "(learned|realized|key insight|important:|note:|takeaway|pattern:)"; then
-      CAT="insight"
-    fi
-
-    # Add to store with initial score of 1.0
-    jq --arg content "$CLEAN" \
-       --arg ts "$TIMESTAMP" \
-       --arg source "$(basename "$SOURCE")" \
-       --arg cat "$CAT" \
-       '.memories += [{"content": $content, "score": 1.0, "created": $ts, "lastAccessed": $ts, "source": $source, "category": $cat, "accessCount": 0}]' \
-       "$STORE" > "${STORE}.tmp" && mv "${STORE}.tmp" "$STORE"
-    NEW_COUNT=$((NEW_COUNT + 1))
+  if echo "$LOWER" | grep -qiE "(don't|dont|never |always |wrong|fix:|mistake|correction:|should be|that's wrong|actually[, ])"; then
+    CAT="correction"
+  elif echo "$LOWER" | grep -qiE "(decided|chose|approved|rejected|switched to|going with|let's (do|go|use)|confirmed|picked|selected)"; then
+    CAT="decision"
+  elif echo "$LOWER" | grep -qiE "(prefers?|likes?[[:space:]]|dislikes?|wants?[[:space:]]|hates?|values?[[:space:]]|loves?[[:space:]]|favorite)"; then
+    CAT="preference"
+  elif echo "$LOWER" | grep -qiE "(todo|\\[ \\]|still need|pending|awaiting|need to|remind me|don't forget|follow up|next step)"; then
+    CAT="todo"
+  elif echo "$LOWER" | grep -qiE "(repo:|stack:|built[[:space:]]|shipped|deployed|pr[[:space:]]#|pr[[:space:]][0-9]|github\.com|vercel\.app|launched|published)"; then
+    CAT="project"
+  elif echo "$LOWER" | grep -qiE "(@[a-z]|username|contact|email:|twitter:|github:|linkedin:|phone:)" || echo "$CLEAN" | grep -qE "([A-Z][a-z]{2,} [A-Z][a-z]{2,})"; then
+    CAT="people"
+  elif echo "$LOWER" | grep -qiE "(learned|realized|key insight|important:|note:|takeaway|pattern:)"; then
+    CAT="insight"
   fi
+
+  # Initial score of 1.0
+  jq -nc --arg content "$CLEAN" \
+     --arg ts "$TIMESTAMP" \
+     --arg source "$(basename "$SOURCE")" \
+     --arg cat "$CAT" \
+     '{"content": $content, "score": 1.0, "created": $ts, "lastAccessed": $ts, "source": $source, "category": $cat, "accessCount": 0}' \
+     >> "$NEW"
 done < "$TEMP"
 
+# Add to store, skipping near-duplicates (exact match on first 50 chars)
+ADDED=$("${STORE_CLI[@]}" add --skip-prefix-duplicates 50 < "$NEW")
+NEW_COUNT=$(echo "$ADDED" | jq '.added')
+TOTAL=$(echo "$ADDED" | jq '.total')
+
 # Update meta
-jq --arg ts "$TIMESTAMP" '.meta.lastCapture = $ts' "$STORE" > "${STORE}.tmp" && mv "${STORE}.tmp" "$STORE"
+"${STORE_CLI[@]}" meta "lastCapture=$TIMESTAMP"
 
-rm "$TEMP"
-TOTAL=$(jq '.memories | length' "$STORE")
+rm "$TEMP" "$NEW"
 echo "   ✅ Captured $NEW_COUNT new memories (total: $TOTAL)"
@@ -12,6 +12,7 @@ MEMORY_FILE="$WORKSPACE/MEMORY.md"
 CONFIG="$SCRIPT_DIR/config.json"
 TODAY=$(date +%Y-%m-%d)
 ARCHIVE="$DAILY_DIR/archive"
+STORE_CLI=(python3 "$WORKSPACE/scripts/taskrunner/runner.py" store --memory-dir "$DAILY_DIR")
 
 mkdir -p "$ARCHIVE"
 
@@ -47,7 +48,16 @@ echo ""
 echo "🔻 Phase 2: Decay pass"
 bash "$SCRIPT_DIR/decay.sh"
 
-# PHASE 3: Pattern detection
+# PHASE 3: Pattern detection (phases 3-5 only read the store, so a
+# migrated store.db or store.jsonl is analysed from an exported copy)
+MIGRATED=""
+if [ -f "$DAILY_DIR/store.db" ] || [ -f "$DAILY_DIR/store.jsonl" ]; then
+  MIGRATED=1
+  STORE=$(mktemp)
+  trap 'rm -f "$STORE"' EXIT
+  "${STORE_CLI[@]}" export --shape memories > "$STORE"
+fi
+
 echo ""
 echo "🔗 Phase 3: Pattern detection"
 
@@ -128,7 +138,9 @@ EOF
 echo "   Written to: $INSIGHTS_FILE"
 
 # Update meta
-if [ -f "$STORE" ]; then
+if [ -n "$MIGRATED" ]; then
+  "${STORE_CLI[@]}" meta "lastLearn=$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+elif [ -f "$STORE" ]; then
   jq --arg ts "$(date -u +%Y-%m-%dT%H:%M:%SZ)" '.meta.lastLearn = $ts' "$STORE" > "${STORE}.tmp" && mv "${STORE}.tmp" "$STORE"
 fi
 
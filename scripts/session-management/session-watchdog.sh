@@ -223,26 +223,21 @@ try:
 except Exception:
     pass
 
-# Write alert to pending.json if purges happened
-ALERTS_FILE = os.path.join(OPENCLAW_WORKSPACE, "scripts/taskrunner/alerts/pending.json")
+# Raise an alert through the taskrunner's journal if purges happened
+RUNNER = os.path.join(OPENCLAW_WORKSPACE, "scripts/taskrunner/runner.py")
 try:
-    existing = []
-    if os.path.exists(ALERTS_FILE):
-        with open(ALERTS_FILE) as af:
-            existing = json.load(af)
     if purged:
+        import subprocess
         reasons = {}
         for p in purged:
             r = p["reason"].split("(")[0].strip()
             reasons[r] = reasons.get(r, 0) + 1
         reason_str = ", ".join(f"{v} {k.lower()}" for k, v in reasons.items())
-        existing.append({
-            "ts": int(time.time()),
-            "source": "session-watchdog",
-            "message": f"🧹 Watchdog: purged {len(purged)} session(s) ({reason_str}). {len(store)} remaining, {len(warnings)} warning(s)."
-        })
-        with open(ALERTS_FILE, "w") as af:
-            json.dump(existing, af, indent=2)
+        message = f"🧹 Watchdog: purged {len(purged)} session(s) ({reason_str}). {len(store)} remaining, {len(warnings)} warning(s)."
+        subprocess.run(
+            [sys.executable, RUNNER, "alert", "--source", "session-watchdog", message],
+            stdout=subprocess.DEVNULL, timeout=30
+        )
 except Exception:
     pass
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory_capture's extract_items() against the original
+implementation, checking both return identical items.
+
+Usage:
+    python3 bench_extract.py [--size-mb 4] [--repeat 3] [FILE ...]
+
+Without FILE arguments a synthetic daily file of --size-mb is generated.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.memory_capture import extract_items
+
+
+def legacy_extract_items(content: str) -> List[Tuple[str, List[str]]]:
+    """The original extractor: one re.finditer pass per pattern."""
+    items = []
+
+    header_pattern = r'^(#{2,})\s+(.+)$'
+    for match in re.finditer(header_pattern, content, re.MULTILINE):
+        items.append((match.group(2).strip(), ["header"]))
+
+    bold_pattern = r'^\s*-\s+\*\*(.+?)\*\*(.*)$'
+    for match in re.finditer(bold_pattern, content, re.MULTILINE):
+        items.append(((match.group(1) + match.group(2)).strip(), ["bold_item"]))
+
+    marker_patterns = {
+        "TODO": r'(?i)TODO:?\s*(.+)',
+        "DECISION": r'(?i)DECISION:?\s*(.+)',
+        "BLOCKER": r'(?i)BLOCKER:?\s*(.+)',
+        "ACTION": r'(?i)ACTION:?\s*(.+)',
+        "NOTE": r'(?i)NOTE:?\s*(.+)',
+    }
+    for marker, pattern in marker_patterns.items():
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            items.append((match.group(1).strip(), [marker.lower()]))
+
+    important_keywords = [
+        "decided", "completed", "shipped", "launched", "fixed", "broke",
+        "learned", "discovered", "insight", "problem", "solution"
+    ]
+    bullet_pattern = r'^\s*[-*]\s+(.+)$'
+    for match in re.finditer(bullet_pattern, content, re.MULTILINE):
+        text = match.group(1).strip()
+        if any(keyword in text.lower() for keyword in important_keywords):
+            items.append((text, ["important_bullet"]))
+
+    return items
+
+
+_WORDS = (
+    "the gateway cron job store memory task runner deploy review slack channel "
+    "decided completed shipped launched fixed broke learned discovered insight "
+    "problem solution todo note action blocker decision denote actionote Notes"
+).split()
+
+
+def synthetic_daily_file(size_bytes: int, seed: int = 7) -> str:
+    """Markdown resembling a busy daily memory file."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_bytes:
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 16)))
+        kind = rng.random()
+        if kind < 0.05:
+            line = f"## {words}"
+        elif kind < 0.15:
+            line = f"- **{words[:20]}** {words[20:]}"
+        elif kind < 0.45:
+            line = f"{rng.choice(['-', '*', '  -'])} {words}"
+        elif kind < 0.55:
+            line = f"{rng.choice(['TODO', 'NOTE:', 'Decision:', 'ACTION'])} {words}"
+        elif kind < 0.6:
+            line = ""
+        else:
+            line = words.capitalize() + "."
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def best_of(func, content: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path, help="Daily files to benchmark")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Synthetic file size (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    inputs = [(str(path), path.read_text()) for path in args.files]
+    if not inputs:
+        inputs = [(f"synthetic {args.size_mb:g} MB", synthetic_daily_file(int(args.size_mb * 1024 * 1024)))]
+
+    ok = True
+    for label, content in inputs:
+        expected = legacy_extract_items(content)
+        actual = extract_items(content)
+        identical = actual == expected
+        ok = ok and identical
+
+        legacy = best_of(legacy_extract_items, content, args.repeat)
+        new = best_of(extract_items, content, args.repeat)
+        print(
+            f"{label}: {len(content) / 1048576:.1f} MB, {len(actual)} items, "
+            f"identical={identical}, legacy {legacy * 1000:.0f} ms, "
+            f"new {new * 1000:.0f} ms, speedup {legacy / new:.2f}x"
+        )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
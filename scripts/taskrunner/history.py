@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Segmented, indexed task history (logs/tasks.jsonl and its closed segments)."""
+
+import fcntl
+import gzip
+import json
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Index record: record time (epoch seconds), segment id, byte offset in segment
+INDEX_RECORD = struct.Struct("<dIQ")
+
+
+def _record_time(record: Dict[str, Any], previous: float) -> float:
+    """
+    Index time of a record: its "timestamp", but never before `previous`
+    (the task's last index entry). Start timestamps can interleave across
+    processes, and the index must stay non-decreasing to be binary-searched.
+    """
+    try:
+        return max(previous, datetime.fromisoformat(record["timestamp"]).timestamp())
+    except (ValueError, KeyError, TypeError):
+        return previous
+
+
+def parse_since(value: str) -> float:
+    """
+    Parse a --since/--until value into epoch seconds.
+
+    Accepts ISO dates/datetimes ("2026-02-10", "2026-02-10T09:00") or a
+    relative age ("30m", "12h", "7d").
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if match:
+        units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+        return time.time() - float(match.group(1)) * units[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+class TaskHistory:
+    """
+    Append-only task history split into segments, with a per-task index.
+
+    The active segment is always logs/tasks.jsonl, so existing consumers keep
+    working. It is rotated into logs/segments/ when it outgrows
+    max_segment_bytes or the day changes, and closed segments are gzipped.
+    Every appended record also gets a fixed-size entry in
+    logs/index/<task>.idx, so a query binary-searches that file and seeks
+    straight to the matching lines instead of scanning the history. Index
+    entries are timed by the record's own "timestamp" (see _record_time),
+    whether written on append or by rebuild_index().
+    """
+
+    def __init__(
+        self,
+        logs_dir: Path,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        rotate_daily: bool = True,
+        compress: bool = True,
+    ):
+        self.logs_dir = logs_dir
+        self.active_path = logs_dir / "tasks.jsonl"
+        self.segments_dir = logs_dir / "segments"
+        self.index_dir = logs_dir / "index"
+        self.meta_path = self.index_dir / "segments.json"
+        self.max_segment_bytes = max_segment_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self._lock_path = logs_dir / "tasks.jsonl.lock"
+        self._thread_lock = threading.Lock()
+
+    # -- locking / metadata -------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive lock shared by every thread and process writing the history."""
+        with self._thread_lock:
+            self.logs_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, "w") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+
+    def _save_meta(self, meta: Dict[str, Any]) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        tmp_path.replace(self.meta_path)
+
+    def _index_path(self, task_name: str) -> Path:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", task_name)
+        return self.index_dir / f"{safe_name}.idx"
+
+    def _segment_path(self, segment_id: int, meta: Dict[str, Any]) -> Path:
+        """Resolve a segment id to the file currently holding it."""
+        if segment_id == meta["active_id"]:
+            return self.active_path
+        plain = self.segments_dir / f"tasks-{segment_id:06d}.jsonl"
+        compressed = plain.with_name(plain.name + ".gz")
+        return compressed if compressed.exists() else plain
+
+    # -- writing ------------------------------------------------------------
+
+    def append(self, result: Dict[str, Any]) -> None:
+        """Append one result record and index it."""
+        line = (json.dumps(result) + "\n").encode()
+        with self._locked():
+            meta = self._load_meta()
+            if meta is None:
+                meta = self._rebuild_index_locked()
+
+            today = datetime.now().date().isoformat()
+            if self.active_path.exists() and self.active_path.stat().st_size > 0:
+                too_big = self.active_path.stat().st_size + len(line) > self.max_segment_bytes
+                new_day = self.rotate_daily and meta.get("active_day") != today
+                if too_big or new_day:
+                    meta = self._rotate_locked(meta)
+            meta["active_day"] = today
+
+            with open(self.active_path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._index_path(result.get("task", "unknown")), "a+b") as f:
+                previous = 0.0
+                if f.seek(0, 2) >= INDEX_RECORD.size:
+                    f.seek(-INDEX_RECORD.size, 2)
+                    previous = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+                f.write(INDEX_RECORD.pack(_record_time(result, previous), meta["active_id"], offset))
+
+            self._save_meta(meta)
+
+    def _rotate_locked(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Close the active segment and start a new one."""
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        closed = self.segments_dir / f"tasks-{meta['active_id']:06d}.jsonl"
+        self.active_path.replace(closed)
+
+        if self.compress:
+            with open(closed, "rb") as src, gzip.open(str(closed) + ".gz.tmp", "wb") as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            Path(str(closed) + ".gz.tmp").replace(str(closed) + ".gz")
+            closed.unlink()
+
+        meta = dict(meta, active_id=meta["active_id"] + 1)
+        self._save_meta(meta)
+        return meta
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """Recreate every task index from the segments on disk."""
+        with self._locked():
+            return self._rebuild_index_locked()
+
+    def _rebuild_index_locked(self) -> Dict[str, Any]:
+        """
+        Scan all segments and rewrite the indexes.
+
+        Used on first run against a pre-existing tasks.jsonl and by
+        `runner.py history --reindex`.
+        """
+        segment_ids = []
+        if self.segments_dir.exists():
+            for path in self.segments_dir.glob("tasks-*.jsonl*"):
+                match = re.match(r"tasks-(\d+)\.jsonl", path.name)
+                if match:
+                    segment_ids.append(int(match.group(1)))
+        active_id = max(segment_ids) + 1 if segment_ids else 0
+        meta = {"active_id": active_id, "active_day": datetime.now().date().isoformat()}
+
+        records: Dict[str, List[bytes]] = {}
+        last_time: Dict[str, float] = {}
+        for segment_id in sorted(set(segment_ids)) + [active_id]:
+            path = self._segment_path(segment_id, meta)
+            if not path.exists():
+                continue
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rb") as f:
+                offset = 0
+                for raw in f:
+                    line_offset = offset
+                    offset += len(raw)
+                    try:
+                        record = json.loads(raw)
+                        task_name = record["task"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    record_time = last_time[task_name] = _record_time(record, last_time.get(task_name, 0.0))
+                    records.setdefault(task_name, []).append(
+                        INDEX_RECORD.pack(record_time, segment_id, line_offset)
+                    )
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.index_dir.glob("*.idx"):
+            stale.unlink()
+        for task_name, entries in records.items():
+            with open(self._index_path(task_name), "wb") as f:
+                f.write(b"".join(entries))
+
+        self._save_meta(meta)
+        return meta
+
+    # -- querying -----------------------------------------------------------
+
+    @staticmethod
+    def _bisect(f, count: int, when: float, strict: bool) -> int:
+        """First index entry timed >= when (> when if strict)."""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid * INDEX_RECORD.size)
+            record_time = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+            if record_time < when or (strict and record_time == when):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(
+        self,
+        task_name: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a task's records timestamped in [since, until], oldest first.
+
+        Only the newest `limit` matching records are returned. Cost depends
+        on the size of the answer, not of the history: a binary search over
+        the task's index plus one seek per record (closed, gzipped segments
+        are read sequentially up to the last requested offset).
+
+        Holds the history lock, so a concurrent append cannot rotate the
+        segments the index entries point into mid-query.
+        """
+        with self._locked():
+            return self._query_locked(task_name, since, until, limit)
+
+    def _query_locked(
+        self,
+        task_name: str,
+        since: Optional[float],
+        until: Optional[float],
+        limit: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        meta = self._load_meta()
+        if meta is None:
+            meta = self._rebuild_index_locked()
+
+        index_path = self._index_path(task_name)
+        if not index_path.exists():
+            return []
+
+        with open(index_path, "rb") as f:
+            count = index_path.stat().st_size // INDEX_RECORD.size
+            lo = self._bisect(f, count, since, strict=False) if since is not None else 0
+            hi = self._bisect(f, count, until, strict=True) if until is not None else count
+            if limit is not None:
+                lo = max(lo, hi - limit)
+            if lo >= hi:
+                return []
+            f.seek(lo * INDEX_RECORD.size)
+            raw = f.read((hi - lo) * INDEX_RECORD.size)
+
+        entries = [
+            INDEX_RECORD.unpack_from(raw, i * INDEX_RECORD.size) for i in range(hi - lo)
+        ]
+
+        # Group by segment so each file is opened once
+        by_segment: Dict[int, List[Tuple[int, int]]] = {}
+        for position, (_, segment_id, offset) in enumerate(entries):
+            by_segment.setdefault(segment_id, []).append((offset, position))
+
+        records: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        for segment_id, wanted in by_segment.items():
+            path = self._segment_path(segment_id, meta)
+            if not path.exists():
+                continue
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rb") as f:
+                for offset, position in sorted(wanted):
+                    f.seek(offset)
+                    try:
+                        records[position] = json.loads(f.readline())
+                    except ValueError:
+                        continue
+
+        return [record for record in records if record is not None]
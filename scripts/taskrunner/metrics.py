@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Prometheus textfile exporter for task runs."""
+
+import fcntl
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Upper bounds (seconds) of the duration histogram buckets; +Inf is implied
+DURATION_BUCKETS = [0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Maintains a node_exporter textfile with per-task run metrics.
+
+    Aggregates live in a small JSON state file next to the textfile and are
+    updated in place for every logged result, so the cost per run is
+    constant: no rescanning of tasks.jsonl. Both files are replaced
+    atomically (write + rename) under an exclusive flock shared by all
+    runner processes.
+
+    Exported series (label `task`):
+        taskrunner_task_duration_seconds        histogram of executed runs
+        taskrunner_task_runs_total{outcome}     success / failure counts
+        taskrunner_task_lock_contention_total   runs refused because locked
+        taskrunner_task_retry_attempts_total    retry executions
+        taskrunner_task_coalesced_total         triggers served by another run
+        taskrunner_task_cached_total            runs skipped as inputs were unchanged
+        taskrunner_task_last_success_timestamp_seconds
+    """
+
+    def __init__(self, textfile_path: Path, state_path: Optional[Path] = None):
+        self.textfile_path = textfile_path
+        self.state_path = state_path or textfile_path.with_suffix(".state.json")
+        self._lock_path = textfile_path.with_suffix(".lock")
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            self.textfile_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, "w") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        if not isinstance(state, dict):
+            return {}
+        # State written before a counter existed lacks it
+        for task in state.values():
+            for key, value in self._new_task_state().items():
+                task.setdefault(key, value)
+        return state
+
+    @staticmethod
+    def _replace(path: Path, content: str) -> None:
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        tmp_path.replace(path)
+
+    @staticmethod
+    def _new_task_state() -> Dict[str, Any]:
+        return {
+            "buckets": [0] * (len(DURATION_BUCKETS) + 1),
+            "duration_sum": 0.0,
+            "duration_count": 0,
+            "success": 0,
+            "failure": 0,
+            "locked": 0,
+            "retries": 0,
+            "coalesced": 0,
+            "cached": 0,
+            "last_success": None,
+        }
+
+    def observe(self, result: Dict[str, Any]) -> None:
+        """Fold one logged result into the aggregates and rewrite the textfile."""
+        with self._locked():
+            state = self._load_state()
+            task = state.setdefault(result.get("task", "unknown"), self._new_task_state())
+
+            if result.get("locked"):
+                task["locked"] += 1
+            elif result.get("success"):
+                task["success"] += 1
+                try:
+                    task["last_success"] = datetime.fromisoformat(result["timestamp"]).timestamp()
+                except (KeyError, ValueError):
+                    pass
+            else:
+                task["failure"] += 1
+
+            if result.get("coalesced"):
+                task["coalesced"] += 1
+            elif result.get("cached"):
+                task["cached"] += 1
+            else:
+                if "retry_attempts" in result:
+                    task["retries"] += 1
+                duration = result.get("duration_seconds")
+                if isinstance(duration, (int, float)):
+                    for i, upper in enumerate(DURATION_BUCKETS):
+                        if duration <= upper:
+                            task["buckets"][i] += 1
+                            break
+                    else:
+                        task["buckets"][-1] += 1
+                    task["duration_sum"] += duration
+                    task["duration_count"] += 1
+
+            self._replace(self.state_path, json.dumps(state))
+            self._replace(self.textfile_path, self.render(state))
+
+    @staticmethod
+    def render(state: Dict[str, Dict[str, Any]]) -> str:
+        """Render aggregates in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        tasks = sorted(state.items())
+
+        family("taskrunner_task_duration_seconds", "histogram", "Duration of executed task runs.")
+        for name, task in tasks:
+            label = f'task="{_escape(name)}"'
+            cumulative = 0
+            for upper, count in zip(DURATION_BUCKETS + [math.inf], task["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'taskrunner_task_duration_seconds_bucket{{{label},le="{_format_float(upper)}"}} {cumulative}'
+                )
+            lines.append(f"taskrunner_task_duration_seconds_sum{{{label}}} {_format_float(task['duration_sum'])}")
+            lines.append(f"taskrunner_task_duration_seconds_count{{{label}}} {task['duration_count']}")
+
+        family("taskrunner_task_runs_total", "counter", "Logged task runs by outcome.")
+        for name, task in tasks:
+            for outcome in ("success", "failure"):
+                lines.append(
+                    f'taskrunner_task_runs_total{{task="{_escape(name)}",outcome="{outcome}"}} {task[outcome]}'
+                )
+
+        for metric, key, help_text in [
+            ("taskrunner_task_lock_contention_total", "locked", "Runs refused because the task was locked."),
+            ("taskrunner_task_retry_attempts_total", "retries", "Retry attempts executed."),
+            ("taskrunner_task_coalesced_total", "coalesced", "Triggers served by another run's result."),
+            ("taskrunner_task_cached_total", "cached", "Runs skipped because inputs were unchanged."),
+        ]:
+            family(metric, "counter", help_text)
+            for name, task in tasks:
+                lines.append(f'{metric}{{task="{_escape(name)}"}} {task[key]}')
+
+        family(
+            "taskrunner_task_last_success_timestamp_seconds",
+            "gauge",
+            "Unix time of the last successful run.",
+        )
+        for name, task in tasks:
+            if task["last_success"] is not None:
+                lines.append(
+                    f'taskrunner_task_last_success_timestamp_seconds{{task="{_escape(name)}"}} '
+                    f"{_format_float(task['last_success'])}"
+                )
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Persistent retry queue for the task runner."""
+
+import fcntl
+import json
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 300.0) -> float:
+    """
+    Jittered exponential backoff before retrying after `attempt` failed.
+
+    Uses "equal jitter": half of the exponential step is fixed and half is
+    random, so concurrent failures spread out without ever retrying at once.
+
+    Returns:
+        Delay in seconds
+    """
+    step = min(cap, base ** (attempt - 1))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+class RetryQueue:
+    """
+    Pending retries persisted to a small JSON file, one entry per task and
+    mode: a dry run's retry is only ever claimed by a dry run, and real and
+    dry-run retries of the same task do not replace each other.
+
+    The file is shared by every runner process (one-shot, serve, run-many),
+    so each operation takes an exclusive flock and re-reads it. Whoever
+    claims an entry runs that retry; everyone else drops it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock_path = path.with_name(path.name + ".lock")
+
+    @staticmethod
+    def _key(task_name: str, dry_run: bool) -> str:
+        return f"{task_name} (dry run)" if dry_run else task_name
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Yield the queue contents under an exclusive lock, then persist them."""
+        with open(self._lock_path, "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                entries = self._read()
+                before = dict(entries)
+                yield entries
+                if entries != before:
+                    self._write(entries)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        tmp_path.replace(self.path)
+
+    def schedule(
+        self,
+        task_name: str,
+        attempt: int,
+        delay: float,
+        dry_run: bool = False,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Record that `task_name` should run attempt number `attempt` after `delay`.
+
+        Returns:
+            The queued entry
+        """
+        entry = {
+            "task": task_name,
+            "attempt": attempt,
+            "due_at": time.time() + delay,
+            "dry_run": dry_run,
+            "error": error,
+        }
+        with self._locked() as entries:
+            entries[self._key(task_name, dry_run)] = entry
+        return entry
+
+    def claim(
+        self,
+        task_name: str,
+        due_by: Optional[float] = None,
+        dry_run: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Remove and return the task's pending retry in this mode, if it is
+        still queued.
+
+        With `due_by` (epoch seconds), a retry due later stays queued and
+        None is returned.
+        """
+        key = self._key(task_name, dry_run)
+        with self._locked() as entries:
+            entry = entries.get(key)
+            if entry is None or (due_by is not None and entry["due_at"] > due_by):
+                return None
+            return entries.pop(key)
+
+    def due_at(self, task_name: str, dry_run: bool = False) -> Optional[float]:
+        """When the task's pending retry in this mode is due (epoch seconds), if one is queued."""
+        with self._locked() as entries:
+            entry = entries.get(self._key(task_name, dry_run))
+            return entry["due_at"] if entry is not None else None
+
+    def pending(self, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """Return all pending retries in this mode ordered by due time."""
+        with self._locked() as entries:
+            return sorted(
+                (entry for entry in entries.values() if entry.get("dry_run", False) == dry_run),
+                key=lambda entry: entry["due_at"],
+            )
@@ -3,23 +3,57 @@
 Task runner dispatcher.
 
 Usage:
-    python3 runner.py <task_name> [--dry-run]
+    python3 runner.py <task_name> [--dry-run] [--profile] [--verbose] [--watch]
+    python3 runner.py memory_capture --since DATE [--until DATE] [--workers N]
+    python3 runner.py serve [--only TASK ...] [--interval TASK=SECONDS ...] [--dry-run]
+    python3 runner.py run-many TASK [TASK ...] [--after TASK=DEP[,DEP] ...] [--workers N] [--dry-run]
+    python3 runner.py history TASK [--since WHEN] [--until WHEN] [--limit N]
+    python3 runner.py alerts [--since OFFSET] [--ack OFFSET] [--compact]
+    python3 runner.py alert --source NAME [--level LEVEL] [--window SECONDS] MESSAGE
+    python3 runner.py store [--memory-dir DIR] {info,export,import,add,meta,migrate} ...
+    python3 runner.py recall [QUERY] [--category CAT ...] [--limit N] [--min-relevance X] [--record-access]
 
 Examples:
     python3 runner.py memory_capture
     python3 runner.py memory_consolidate --dry-run
     python3 runner.py system_health
+    python3 runner.py memory_capture --watch
+    python3 runner.py memory_capture --since 2026-01-01 --until 2026-06-30
+    python3 runner.py serve --interval system_health=120
+    python3 runner.py run-many memory_capture memory_consolidate system_health \\
+        --after memory_consolidate=memory_capture
+    python3 runner.py history system_health --since 24h --limit 20
+    python3 runner.py alerts
+    python3 runner.py store migrate
+    python3 runner.py recall "deploy pipeline" --category decision
 """
 
 import argparse
+import asyncio
+import concurrent.futures
+import cProfile
 import fcntl
+import heapq
 import importlib
 import json
+import math
+import os
+import pkgutil
+import signal
 import sys
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import IO, Any, Dict, List, Optional, Set, Tuple
+
+from history import TaskHistory, parse_since
+from metrics import MetricsExporter
+from retries import RetryQueue, backoff_delay
+from tasks import docstore, memory_store, recall
+from tasks.alerts import AlertJournal, alert_fingerprint
+from tasks.base import Task
+from watch import FileWatcher
 
 
 # Exit codes
@@ -31,12 +65,29 @@ EXIT_LOCKED = 2
 class TaskRunner:
     """Main task runner orchestrator."""
     
-    def __init__(self, workspace_path: str = "$HOME/.openclaw/workspace"):
+    def __init__(
+        self,
+        workspace_path: str = "$HOME/.openclaw/workspace",
+        profile: bool = False,
+        verbose: bool = False,
+    ):
         self.workspace = Path(workspace_path)
+        self.profile = profile
+        self.verbose = verbose
         self.taskrunner_dir = self.workspace / "scripts/taskrunner"
         self.logs_dir = self.taskrunner_dir / "logs"
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         self.log_file = self.logs_dir / "tasks.jsonl"
+        self.history = TaskHistory(self.logs_dir)
+        self.metrics = MetricsExporter(
+            Path(os.environ.get("TASKRUNNER_METRICS_FILE", self.logs_dir / "taskrunner.prom"))
+        )
+        self._task_classes: Dict[str, type] = {}
+        self._lock_files: Dict[int, IO] = {}
+        self._stop = threading.Event()
+        self._retries = RetryQueue(self.logs_dir / "retries.json")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.alerts = AlertJournal(self.taskrunner_dir / "alerts")
     
     def _acquire_lock(self, task_name: str) -> Optional[int]:
         """
@@ -48,13 +99,21 @@ class TaskRunner:
         lock_path = Path(f"/tmp/taskrunner-{task_name}.lock")
         
         try:
-            fd = open(lock_path, "w")
-            fcntl.flock(fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            fd.write(f"{datetime.now().isoformat()}\n")
-            fd.flush()
-            return fd.fileno()
+            lock_file = open(lock_path, "w")
+        except IOError:
+            return None
+        
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            lock_file.write(f"{datetime.now().isoformat()}\n")
+            lock_file.flush()
         except IOError:
+            lock_file.close()
             return None
+        
+        # Keep the file object alive; closing it would drop the flock
+        self._lock_files[lock_file.fileno()] = lock_file
+        return lock_file.fileno()
     
     def _release_lock(self, fd: int) -> None:
         """Release the lockfile."""
@@ -62,18 +121,153 @@ class TaskRunner:
             fcntl.flock(fd, fcntl.LOCK_UN)
         except:
             pass
+        lock_file = self._lock_files.pop(fd, None)
+        if lock_file is not None:
+            lock_file.close()
     
     def _log_result(self, result: Dict[str, Any]) -> None:
-        """Append task result to JSON lines log."""
+        """
+        Append task result to the JSON lines log (see history.TaskHistory)
+        and fold it into the metrics textfile (see metrics.MetricsExporter).
+        """
         try:
-            with open(self.log_file, "a") as f:
-                f.write(json.dumps(result) + "\n")
+            self.history.append(result)
         except IOError as e:
             print(f"ERROR: Failed to write log: {e}", file=sys.stderr)
+        
+        try:
+            self.metrics.observe(result)
+        except IOError as e:
+            print(f"ERROR: Failed to update metrics: {e}", file=sys.stderr)
+    
+    def _shared_event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Start (once) an event loop on a daemon thread for async tasks.
+        
+        Long-lived modes hand this loop to every async task, so tasks running
+        concurrently under run-many overlap their I/O on one loop instead of
+        each spinning up its own.
+        """
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="taskrunner-loop", daemon=True).start()
+            self._loop = loop
+        return self._loop
+    
+    def _last_run_path(self, task_name: str) -> Path:
+        """Path of the file holding the task's most recent run record."""
+        return Path(f"/tmp/taskrunner-{task_name}.last.json")
+    
+    def _save_last_run(self, task_name: str, record: Dict[str, Any]) -> None:
+        """Atomically replace the task's last-run record."""
+        try:
+            docstore.save(self._last_run_path(task_name), record, fsync=False)
+        except IOError as e:
+            print(f"ERROR: Failed to write last-run record: {e}", file=sys.stderr)
+    
+    def _load_last_run(self, task_name: str) -> Optional[Dict[str, Any]]:
+        """Return the task's last-run record, if any."""
+        try:
+            with open(self._last_run_path(task_name), "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+    
+    def _skip_cache_path(self, task_name: str) -> Path:
+        return self.logs_dir / "fingerprints" / f"{task_name}.json"
+    
+    def _save_skip_cache(self, task_name: str, fingerprint: Optional[str], result: Dict[str, Any]) -> None:
+        """Remember a successful result and the input fingerprint it was computed from."""
+        if fingerprint is None:
+            return
+        try:
+            docstore.save(
+                self._skip_cache_path(task_name),
+                {"fingerprint": fingerprint, "result": result},
+                fsync=False,
+            )
+        except IOError as e:
+            print(f"ERROR: Failed to write skip cache: {e}", file=sys.stderr)
+    
+    def _cached_result(self, task_name: str, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return the last successful result if the inputs still match its
+        fingerprint, restamped as a zero-cost cached run; otherwise None.
+        """
+        if fingerprint is None:
+            return None
+        try:
+            with open(self._skip_cache_path(task_name), "r") as f:
+                cached = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        if cached.get("fingerprint") != fingerprint:
+            return None
+        
+        result = {
+            key: value for key, value in cached["result"].items()
+            if key not in ("spans", "resources", "profile_path", "retry_attempts")
+        }
+        result["cached"] = True
+        result["cached_from"] = result.get("timestamp")
+        result["timestamp"] = datetime.now().isoformat()
+        result["duration_seconds"] = 0.0
+        return result
+    
+    def _coalesce(
+        self,
+        task_instance,
+        task_name: str,
+        timeout: float,
+    ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """
+        Wait behind an in-flight run of the same task.
+        
+        Once the lock frees up, the waiter adopts the latest run's result if
+        that run started after the waiter registered, or if it was the run in
+        flight at registration and the task's input fingerprint is unchanged.
+        Otherwise the waiter keeps the lock and performs one follow-up run.
+        A burst of N triggers therefore costs at most two executions.
+        
+        Returns:
+            (lock_fd, None) to run, (None, result) to reuse a result, or
+            (None, None) if the wait timed out.
+        """
+        registered_at = time.time()
+        fingerprint = task_instance.input_fingerprint()
+        deadline = registered_at + timeout
+        
+        lock_fd = self._acquire_lock(task_name)
+        while lock_fd is None:
+            if time.time() >= deadline:
+                return None, None
+            time.sleep(0.2)
+            lock_fd = self._acquire_lock(task_name)
+        
+        last_run = self._load_last_run(task_name)
+        if not last_run or last_run.get("dry_run") != task_instance.dry_run:
+            return lock_fd, None
+        
+        covered = last_run["started_at"] >= registered_at
+        unchanged = (
+            fingerprint is not None
+            and last_run.get("fingerprint") == fingerprint
+            and last_run["finished_at"] >= registered_at
+        )
+        if not (covered or unchanged):
+            return lock_fd, None
+        
+        self._release_lock(lock_fd)
+        shared_result = dict(last_run["result"])
+        shared_result.pop("retry_at", None)  # the run's owner drives its retry
+        shared_result["coalesced"] = True
+        shared_result["coalesced_from"] = shared_result.get("timestamp")
+        shared_result["timestamp"] = datetime.now().isoformat()
+        return None, shared_result
     
     def _import_task(self, task_name: str):
         """
-        Import and return the task class.
+        Import and return the task class (cached for the runner's lifetime).
         
         Args:
             task_name: Name of the task module (e.g., 'memory_capture')
@@ -85,6 +279,9 @@ class TaskRunner:
             ImportError: If task module not found
             AttributeError: If task class not found in module
         """
+        if task_name in self._task_classes:
+            return self._task_classes[task_name]
+        
         module_name = f"tasks.{task_name}"
         module = importlib.import_module(module_name)
         
@@ -95,80 +292,104 @@ class TaskRunner:
         if not hasattr(module, class_name):
             raise AttributeError(f"Task module '{task_name}' has no class '{class_name}'")
         
-        return getattr(module, class_name)
+        task_class = getattr(module, class_name)
+        self._task_classes[task_name] = task_class
+        return task_class
+    
+    def _discover_tasks(self) -> List[str]:
+        """
+        List task names for every module under tasks/ that follows the
+        class naming convention. Helper modules without a task class are skipped.
+        """
+        import tasks
+        
+        names = []
+        for info in pkgutil.iter_modules(tasks.__path__):
+            if info.name == "base" or info.name.startswith("_"):
+                continue
+            try:
+                self._import_task(info.name)
+            except (ImportError, AttributeError):
+                continue
+            names.append(info.name)
+        return sorted(names)
     
-    def _run_with_retry(
-        self, 
-        task_instance, 
-        max_attempts: int = 3, 
-        backoff_base: float = 2.0
-    ) -> Dict[str, Any]:
+    def _run_attempt(self, task_instance, task_name: str, attempt: int = 1) -> Dict[str, Any]:
         """
-        Execute task with exponential backoff retry.
+        Execute one attempt of a task and queue a retry if it failed.
+        
+        The caller releases the task lock right after, so backoff never pins
+        the lock or the process. Retries use jittered exponential backoff
+        (see retries.backoff_delay), bounded by the task's max_attempts.
         
         Args:
             task_instance: Task instance to run
-            max_attempts: Maximum number of retry attempts
-            backoff_base: Base for exponential backoff (seconds)
+            task_name: Name the task was invoked as (retry queue key)
+            attempt: 1 for a fresh run, >1 for a retry
         
         Returns:
-            Task execution result
+            Task execution result; includes "retry_at" if a retry was queued
         """
-        for attempt in range(1, max_attempts + 1):
+        if self.profile:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(task_instance.execute)
+            profiles_dir = self.logs_dir / "profiles"
+            profiles_dir.mkdir(parents=True, exist_ok=True)
+            profile_path = profiles_dir / f"{task_name}-{datetime.now():%Y%m%d-%H%M%S}-{attempt}.prof"
+            profiler.dump_stats(str(profile_path))
+            result["profile_path"] = str(profile_path)
+        else:
             result = task_instance.execute()
-            
-            if result["success"]:
-                if attempt > 1:
-                    result["retry_attempts"] = attempt - 1
-                return result
-            
-            # If not last attempt, wait before retrying
-            if attempt < max_attempts:
-                wait_time = backoff_base ** (attempt - 1)
-                print(
-                    json.dumps({
-                        "event": "retry",
-                        "attempt": attempt,
-                        "max_attempts": max_attempts,
-                        "wait_seconds": wait_time,
-                        "error": result.get("error", "Unknown error")
-                    })
-                )
-                time.sleep(wait_time)
-        
-        # All attempts failed
-        result["retry_attempts"] = max_attempts - 1
-        result["all_attempts_failed"] = True
+        
+        if attempt > 1:
+            result["retry_attempts"] = attempt - 1
+        if result["success"]:
+            return result
+        
+        if attempt < task_instance.max_attempts:
+            delay = backoff_delay(attempt, task_instance.retry_backoff_base)
+            entry = self._retries.schedule(
+                task_name,
+                attempt + 1,
+                delay,
+                dry_run=task_instance.dry_run,
+                error=result.get("error", result.get("message"))
+            )
+            result["retry_at"] = datetime.fromtimestamp(entry["due_at"]).isoformat()
+        else:
+            result["all_attempts_failed"] = True
         return result
     
-    def run_task(self, task_name: str, dry_run: bool = False) -> int:
+    def _execute(
+        self,
+        task_name: str,
+        dry_run: bool = False,
+        coalesce: bool = False,
+        coalesce_timeout: float = 600.0,
+        attempt: int = 1,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, Dict[str, Any]]:
         """
-        Run a task with full error handling and logging.
+        Lock, import, run and log a single attempt of a task.
+        
+        Shared by the one-shot CLI and the resident scheduler so both write
+        identical records to tasks.jsonl.
         
         Args:
             task_name: Name of the task to run
             dry_run: If True, run in dry-run mode
+            coalesce: If True, wait for an in-flight run instead of failing
+                with EXIT_LOCKED (see _coalesce)
+            coalesce_timeout: Maximum seconds to wait for the in-flight run
+            attempt: Attempt number; retries are claimed from the queue first
+            options: Task-specific options passed to Task.configure()
         
         Returns:
-            Exit code (0 = success, 1 = error, 2 = locked)
+            (exit_code, result) tuple
         """
         lock_fd = None
         
         try:
-            # Acquire lock
-            lock_fd = self._acquire_lock(task_name)
-            if lock_fd is None:
-                error_result = {
-                    "task": task_name,
-                    "timestamp": datetime.now().isoformat(),
-                    "success": False,
-                    "error": "Task is already running (locked)",
-                    "locked": True
-                }
-                self._log_result(error_result)
-                print(json.dumps(error_result), file=sys.stderr)
-                return EXIT_LOCKED
-            
             # Import task
             try:
                 TaskClass = self._import_task(task_name)
@@ -181,20 +402,65 @@ class TaskRunner:
                     "error_type": type(e).__name__
                 }
                 self._log_result(error_result)
-                print(json.dumps(error_result), file=sys.stderr)
-                return EXIT_ERROR
+                return EXIT_ERROR, error_result
             
-            # Instantiate and run
             task_instance = TaskClass(dry_run=dry_run)
-            result = self._run_with_retry(task_instance)
+            if options:
+                task_instance.configure(**options)
+            if self._loop is not None:
+                task_instance.event_loop = self._loop
+            if self.verbose:
+                task_instance.logger.level = "debug"
             
-            # Log result
-            self._log_result(result)
+            # Acquire lock
+            lock_fd = self._acquire_lock(task_name)
+            if lock_fd is None and coalesce:
+                lock_fd, shared_result = self._coalesce(task_instance, task_name, coalesce_timeout)
+                if shared_result is not None:
+                    self._log_result(shared_result)
+                    return (EXIT_SUCCESS if shared_result["success"] else EXIT_ERROR), shared_result
             
-            # Print result
-            print(json.dumps(result, indent=2))
+            if lock_fd is None:
+                error_result = {
+                    "task": task_name,
+                    "timestamp": datetime.now().isoformat(),
+                    "success": False,
+                    "error": "Task is already running (locked)",
+                    "locked": True
+                }
+                self._log_result(error_result)
+                return EXIT_LOCKED, error_result
+            
+            # A fresh run supersedes any retry still waiting in the queue
+            if attempt == 1:
+                self._retries.claim(task_name, dry_run=dry_run)
+            
+            # Run, unless the inputs are unchanged since the last success
+            started_at = time.time()
+            fingerprint = task_instance.input_fingerprint()
+            # Options such as a backfill's --since change what the run does
+            # without changing the fingerprinted inputs
+            skip_cache = task_instance.skip_unchanged and not dry_run and not options
+            result = None
+            if skip_cache and attempt == 1:
+                result = self._cached_result(task_name, fingerprint)
+            if result is None:
+                result = self._run_attempt(task_instance, task_name, attempt)
+                if skip_cache and result["success"]:
+                    # Fingerprint after the run: the task may write its own inputs
+                    self._save_skip_cache(task_name, task_instance.input_fingerprint(), result)
             
-            return EXIT_SUCCESS if result["success"] else EXIT_ERROR
+            # Log result and publish it for coalesced waiters
+            self._log_result(result)
+            self._save_last_run(task_name, {
+                "started_at": started_at,
+                "finished_at": time.time(),
+                "fingerprint": fingerprint,
+                "dry_run": dry_run,
+                "result": result
+            })
+            
+            return (EXIT_SUCCESS if result["success"] else EXIT_ERROR), result
         
         except Exception as e:
             error_result = {
@@ -205,16 +471,837 @@ class TaskRunner:
                 "error_type": type(e).__name__
             }
             self._log_result(error_result)
-            print(json.dumps(error_result), file=sys.stderr)
-            return EXIT_ERROR
+            return EXIT_ERROR, error_result
         
         finally:
             if lock_fd is not None:
                 self._release_lock(lock_fd)
+    
+    def run_task(
+        self,
+        task_name: str,
+        dry_run: bool = False,
+        coalesce: bool = False,
+        coalesce_timeout: float = 600.0,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Run a task with full error handling and logging.
+        
+        Args:
+            task_name: Name of the task to run
+            dry_run: If True, run in dry-run mode
+            coalesce: If True, share or follow an in-flight run instead of
+                exiting with EXIT_LOCKED
+            coalesce_timeout: Maximum seconds to wait when coalescing
+            options: Task-specific options passed to Task.configure()
+        
+        Returns:
+            Exit code (0 = success, 1 = error, 2 = locked)
+        """
+        exit_code, result = self._execute(
+            task_name,
+            dry_run=dry_run,
+            coalesce=coalesce,
+            coalesce_timeout=coalesce_timeout,
+            options=options
+        )
+        
+        # Wait out backoff with the lock released, then claim and run the retry.
+        # If another runner claimed it meanwhile, that runner reports the outcome.
+        while "retry_at" in result:
+            print(
+                json.dumps({
+                    "event": "retry",
+                    "attempt": result.get("retry_attempts", 0) + 1,
+                    "retry_at": result["retry_at"],
+                    "error": result.get("error", "Unknown error")
+                })
+            )
+            self._stop.wait(max(0.0, _epoch(result["retry_at"]) - time.time()))
+            entry = self._retries.claim(task_name, dry_run=dry_run)
+            if entry is None:
+                break
+            exit_code, result = self._execute(
+                task_name, dry_run=dry_run, attempt=entry["attempt"], options=options
+            )
+        
+        if exit_code == EXIT_SUCCESS:
+            print(json.dumps(result, indent=2))
+        elif "duration_seconds" in result:
+            # The task ran and reported failure
+            print(json.dumps(result, indent=2))
+        else:
+            print(json.dumps(result), file=sys.stderr)
+        
+        return exit_code
+    
+    def run_many(
+        self,
+        graph: Dict[str, List[str]],
+        dry_run: bool = False,
+        max_workers: int = 4,
+        coalesce: bool = False,
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        Run several tasks in one invocation, respecting dependencies.
+        
+        Tasks whose dependencies have all succeeded are submitted to a thread
+        pool as soon as they become ready, so wall-clock time follows the
+        critical path. Each task still goes through _execute() and takes its
+        own lock. Dependents of a failed task are skipped and logged.
+        
+        Args:
+            graph: Mapping of task name -> names it must run after
+            dry_run: If True, run every task in dry-run mode
+            max_workers: Maximum number of tasks running at once
+            coalesce: If True, share or follow in-flight runs of each task
+        
+        Returns:
+            (exit_code, summary) tuple
+        
+        Raises:
+            ValueError: If the graph contains a cycle
+        """
+        # Dependencies are implicitly part of the run
+        graph = {name: list(deps) for name, deps in graph.items()}
+        for deps in list(graph.values()):
+            for dep in deps:
+                graph.setdefault(dep, [])
+        
+        waiting_on: Dict[str, Set[str]] = {name: set(deps) for name, deps in graph.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in graph}
+        for name, deps in graph.items():
+            for dep in deps:
+                dependents[dep].append(name)
+        
+        self._check_acyclic(waiting_on, dependents)
+        self._shared_event_loop()
+        
+        start = time.time()
+        results: Dict[str, Dict[str, Any]] = {}
+        exit_codes: Dict[str, int] = {}
+        
+        def skip(name: str, failed_dep: str) -> None:
+            if name in results:
+                return
+            skipped_result = {
+                "task": name,
+                "timestamp": datetime.now().isoformat(),
+                "success": False,
+                "error": f"Skipped: dependency '{failed_dep}' did not succeed",
+                "skipped": True
+            }
+            self._log_result(skipped_result)
+            results[name] = skipped_result
+            exit_codes[name] = EXIT_ERROR
+            for child in dependents[name]:
+                skip(child, name)
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            retry_queue: List[Tuple[float, str]] = []  # (due epoch, task_name)
+            
+            def submit(name: str, attempt: int = 1) -> None:
+                future = pool.submit(self._execute, name, dry_run, coalesce, 600.0, attempt)
+                running[future] = name
+            
+            def submit_ready() -> None:
+                busy = set(running.values()) | {name for _, name in retry_queue}
+                for name, deps in waiting_on.items():
+                    if not deps and name not in results and name not in busy:
+                        submit(name)
+            
+            def finish(name: str, exit_code: int, result: Dict[str, Any]) -> None:
+                results[name] = result
+                exit_codes[name] = exit_code
+                for child in dependents[name]:
+                    if exit_code == EXIT_SUCCESS:
+                        waiting_on[child].discard(name)
+                    else:
+                        skip(child, name)
+            
+            last_results: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+            submit_ready()
+            while running or retry_queue:
+                # Sleep until a task finishes or the earliest retry falls due;
+                # a task in backoff never occupies a worker
+                timeout = None
+                if retry_queue:
+                    timeout = max(0.0, retry_queue[0][0] - time.time())
+                if running:
+                    done, _ = concurrent.futures.wait(
+                        running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                else:
+                    done = set()
+                    time.sleep(timeout)
+                
+                for future in done:
+                    name = running.pop(future)
+                    exit_code, result = future.result()
+                    print(json.dumps(result))
+                    if "retry_at" in result:
+                        last_results[name] = (exit_code, result)
+                        heapq.heappush(retry_queue, (_epoch(result["retry_at"]), name))
+                    else:
+                        finish(name, exit_code, result)
+                
+                while retry_queue and retry_queue[0][0] <= time.time():
+                    _, name = heapq.heappop(retry_queue)
+                    entry = self._retries.claim(name, dry_run=dry_run)
+                    if entry is None:
+                        # Another runner took the retry; keep the last outcome
+                        finish(name, *last_results[name])
+                    else:
+                        submit(name, entry["attempt"])
+                
+                submit_ready()
+        
+        failed = sorted(name for name, code in exit_codes.items() if code != EXIT_SUCCESS)
+        summary = {
+            "event": "run_many",
+            "timestamp": datetime.now().isoformat(),
+            "success": not failed,
+            "tasks": sorted(graph),
+            "failed": failed,
+            "duration_seconds": round(time.time() - start, 3),
+            "task_durations": {
+                name: result.get("duration_seconds") for name, result in sorted(results.items())
+            }
+        }
+        return (EXIT_ERROR if failed else EXIT_SUCCESS), summary
+    
+    @staticmethod
+    def _check_acyclic(waiting_on: Dict[str, Set[str]], dependents: Dict[str, List[str]]) -> None:
+        """Raise ValueError if the dependency graph has a cycle (Kahn's algorithm)."""
+        remaining = {name: len(deps) for name, deps in waiting_on.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for child in dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        
+        if visited != len(remaining):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Dependency cycle between tasks: {', '.join(cyclic)}")
+    
+    def stop(self, *_args) -> None:
+        """Ask a running serve() or watch() loop to exit after the current task."""
+        self._stop.set()
+    
+    def serve(
+        self,
+        intervals: Optional[Dict[str, float]] = None,
+        only: Optional[List[str]] = None,
+        dry_run: bool = False,
+    ) -> int:
+        """
+        Run tasks on their intervals inside one long-lived process.
+        
+        Task classes are imported once and reused, so each tick pays only for
+        the task's own work. Every run goes through _execute(), keeping locking
+        and the tasks.jsonl record format identical to cron invocations.
+        
+        Args:
+            intervals: Per-task interval overrides in seconds
+            only: Restrict the schedule to these task names
+            dry_run: If True, run every task in dry-run mode
+        
+        Returns:
+            Exit code (0 = clean shutdown, 1 = nothing to schedule)
+        """
+        intervals = dict(intervals or {})
+        names = only or self._discover_tasks()
+        
+        schedule: Dict[str, float] = {}
+        for task_name in names:
+            try:
+                TaskClass = self._import_task(task_name)
+            except (ImportError, AttributeError) as e:
+                print(f"ERROR: Cannot schedule '{task_name}': {e}", file=sys.stderr)
+                return EXIT_ERROR
+            
+            interval = intervals.pop(task_name, None)
+            if interval is None:
+                interval = TaskClass.interval_seconds
+            if interval:
+                schedule[task_name] = float(interval)
+        
+        if intervals:
+            print(f"ERROR: Unknown tasks in --interval: {', '.join(sorted(intervals))}", file=sys.stderr)
+            return EXIT_ERROR
+        if not schedule:
+            print("ERROR: No tasks with an interval to schedule", file=sys.stderr)
+            return EXIT_ERROR
+        
+        print(json.dumps({"event": "serve_start", "schedule": schedule, "dry_run": dry_run}))
+        self._shared_event_loop()
+        
+        # Min-heap of (due_time, task_name, kind) on the monotonic clock, with
+        # at most one tick and one retry entry per task. Every task ticks once
+        # at startup; retries persisted by an earlier process (or a one-shot
+        # run) are picked up at their due time.
+        now = time.monotonic()
+        queue = [(now, task_name, "tick") for task_name in sorted(schedule)]
+        for entry in self._retries.pending(dry_run=dry_run):
+            if entry["task"] in schedule:
+                queue.append((now + entry["due_at"] - time.time(), entry["task"], "retry"))
+        heapq.heapify(queue)
+        
+        def schedule_retry(task_name: str, due_at: float) -> None:
+            """Queue the task's retry at `due_at` (epoch), replacing any stale entry."""
+            queue[:] = [item for item in queue if item[1:] != (task_name, "retry")]
+            heapq.heapify(queue)
+            heapq.heappush(queue, (time.monotonic() + due_at - time.time(), task_name, "retry"))
+        
+        while not self._stop.is_set():
+            due, task_name, kind = queue[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            
+            heapq.heappop(queue)
+            if kind == "retry":
+                # Gone if a scheduled tick (or another runner) ran the task since.
+                # If that run failed, the queued retry is a newer one: leave it
+                # until its own due time instead of skipping its backoff.
+                entry = self._retries.claim(task_name, due_by=time.time(), dry_run=dry_run)
+                if entry is None:
+                    due_at = self._retries.due_at(task_name, dry_run=dry_run)
+                    if due_at is not None:
+                        schedule_retry(task_name, due_at)
+                    continue
+                exit_code, result = self._execute(task_name, dry_run=dry_run, attempt=entry["attempt"])
+            else:
+                exit_code, result = self._execute(task_name, dry_run=dry_run)
+                
+                # Skip missed ticks instead of running back-to-back to catch up
+                interval = schedule[task_name]
+                next_due = due + interval
+                now = time.monotonic()
+                if next_due <= now:
+                    next_due = now + interval
+                heapq.heappush(queue, (next_due, task_name, "tick"))
+            
+            print(json.dumps(result))
+            if "retry_at" in result:
+                schedule_retry(task_name, _epoch(result["retry_at"]))
+        
+        print(json.dumps({"event": "serve_stop"}))
+        return EXIT_SUCCESS
+    
+    def watch(self, task_name: str, dry_run: bool = False, debounce: float = 0.25) -> int:
+        """
+        Run a task whenever one of its input_paths() changes.
+        
+        Runs once at startup to catch up, then waits for writes (inotify,
+        or stat polling where unavailable). Bursts are debounced, and a run
+        starts at most about a second after the first write. The input
+        paths are re-evaluated before every wait, so date-based inputs roll
+        over. Runs coalesce with cron-triggered ones instead of failing as
+        locked.
+        
+        Returns:
+            Exit code (0 = clean shutdown, 1 = task cannot be watched)
+        """
+        try:
+            TaskClass = self._import_task(task_name)
+        except (ImportError, AttributeError) as e:
+            print(f"ERROR: Cannot watch '{task_name}': {e}", file=sys.stderr)
+            return EXIT_ERROR
+        
+        def input_paths() -> List[Path]:
+            return TaskClass(dry_run=dry_run).input_paths()
+        
+        if not input_paths():
+            print(f"ERROR: Task '{task_name}' has no input paths to watch", file=sys.stderr)
+            return EXIT_ERROR
+        
+        watcher = FileWatcher(debounce=debounce)
+        print(json.dumps({"event": "watch_start", "task": task_name, "mode": watcher.mode, "dry_run": dry_run}))
+        try:
+            self.run_task(task_name, dry_run=dry_run, coalesce=True)
+            while not self._stop.is_set():
+                # Short waits so stop() is noticed promptly
+                changed = watcher.wait(input_paths(), timeout=1.0)
+                if changed and not self._stop.is_set():
+                    print(json.dumps({"event": "watch_change", "paths": sorted(str(path) for path in changed)}))
+                    self.run_task(task_name, dry_run=dry_run, coalesce=True)
+        finally:
+            watcher.close()
+        
+        print(json.dumps({"event": "watch_stop", "task": task_name}))
+        return EXIT_SUCCESS
+
+
+def _epoch(timestamp: str) -> float:
+    """Convert a local ISO timestamp (as written in results) to epoch seconds."""
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def _parse_intervals(values: List[str]) -> Dict[str, float]:
+    """Parse repeated TASK=SECONDS arguments; SECONDS must be positive."""
+    intervals = {}
+    for value in values:
+        task_name, sep, seconds = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected TASK=SECONDS, got '{value}'")
+        try:
+            interval = float(seconds)
+        except ValueError:
+            interval = math.nan
+        if not (math.isfinite(interval) and interval > 0):
+            raise argparse.ArgumentTypeError(
+                f"Interval for '{task_name}' must be a positive number of seconds, got '{seconds}'"
+            )
+        intervals[task_name] = interval
+    return intervals
+
+
+def serve_main(argv: List[str]) -> int:
+    """CLI entry point for the resident scheduler."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py serve",
+        description="Run tasks on their intervals in one long-lived process"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="TASK",
+        help="Only schedule these tasks (default: every task with an interval)"
+    )
+    parser.add_argument(
+        "--interval",
+        action="append",
+        default=[],
+        metavar="TASK=SECONDS",
+        help="Override a task's interval (repeatable)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run every task in dry-run mode (no writes)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Include debug log lines (one per item instead of aggregated counts)"
+    )
+    
+    args = parser.parse_args(argv)
+    try:
+        intervals = _parse_intervals(args.interval)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    
+    runner = TaskRunner(verbose=args.verbose)
+    signal.signal(signal.SIGTERM, runner.stop)
+    signal.signal(signal.SIGINT, runner.stop)
+    return runner.serve(intervals=intervals, only=args.only, dry_run=args.dry_run)
+
+
+def _parse_dependencies(values: List[str]) -> Dict[str, List[str]]:
+    """Parse repeated TASK=DEP[,DEP] arguments."""
+    dependencies: Dict[str, List[str]] = {}
+    for value in values:
+        task_name, sep, deps = value.partition("=")
+        if not sep or not deps:
+            raise argparse.ArgumentTypeError(f"Expected TASK=DEP[,DEP], got '{value}'")
+        dependencies.setdefault(task_name, []).extend(d for d in deps.split(",") if d)
+    return dependencies
+
+
+def run_many_main(argv: List[str]) -> int:
+    """CLI entry point for running a dependency graph of tasks."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py run-many",
+        description="Run several tasks concurrently, respecting dependencies"
+    )
+    parser.add_argument("tasks", nargs="+", metavar="TASK", help="Tasks to run")
+    parser.add_argument(
+        "--after",
+        action="append",
+        default=[],
+        metavar="TASK=DEP[,DEP]",
+        help="Run TASK only after DEP succeeded (repeatable)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of tasks running at once (default: 4)"
+    )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="Wait for in-flight runs instead of failing as locked"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run every task in dry-run mode (no writes)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Include debug log lines (one per item instead of aggregated counts)"
+    )
+    
+    args = parser.parse_args(argv)
+    try:
+        dependencies = _parse_dependencies(args.after)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    
+    graph = {task_name: [] for task_name in args.tasks}
+    for task_name, deps in dependencies.items():
+        graph.setdefault(task_name, []).extend(deps)
+    
+    runner = TaskRunner(verbose=args.verbose)
+    try:
+        exit_code, summary = runner.run_many(
+            graph, dry_run=args.dry_run, max_workers=args.workers, coalesce=args.coalesce
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    print(json.dumps(summary, indent=2))
+    return exit_code
+
+
+def history_main(argv: List[str]) -> int:
+    """CLI entry point for querying task history."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py history",
+        description="Show a task's logged runs, oldest first"
+    )
+    parser.add_argument("task", nargs="?", help="Task name")
+    parser.add_argument(
+        "--since",
+        metavar="WHEN",
+        help="ISO date/datetime or relative age (30m, 12h, 7d)"
+    )
+    parser.add_argument("--until", metavar="WHEN", help="Same formats as --since")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Newest N matching runs (default: 20, 0 = no limit)"
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the history index from the log segments"
+    )
+    
+    args = parser.parse_args(argv)
+    if not args.task and not args.reindex:
+        parser.error("a task name is required unless --reindex is given")
+    
+    try:
+        since = parse_since(args.since) if args.since else None
+        until = parse_since(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(str(e))
+    
+    runner = TaskRunner()
+    if args.reindex:
+        runner.history.rebuild_index()
+        if not args.task:
+            return EXIT_SUCCESS
+    
+    records = runner.history.query(args.task, since=since, until=until, limit=args.limit or None)
+    for record in records:
+        print(json.dumps(record))
+    return EXIT_SUCCESS
+
+
+def alerts_main(argv: List[str]) -> int:
+    """CLI entry point for consuming the alert journal."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py alerts",
+        description="Print unacknowledged alerts as JSON, or acknowledge them"
+    )
+    parser.add_argument(
+        "--since",
+        type=int,
+        metavar="OFFSET",
+        help="Read from this journal offset instead of the acknowledged cursor"
+    )
+    parser.add_argument(
+        "--ack",
+        type=int,
+        metavar="OFFSET",
+        help="Acknowledge every alert before OFFSET (a next_offset or ack_offset)"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Drop acknowledged alerts from the journal now"
+    )
+    
+    args = parser.parse_args(argv)
+    runner = TaskRunner()
+    
+    if args.ack is not None:
+        runner.alerts.ack(args.ack)
+    if args.compact:
+        runner.alerts.compact()
+    if args.ack is not None or args.compact:
+        return EXIT_SUCCESS
+    
+    alerts, next_offset = runner.alerts.read(since=args.since)
+    print(json.dumps({"alerts": alerts, "next_offset": next_offset}, indent=2))
+    return EXIT_SUCCESS
+
+
+def alert_main(argv: List[str]) -> int:
+    """CLI entry point for scripts outside the taskrunner that raise alerts."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py alert",
+        description="Append an alert to the journal, with the same repeat suppression as task alerts"
+    )
+    parser.add_argument("message", help="Alert message")
+    parser.add_argument(
+        "--source",
+        required=True,
+        metavar="NAME",
+        help="Script raising the alert (recorded as the alert's task)"
+    )
+    parser.add_argument("--level", choices=("info", "warning", "error"), default="info")
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=Task.alert_window_seconds,
+        metavar="SECONDS",
+        help="Deliver repeats at most once per window, counting the rest (0 disables; default: %(default)s)"
+    )
+    
+    args = parser.parse_args(argv)
+    alert = {
+        "task": args.source,
+        "timestamp": datetime.now().isoformat(),
+        "level": args.level,
+        "message": args.message,
+    }
+    offset = TaskRunner().alerts.append(
+        alert,
+        dedup_key=alert_fingerprint(args.source, args.message),
+        window=args.window,
+    )
+    print(json.dumps({"delivered": offset is not None, "offset": offset}))
+    return EXIT_SUCCESS
+
+
+def _prefix_filter(store: memory_store.MemoryStore, length: int):
+    """
+    A predicate that is True for texts no stored (or already accepted)
+    text starts with the first `length` characters of.
+    """
+    texts = [memory.get("text", "") for _, memory in store.items()]
+    by_length: Dict[int, Set[str]] = {}
+    
+    def is_new(text: str) -> bool:
+        prefix = text[:length]
+        seen = by_length.get(len(prefix))
+        if seen is None:
+            seen = by_length[len(prefix)] = {existing[:len(prefix)] for existing in texts}
+        if prefix in seen:
+            return False
+        texts.append(text)
+        for size, prefixes in by_length.items():
+            prefixes.add(text[:size])
+        return True
+    
+    return is_new
+
+
+def store_main(argv: List[str]) -> int:
+    """CLI entry point for the memory store (used by the memory-engine scripts)."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py store",
+        description="Inspect, convert and update the memory store "
+                    "(memory/store.db or store.jsonl if either exists, else memory/store.json)"
+    )
+    parser.add_argument(
+        "--memory-dir",
+        type=Path,
+        metavar="DIR",
+        help="Directory holding the store (default: <workspace>/memory)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="Print backend, path, count and metadata")
+    export_parser = commands.add_parser("export", help="Print the store as a store.json document")
+    export_parser.add_argument(
+        "--shape",
+        choices=memory_store.SHAPES,
+        help="list (taskrunner) or memories (memory-engine); default: the store's own"
+    )
+    import_parser = commands.add_parser("import", help="Add the memories of a store.json document")
+    import_parser.add_argument("file", help="Document to import, either shape ('-' for stdin)")
+    import_parser.add_argument("--replace", action="store_true", help="Replace every stored memory")
+    add_parser = commands.add_parser("add", help="Add memories given as JSON lines on stdin")
+    add_parser.add_argument(
+        "--skip-prefix-duplicates",
+        type=int,
+        metavar="N",
+        help="Skip a memory if a stored one starts with its first N characters"
+    )
+    meta_parser = commands.add_parser("meta", help="Set metadata values (JSON, else strings)")
+    meta_parser.add_argument("values", nargs="+", metavar="KEY=VALUE")
+    migrate_parser = commands.add_parser("migrate", help="Move store.json into a new store.db or store.jsonl")
+    migrate_parser.add_argument(
+        "--to",
+        choices=memory_store.BACKENDS,
+        default="sqlite",
+        help="sqlite (store.db, row-level writes) or jsonl (store.jsonl, streamed); default: sqlite"
+    )
+    
+    args = parser.parse_args(argv)
+    memory_dir = args.memory_dir or TaskRunner().workspace / "memory"
+    
+    if args.command == "migrate":
+        try:
+            imported = memory_store.migrate(memory_dir, args.to)
+        except (FileExistsError, *memory_store.STORE_ERRORS) as e:
+            print(json.dumps({"success": False, "error": str(e)}), file=sys.stderr)
+            return EXIT_ERROR
+        with memory_store.open_store(memory_dir) as store:
+            print(json.dumps({"success": True, "imported": imported, "path": str(store.path)}))
+        return EXIT_SUCCESS
+    
+    try:
+        with memory_store.open_store(memory_dir) as store:
+            if args.command == "info":
+                print(json.dumps({
+                    "backend": store.backend,
+                    "path": str(store.path),
+                    "count": store.count(),
+                    "meta": store.meta()
+                }, indent=2))
+            elif args.command == "export":
+                json.dump(store.export(args.shape), sys.stdout)
+                sys.stdout.write("\n")
+            elif args.command == "import":
+                if args.file == "-":
+                    data = json.load(sys.stdin)
+                else:
+                    data = docstore.load(Path(args.file))
+                imported = store.import_document(data, replace=args.replace)
+                print(json.dumps({"imported": imported, "total": store.count()}))
+            elif args.command == "add":
+                entries = [json.loads(line) for line in sys.stdin if line.strip()]
+                memories = [memory_store.normalize(entry) for entry in entries]
+                if args.skip_prefix_duplicates:
+                    is_new = _prefix_filter(store, args.skip_prefix_duplicates)
+                    memories = [memory for memory in memories if is_new(memory["text"])]
+                added = store.insert(memories)
+                print(json.dumps({"added": added, "skipped": len(entries) - added, "total": store.count()}))
+            elif args.command == "meta":
+                values = {}
+                for item in args.values:
+                    key, sep, value = item.partition("=")
+                    if not sep:
+                        parser.error(f"expected KEY=VALUE, got '{item}'")
+                    try:
+                        values[key] = json.loads(value)
+                    except ValueError:
+                        values[key] = value
+                store.set_meta(**values)
+    except memory_store.STORE_ERRORS as e:
+        print(json.dumps({"success": False, "error": str(e)}), file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_SUCCESS
+
+
+def recall_main(argv: List[str]) -> int:
+    """CLI entry point for querying the memory store."""
+    parser = argparse.ArgumentParser(
+        prog="runner.py recall",
+        description="Print the memories best matching a query (BM25), or the "
+                    "highest-scored ones without a query, as JSON"
+    )
+    parser.add_argument("query", nargs="*", help="Words to search for")
+    parser.add_argument(
+        "--category",
+        action="append",
+        metavar="CAT",
+        help="Only memories in this category (repeatable)"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        metavar="N",
+        help="Most results to print (default: recall.maxResults in memory-engine/config.json)"
+    )
+    parser.add_argument(
+        "--min-relevance",
+        type=float,
+        metavar="X",
+        help="Drop matches scoring below this fraction of the best one "
+             "(default: recall.minRelevance)"
+    )
+    parser.add_argument(
+        "--record-access",
+        action="store_true",
+        help="Mark the results as recalled in the store (memory_decay boosts them)"
+    )
+    parser.add_argument(
+        "--memory-dir",
+        type=Path,
+        metavar="DIR",
+        help="Directory holding the store (default: <workspace>/memory)"
+    )
+    
+    args = parser.parse_args(argv)
+    workspace = TaskRunner().workspace
+    memory_dir = args.memory_dir or workspace / "memory"
+    query = " ".join(args.query)
+    
+    try:
+        config = recall.load_config(workspace / "scripts/memory-engine/config.json")
+        started = time.perf_counter()
+        with recall.RecallIndex(memory_dir, config) as index:
+            results = index.search(
+                query,
+                categories=args.category,
+                limit=args.limit,
+                min_relevance=args.min_relevance
+            )
+            took_ms = round((time.perf_counter() - started) * 1000, 2)
+            if args.record_access:
+                index.record_access(results)
+    except recall.RECALL_ERRORS as e:
+        print(json.dumps({"success": False, "error": str(e)}), file=sys.stderr)
+        return EXIT_ERROR
+    
+    print(json.dumps({"query": query, "count": len(results), "took_ms": took_ms, "results": results}, indent=2))
+    return EXIT_SUCCESS
+
+
+COMMANDS = {
+    "serve": serve_main,
+    "run-many": run_many_main,
+    "history": history_main,
+    "alerts": alerts_main,
+    "alert": alert_main,
+    "store": store_main,
+    "recall": recall_main,
+}
 
 
 def main():
     """CLI entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+    
     parser = argparse.ArgumentParser(
         description="Task runner dispatcher",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -223,6 +1310,12 @@ Examples:
   python3 runner.py memory_capture
   python3 runner.py memory_consolidate --dry-run
   python3 runner.py system_health
+  python3 runner.py memory_capture --watch
+  python3 runner.py memory_capture --since 365d --workers 8
+  python3 runner.py serve --interval system_health=120
+  python3 runner.py run-many memory_capture memory_consolidate system_health \\
+      --after memory_consolidate=memory_capture
+  python3 runner.py history system_health --since 24h --limit 20
         """
     )
     parser.add_argument("task", help="Task name to run")
@@ -231,11 +1324,78 @@ Examples:
         action="store_true", 
         help="Run in dry-run mode (no writes)"
     )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="If the task is already running, wait and share its result "
+             "(or run once more if inputs changed) instead of exiting 2"
+    )
+    parser.add_argument(
+        "--coalesce-timeout",
+        type=float,
+        default=600.0,
+        metavar="SECONDS",
+        help="Maximum time to wait when coalescing (default: 600)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile stats to logs/profiles/ (path in result)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-run the task whenever its input files change"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.25,
+        metavar="SECONDS",
+        help="With --watch: quiet period that ends a burst of writes (default: 0.25)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Include debug log lines (one per item instead of aggregated counts)"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="DATE",
+        help="Backfill from daily files dated DATE or later (ISO date or age like 365d; "
+             "tasks that support it, e.g. memory_capture)"
+    )
+    parser.add_argument("--until", metavar="DATE", help="With --since: last date (default: today)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="With --since: extraction processes (default: one per CPU)"
+    )
     
     args = parser.parse_args()
     
-    runner = TaskRunner()
-    exit_code = runner.run_task(args.task, dry_run=args.dry_run)
+    options = {
+        key: value
+        for key, value in (("since", args.since), ("until", args.until), ("workers", args.workers))
+        if value is not None
+    }
+    if options and args.watch:
+        parser.error("--since/--until/--workers cannot be combined with --watch")
+    
+    runner = TaskRunner(profile=args.profile, verbose=args.verbose)
+    if args.watch:
+        signal.signal(signal.SIGTERM, runner.stop)
+        signal.signal(signal.SIGINT, runner.stop)
+        sys.exit(runner.watch(args.task, dry_run=args.dry_run, debounce=args.debounce))
+    
+    exit_code = runner.run_task(
+        args.task,
+        dry_run=args.dry_run,
+        coalesce=args.coalesce,
+        coalesce_timeout=args.coalesce_timeout,
+        options=options
+    )
     sys.exit(exit_code)
 
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Async I/O helpers for tasks that implement `async def run()`."""
+
+import asyncio
+import json
+import subprocess
+from pathlib import Path
+from typing import Any, List, Optional
+from urllib.parse import urlsplit
+
+
+async def run_subprocess(
+    args: List[str],
+    timeout: Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    """
+    Async counterpart of subprocess.run(args, capture_output=True, text=True).
+
+    Raises:
+        FileNotFoundError: If the executable does not exist
+        subprocess.TimeoutExpired: If the process outlives `timeout` (it is killed)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(args, timeout)
+
+    return subprocess.CompletedProcess(
+        args,
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+
+
+async def http_probe(url: str, timeout: float = 5.0, method: str = "GET") -> int:
+    """
+    Request `url` and return the HTTP status code, without reading the body.
+
+    Raises:
+        asyncio.TimeoutError: If no status line arrives within `timeout`.
+            Since Python 3.11 this is the builtin TimeoutError, a subclass
+            of OSError, so handle it before OSError.
+        OSError: If the connection fails or the status line is malformed
+    """
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+
+    async def probe() -> int:
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=secure or None)
+        try:
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        try:
+            return int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise OSError(f"Malformed HTTP status line from {url!r}: {status_line[:80]!r}")
+
+    return await asyncio.wait_for(probe(), timeout)
+
+
+async def read_text(path: Path) -> str:
+    """Read a text file in a worker thread."""
+    return await asyncio.to_thread(path.read_text)
+
+
+async def read_json(path: Path) -> Any:
+    """Read and parse a JSON file in a worker thread."""
+    return json.loads(await read_text(path))
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Append-only alert journal shared by tasks (producers) and the heartbeat (consumer)."""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import docstore
+
+
+def alert_fingerprint(task: str, message: str) -> str:
+    """
+    Dedup key for an alert: the task plus its message with volatile parts
+    normalized (case, whitespace and numbers, so "Disk 86% full" and
+    "Disk 87% full" count as the same alert).
+    """
+    normalized = re.sub(r"\d+(?:\.\d+)?", "#", " ".join(message.lower().split()))
+    return hashlib.sha1(f"{task}\0{normalized}".encode()).hexdigest()[:16]
+
+
+_SHARED: Dict[Path, "AlertJournal"] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+class AlertJournal:
+    """
+    Line-delimited alert log with a consumer cursor.
+
+    Producers append one JSON line under an exclusive flock, which is O(1)
+    and safe when tasks run in parallel. The consumer reads everything
+    after an offset and acknowledges up to the offset it has handled.
+
+    append() can suppress repeats: alerts with the same fingerprint are
+    delivered at most once per window, and the next delivery reports how
+    often the alert was seen meanwhile. The per-fingerprint counters are
+    kept in memory. Each update is appended to dedup.log, and on the next
+    append each process replays only the lines other processes added, so
+    the check is one lookup plus one small write. Once dedup.log grows past
+    DEDUP_COMPACT_BYTES it is folded into the dedup.json snapshot (a dict
+    keyed by fingerprint) and restarted under a new generation header.
+    Use shared() to keep one journal, and so one index, per process.
+
+    Offsets are logical byte positions that never move: cursor.json holds
+    `base` (the logical offset of the journal file's first byte) and
+    `acked`. Compaction drops the acknowledged prefix, copies the rest to a
+    new file and advances `base`. The new base is saved, tagged with the new
+    file's inode, before the file replaces the journal, so a crash between
+    the two steps can never pair a base with the wrong file. Once enough has
+    been acknowledged, ack() starts compaction on a background thread.
+    """
+
+    # Compact once at least this many acknowledged bytes can be dropped
+    COMPACT_MIN_BYTES = 256 * 1024
+    
+    # Fold dedup.log into dedup.json once it grows past this size
+    DEDUP_COMPACT_BYTES = 64 * 1024
+
+    def __init__(self, alerts_dir: Path):
+        self.alerts_dir = alerts_dir
+        self.journal_path = alerts_dir / "journal.jsonl"
+        self.cursor_path = alerts_dir / "cursor.json"
+        self.legacy_path = alerts_dir / "pending.json"
+        self.dedup_path = alerts_dir / "dedup.json"
+        self.dedup_log_path = alerts_dir / "dedup.log"
+        self._lock_path = alerts_dir / "journal.lock"
+        # In-memory dedup index, and the dedup.log generation and offset it reflects
+        self._dedup: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dedup_generation: Optional[str] = None
+        self._dedup_offset = 0
+
+    @classmethod
+    def shared(cls, alerts_dir: Path) -> "AlertJournal":
+        """The process-wide journal for `alerts_dir`, whose dedup index stays loaded."""
+        with _SHARED_LOCK:
+            journal = _SHARED.get(alerts_dir)
+            if journal is None:
+                journal = _SHARED[alerts_dir] = cls(alerts_dir)
+            return journal
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        self.alerts_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_cursor(self) -> Dict[str, int]:
+        try:
+            with open(self.cursor_path, "r") as f:
+                saved = json.load(f)
+            cursor = {"base": int(saved.get("base", 0)), "acked": int(saved.get("acked", 0))}
+            compacting = saved.get("compacting")
+        except (json.JSONDecodeError, IOError, ValueError, AttributeError):
+            return {"base": 0, "acked": 0}
+        if compacting:
+            # compact() stopped between saving this and saving the new base:
+            # the new base applies only if the new file did replace the journal
+            try:
+                if self.journal_path.stat().st_ino == compacting["inode"]:
+                    cursor["base"] = int(compacting["base"])
+            except (OSError, KeyError, TypeError, ValueError):
+                pass
+        return cursor
+
+    def _save_cursor(self, cursor: Dict[str, Any]) -> None:
+        docstore.save(self.cursor_path, cursor)
+
+    def _import_legacy(self) -> None:
+        """Move alerts left in the old pending.json array into the journal (once)."""
+        if not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, "r") as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            legacy = []
+        if isinstance(legacy, list) and legacy:
+            with open(self.journal_path, "ab") as f:
+                f.write(b"".join((json.dumps(alert) + "\n").encode() for alert in legacy))
+        self.legacy_path.replace(self.legacy_path.with_suffix(".json.imported"))
+
+    def _load_dedup(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.dedup_path, "r") as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _save_dedup(self, index: Dict[str, Dict[str, Any]]) -> None:
+        # Losing the last few counts in a crash is harmless
+        docstore.save(self.dedup_path, index, fsync=False)
+
+    @staticmethod
+    def _prune_dedup(index: Dict[str, Dict[str, Any]], now: float) -> None:
+        for key in [k for k, e in index.items() if now - e["last_seen"] > e["window"]]:
+            del index[key]
+
+    def _sync_dedup(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The dedup index, with updates other processes appended to dedup.log
+        since our last look. Reloads dedup.json and replays the whole log
+        only when the log was compacted (its generation header changed).
+        Call with the lock held.
+        """
+        try:
+            f = open(self.dedup_log_path, "rb")
+        except FileNotFoundError:
+            if self._dedup is None or self._dedup_generation is not None:
+                self._dedup = self._load_dedup()
+                self._dedup_generation, self._dedup_offset = None, 0
+            return self._dedup
+        with f:
+            header = f.readline()
+            try:
+                generation = json.loads(header)["generation"]
+            except (ValueError, KeyError, TypeError):
+                generation = None
+            if self._dedup is None or generation != self._dedup_generation:
+                self._dedup = self._load_dedup()
+                self._dedup_generation, self._dedup_offset = generation, len(header)
+            f.seek(self._dedup_offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self._dedup_offset += len(raw)
+                try:
+                    update = json.loads(raw)
+                    self._dedup[update.pop("key")] = update
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue
+        return self._dedup
+
+    def _start_dedup_log(self) -> None:
+        """Replace dedup.log with an empty one under a new generation. Call with the lock held."""
+        generation = os.urandom(8).hex()
+        header = (json.dumps({"generation": generation}) + "\n").encode()
+        tmp_path = self.dedup_log_path.with_suffix(".log.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+        tmp_path.replace(self.dedup_log_path)
+        self._dedup_generation, self._dedup_offset = generation, len(header)
+
+    def _compact_dedup(self, now: float) -> None:
+        """Fold dedup.log into dedup.json, dropping expired entries. Call with the lock held."""
+        index = self._sync_dedup()
+        self._prune_dedup(index, now)
+        # Snapshot first: replaying the old log over it after a crash is harmless
+        self._save_dedup(index)
+        self._start_dedup_log()
+
+    def _suppress(self, alert: Dict[str, Any], key: str, window: float) -> bool:
+        """
+        Count one occurrence of `key`; True if the alert should be dropped.
+
+        A streak ends once the alert has not been seen for a whole window.
+        Delivered alerts that stand for several occurrences get
+        "occurrences" and "first_seen" fields and a "(seen N times since
+        HH:MM)" suffix.
+        """
+        now = time.time()
+        index = self._sync_dedup()
+        entry = index.get(key)
+        if entry is None or now - entry["last_seen"] > window:
+            entry = {"first_seen": now, "last_emitted": None, "count": 0}
+        entry["count"] += 1
+        entry["last_seen"] = now
+        entry["window"] = window
+
+        suppress = entry["last_emitted"] is not None and now - entry["last_emitted"] < window
+        if not suppress:
+            entry["last_emitted"] = now
+            if entry["count"] > 1:
+                since = datetime.fromtimestamp(entry["first_seen"])
+                alert["occurrences"] = entry["count"]
+                alert["first_seen"] = since.isoformat()
+                alert["message"] = (
+                    f"{alert['message']} (seen {entry['count']} times since {since:%H:%M})"
+                )
+
+        index[key] = entry
+        if not self.dedup_log_path.exists():
+            self._start_dedup_log()
+        with open(self.dedup_log_path, "ab") as f:
+            f.write((json.dumps(dict(entry, key=key)) + "\n").encode())
+            self._dedup_offset = f.tell()
+        if self._dedup_offset >= self.DEDUP_COMPACT_BYTES:
+            self._compact_dedup(now)
+        return suppress
+
+    def append(
+        self,
+        alert: Dict[str, Any],
+        dedup_key: Optional[str] = None,
+        window: Optional[float] = None,
+    ) -> Optional[int]:
+        """
+        Append one alert.
+
+        Args:
+            alert: Alert record
+            dedup_key: Fingerprint for suppressing repeats (see alert_fingerprint)
+            window: Deliver an alert with this key at most once per window (seconds)
+
+        Returns:
+            Logical offset just past the new alert, or None if it was suppressed
+        """
+        with self._locked():
+            if dedup_key and window and self._suppress(alert, dedup_key, window):
+                return None
+            self._import_legacy()
+            with open(self.journal_path, "ab") as f:
+                f.write((json.dumps(alert) + "\n").encode())
+                end = f.tell()
+            return self._load_cursor()["base"] + end
+
+    def read(self, since: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read alerts after logical offset `since` (default: the acknowledged cursor).
+
+        Each alert gets an "ack_offset": passing it to ack() acknowledges
+        that alert and everything before it.
+
+        Returns:
+            (alerts, next_offset); ack(next_offset) acknowledges all of them
+        """
+        if self.legacy_path.exists():
+            with self._locked():
+                self._import_legacy()
+        with self._locked(exclusive=False):
+            cursor = self._load_cursor()
+            start = max(cursor["acked"] if since is None else since, cursor["base"])
+            alerts = []
+            position = start
+            try:
+                with open(self.journal_path, "rb") as f:
+                    f.seek(start - cursor["base"])
+                    for raw in f:
+                        if not raw.endswith(b"\n"):
+                            break  # torn write still in progress
+                        position += len(raw)
+                        try:
+                            alert = json.loads(raw)
+                        except ValueError:
+                            continue
+                        alert["ack_offset"] = position
+                        alerts.append(alert)
+            except FileNotFoundError:
+                pass
+            return alerts, position
+
+    def ack(self, offset: int, background: bool = True) -> None:
+        """Acknowledge every alert before logical `offset`; may start compaction."""
+        with self._locked():
+            cursor = self._load_cursor()
+            if offset <= cursor["acked"]:
+                return
+            cursor["acked"] = offset
+            self._save_cursor(cursor)
+            reclaimable = cursor["acked"] - cursor["base"]
+
+        if reclaimable >= self.COMPACT_MIN_BYTES:
+            if background:
+                # Non-daemon so a short-lived CLI still finishes the compaction
+                threading.Thread(target=self.compact, name="alert-journal-compact").start()
+            else:
+                self.compact()
+
+    def compact(self) -> None:
+        """Drop the acknowledged prefix of the journal, and fold dedup.log into dedup.json."""
+        with self._locked():
+            if self.dedup_path.exists() or self.dedup_log_path.exists():
+                self._compact_dedup(time.time())
+            cursor = self._load_cursor()
+            drop = cursor["acked"] - cursor["base"]
+            if drop <= 0 or not self.journal_path.exists():
+                return
+            tmp_path = self.journal_path.with_suffix(".jsonl.tmp")
+            with open(self.journal_path, "rb") as src, open(tmp_path, "wb") as dst:
+                src.seek(drop)
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                if docstore.FSYNC:
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                inode = os.fstat(dst.fileno()).st_ino
+            self._save_cursor(dict(cursor, compacting={"base": cursor["acked"], "inode": inode}))
+            tmp_path.replace(self.journal_path)
+            cursor["base"] = cursor["acked"]
+            self._save_cursor(cursor)
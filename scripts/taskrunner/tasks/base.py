@@ -1,23 +1,58 @@
 #!/usr/bin/env python3
 """Base task class for the task runner system."""
 
+import asyncio
+import contextvars
+import hashlib
+import inspect
 import json
 import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import resources
+from .alerts import AlertJournal, alert_fingerprint
+from .logger import TaskLogger
+
+# Names of the spans open in the current thread or asyncio task. A context
+# variable (not a list on the task) keeps concurrent coroutines from nesting
+# their spans inside each other.
+_SPAN_STACK: contextvars.ContextVar = contextvars.ContextVar("task_span_stack", default=())
 
 
 class Task(ABC):
     """Base class for all runnable tasks."""
     
+    # Default schedule for `runner.py serve` (seconds); None = not scheduled
+    interval_seconds: Optional[float] = None
+    
+    # Retry budget: total attempts per trigger, and the backoff base (seconds)
+    max_attempts: int = 3
+    retry_backoff_base: float = 2.0
+    
+    # Skip the run (reusing the last successful result) while the input
+    # fingerprint is unchanged; optionally hash file contents as well
+    skip_unchanged: bool = False
+    fingerprint_content: bool = False
+    
+    # Deliver an identical alert (same task and normalized message) at most
+    # once per window (seconds); None disables deduplication
+    alert_window_seconds: Optional[float] = 3600
+    
     def __init__(self, dry_run: bool = False):
         self.dry_run = dry_run
         self.start_time: Optional[float] = None
         self.end_time: Optional[float] = None
         self._workspace = Path("$HOME/.openclaw/workspace")
         self._alerts_dir = self._workspace / "scripts/taskrunner/alerts"
+        self._spans: Dict[str, Dict[str, Any]] = {}
+        # Set by a long-lived runner to share one event loop between async tasks
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Buffered until the end of execute(); the runner lowers the level for --verbose
+        self.logger = TaskLogger(self.name)
     
     @property
     @abstractmethod
@@ -36,6 +71,10 @@ class Task(ABC):
         """
         Execute the task.
         
+        May be defined as `async def run()`; execute() then drives it on an
+        event loop (see tasks/aio.py for async subprocess, HTTP and file
+        helpers).
+        
         Returns:
             Dict with task results. Should include at least:
             - success: bool
@@ -44,6 +83,90 @@ class Task(ABC):
         """
         pass
     
+    def input_paths(self) -> List[Path]:
+        """
+        Files whose contents determine this task's result.
+        
+        Override to opt in to input-aware features (request coalescing,
+        skip_unchanged). Listing a file the task also writes is allowed; it
+        only makes coalescing more conservative. An empty list means the
+        inputs are unknown.
+        """
+        return []
+    
+    def configure(self, **options: Any) -> None:
+        """
+        Apply task-specific CLI options (e.g. memory_capture's --since).
+        
+        Called by the runner before the run. Override to accept options;
+        the default accepts none.
+        
+        Raises:
+            ValueError: If an option is unknown or invalid
+        """
+        if options:
+            raise ValueError(f"Task '{self.name}' accepts no options: {', '.join(sorted(options))}")
+    
+    def input_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint the declared inputs by inode, size and mtime, plus a hash
+        of their contents if fingerprint_content is set.
+        
+        Returns:
+            Hex digest, or None if the task declares no inputs.
+        """
+        paths = self.input_paths()
+        if not paths:
+            return None
+        
+        digest = hashlib.sha1()
+        for path in sorted(paths):
+            try:
+                st = path.stat()
+                digest.update(f"{path}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+                if self.fingerprint_content:
+                    with open(path, "rb") as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            digest.update(chunk)
+            except OSError:
+                digest.update(f"{path}:missing\n".encode())
+        return digest.hexdigest()
+    
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the run.
+        
+        Spans nest ("extract" inside "capture" is reported as
+        "capture/extract"). Repeated spans with the same path are aggregated,
+        so a span inside a loop costs one entry in result["spans"].
+        
+        Example:
+            with self.span("load_store"):
+                memories = json.load(f)
+        """
+        stack = _SPAN_STACK.get() + (name,)
+        token = _SPAN_STACK.set(stack)
+        path = "/".join(stack)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            _SPAN_STACK.reset(token)
+            entry = self._spans.setdefault(path, {"name": path, "calls": 0, "duration_seconds": 0.0})
+            entry["calls"] += 1
+            entry["duration_seconds"] += elapsed
+    
+    def _call_run(self) -> Dict[str, Any]:
+        """Call run(), driving it on an event loop if it is a coroutine function."""
+        if not inspect.iscoroutinefunction(self.run):
+            return self.run()
+        
+        if self.event_loop is not None and self.event_loop.is_running():
+            return asyncio.run_coroutine_threadsafe(self.run(), self.event_loop).result()
+        return asyncio.run(self.run())
+    
     def execute(self) -> Dict[str, Any]:
         """
         Wrapper that handles timing and error catching.
@@ -51,6 +174,12 @@ class Task(ABC):
         Returns:
             Dict with execution results including timing info.
         """
+        self._spans = {}
+        # An async run's work happens on the loop thread and in to_thread()
+        # workers, so only process-wide counters see it
+        usage_before = resources.snapshot(
+            "process" if inspect.iscoroutinefunction(self.run) else "thread"
+        )
         self.start_time = time.time()
         result = {
             "task": self.name,
@@ -60,7 +189,7 @@ class Task(ABC):
         }
         
         try:
-            task_result = self.run()
+            task_result = self._call_run()
             result.update(task_result)
             result["success"] = task_result.get("success", False)
         except Exception as e:
@@ -70,20 +199,27 @@ class Task(ABC):
         finally:
             self.end_time = time.time()
             result["duration_seconds"] = round(self.end_time - self.start_time, 3)
+            result["resources"] = resources.usage_since(usage_before)
+            if self._spans:
+                result["spans"] = [
+                    dict(entry, duration_seconds=round(entry["duration_seconds"], 4))
+                    for entry in self._spans.values()
+                ]
+            self.logger.flush()
         
         return result
     
     def alert(self, message: str, level: str = "info") -> None:
         """
-        Write an alert to be picked up by the heartbeat.
+        Append an alert to the journal picked up by the heartbeat.
+        
+        Repeats within alert_window_seconds are counted instead of
+        delivered; see AlertJournal.append.
         
         Args:
             message: Alert message
             level: Alert level (info, warning, error)
         """
-        self._alerts_dir.mkdir(parents=True, exist_ok=True)
-        pending_file = self._alerts_dir / "pending.json"
-        
         alert = {
             "task": self.name,
             "timestamp": datetime.now().isoformat(),
@@ -91,29 +227,19 @@ class Task(ABC):
             "message": message,
         }
         
-        # Read existing alerts
-        alerts = []
-        if pending_file.exists():
-            try:
-                with open(pending_file, "r") as f:
-                    alerts = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                alerts = []
-        
-        # Append new alert
-        alerts.append(alert)
-        
-        # Write back
         if not self.dry_run:
-            with open(pending_file, "w") as f:
-                json.dump(alerts, f, indent=2)
+            AlertJournal.shared(self._alerts_dir).append(
+                alert,
+                dedup_key=alert_fingerprint(self.name, message),
+                window=self.alert_window_seconds,
+            )
     
-    def log(self, message: str, **kwargs) -> None:
-        """Log a message (can be overridden for custom logging)."""
-        data = {
-            "task": self.name,
-            "timestamp": datetime.now().isoformat(),
-            "message": message,
-            **kwargs
-        }
-        print(json.dumps(data))
+    def log(self, message: str, level: str = "info", **kwargs) -> None:
+        """
+        Log a message (can be overridden for custom logging).
+        
+        Lines are buffered and written when the run ends. Use
+        self.logger.count() inside per-item loops to get one aggregated
+        line instead of one per item.
+        """
+        self.logger.log(level, message, **kwargs)
@@ -13,6 +13,10 @@ from .base import Task
 
 
 class DeliveryAuditTask(Task):
+    interval_seconds = 3600
+    # Runs hourly; repeat an unchanged finding at most every 6 hours
+    alert_window_seconds = 6 * 3600
+
     @property
     def name(self) -> str:
         return "delivery_audit"
@@ -35,14 +39,16 @@ class DeliveryAuditTask(Task):
         return set()
 
     def run(self) -> Dict[str, Any]:
-        allowed_channels = self._load_allowed_slack_channels()
-
-        result = subprocess.run(
-            ["openclaw", "cron", "list", "--json"],
-            capture_output=True,
-            text=True,
-            timeout=15,
-        )
+        with self.span("load_allowlist"):
+            allowed_channels = self._load_allowed_slack_channels()
+
+        with self.span("cron_list"):
+            result = subprocess.run(
+                ["openclaw", "cron", "list", "--json"],
+                capture_output=True,
+                text=True,
+                timeout=15,
+            )
         if result.returncode != 0:
             return {
                 "success": False,
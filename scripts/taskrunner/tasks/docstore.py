@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Atomic JSON document I/O for workspace files (memory store, alert state, caches)."""
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional
+
+# Default for save(fsync=None); TASKRUNNER_FSYNC=0 trades durability for speed
+FSYNC = os.environ.get("TASKRUNNER_FSYNC", "1") != "0"
+
+
+def backup_path(path: Path) -> Path:
+    """Where save(backup=True) keeps the previous version of `path`."""
+    return path.with_name(path.name + ".bak")
+
+
+def load(path: Path) -> Any:
+    """
+    Parse a JSON document.
+
+    Raises:
+        FileNotFoundError, IOError: If the file cannot be read
+        json.JSONDecodeError: If it is not valid JSON
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicFile:
+    """
+    A temporary file that atomically replaces `path` when committed.
+
+    Use it to stream a new version of a file (e.g. a JSON-lines store)
+    without building it in memory first. As a context manager it commits
+    on a clean exit, unless discard() was called, and discards on error.
+
+    Args:
+        path: Target file
+        backup: On commit, keep the previous version as <name>.bak (hard
+            link, falling back to a copy)
+        fsync: Flush file and directory to disk (default: FSYNC)
+    """
+
+    def __init__(self, path: Path, backup: bool = False, fsync: Optional[bool] = None):
+        self.path = path
+        self.backup = backup
+        self.fsync = FSYNC if fsync is None else fsync
+        self.bytes_written = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        self._tmp_path = Path(tmp_name)
+        try:
+            try:
+                mode = path.stat().st_mode & 0o777
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.fchmod(fd, mode)
+            self._file: Optional[BinaryIO] = os.fdopen(fd, "wb")
+        except BaseException:
+            os.close(fd)
+            self._tmp_path.unlink(missing_ok=True)
+            raise
+
+    def write(self, data: bytes) -> int:
+        written = self._file.write(data)
+        self.bytes_written += written
+        return written
+
+    def commit(self) -> None:
+        """Rename the new version over `path`."""
+        f, self._file = self._file, None
+        try:
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+            f.close()
+
+            if self.backup and self.path.exists():
+                bak = backup_path(self.path)
+                link_tmp = bak.with_name(f".{bak.name}.{os.getpid()}.tmp")
+                try:
+                    os.link(self.path, link_tmp)
+                    link_tmp.replace(bak)
+                except OSError:
+                    link_tmp.unlink(missing_ok=True)
+                    shutil.copy2(self.path, bak)
+
+            self._tmp_path.replace(self.path)
+            if self.fsync:
+                _fsync_dir(self.path.parent)
+        except BaseException:
+            f.close()
+            self._tmp_path.unlink(missing_ok=True)
+            raise
+
+    def discard(self) -> None:
+        """Drop the new version, leaving `path` untouched."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None and self._file is not None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def save(
+    path: Path,
+    data: Any,
+    backup: bool = False,
+    fsync: Optional[bool] = None,
+    indent: Optional[int] = None,
+) -> int:
+    """
+    Replace `path` with `data` encoded as JSON, atomically.
+
+    The document is written to a temporary file in the same directory and
+    renamed over `path`, so readers and a crash only ever see the old or
+    the new version, never a truncated one. With backup=True the current
+    file is kept as <name>.bak by hard-linking it before the rename, so the
+    old version is preserved without encoding or copying it (falls back to
+    a copy where hard links are unsupported).
+
+    Args:
+        path: Target file
+        data: JSON-serializable document
+        backup: Keep the previous version as <name>.bak
+        fsync: Flush file and directory to disk (default: FSYNC)
+        indent: Pretty-print with this indent; None writes compact JSON
+
+    Returns:
+        Bytes written
+    """
+    if indent is None:
+        encoded = json.dumps(data, separators=(",", ":"))
+    else:
+        encoded = json.dumps(data, indent=indent)
+
+    with AtomicFile(path, backup=backup, fsync=fsync) as f:
+        f.write(encoded.encode())
+    return f.bytes_written
+
+
+def _encode_line(entry: Dict[str, Any]) -> bytes:
+    return json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+
+class ChangeLog:
+    """
+    JSON-lines log of changes to a snapshot saved with save(), kept next
+    to it as <stem>.log.
+
+    A cache that changes a little per run appends its changes here instead
+    of re-encoding the whole snapshot, and writes a new snapshot only when
+    append() declines: once the log would outgrow `compact_ratio` of the
+    snapshot (so writes stay proportional to the changes and replay stays
+    short), or when another process appended since read().
+
+    The first line is the header of the snapshot the log extends, which
+    should include a generation that changes with every snapshot. A log
+    left over by a crash between saving a new snapshot and reset() then
+    fails the header check and is ignored instead of being replayed onto
+    the wrong snapshot. Entries lost that way, or to a torn last line,
+    must only cost the cache some recomputation.
+
+    Args:
+        path: The snapshot file
+        compact_ratio: Largest log size, as a fraction of the snapshot's
+    """
+
+    def __init__(self, path: Path, compact_ratio: float = 0.5):
+        self.path = path.with_suffix(".log")
+        self.snapshot_path = path
+        self.compact_ratio = compact_ratio
+        self._header: Optional[Dict[str, Any]] = None
+        # Log size as of read() and our own appends; None until read()
+        self._size: Optional[int] = None
+
+    def read(self, header: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Entries logged against the snapshot with `header`, oldest first."""
+        self._header = header
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._size = 0
+            return []
+        lines = data.split(b"\n")
+        try:
+            current = json.loads(lines[0]) == header
+        except ValueError:
+            current = False
+        if not current:
+            return []
+        self._size = len(data)
+        entries = []
+        for raw in lines[1:]:
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries
+
+    def append(self, entries: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Append entries in one write.
+
+        Returns:
+            False, having written nothing, if the caller should save a new
+            snapshot and reset() instead
+        """
+        data = b"".join(_encode_line(entry) for entry in entries)
+        if not data:
+            return True
+        if self._size is None:
+            return False
+        try:
+            limit = self.snapshot_path.stat().st_size * self.compact_ratio
+        except FileNotFoundError:
+            return False
+        if self._size + len(data) > limit:
+            return False
+        with open(self.path, "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            if os.fstat(f.fileno()).st_size != self._size:
+                return False
+            if not self._size:
+                data = _encode_line(self._header) + data
+            f.write(data)
+        self._size += len(data)
+        return True
+
+    def reset(self, header: Dict[str, Any]) -> None:
+        """Start an empty log for the snapshot just saved with `header`."""
+        self.path.unlink(missing_ok=True)
+        self._header = header
+        self._size = 0
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Buffered, leveled JSON-lines logger for task runs."""
+
+import json
+import sys
+import threading
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# One flush is one write, and concurrent tasks (run-many) take turns
+_OUTPUT_LOCK = threading.Lock()
+
+
+class TaskLogger:
+    """
+    Collects a run's log lines and writes them in one go at flush().
+
+    Lines below `level` are dropped when logged. count() aggregates
+    per-item messages: every call is a debug line, and flush() adds one
+    summary line per message with the total and the first `sample_size`
+    field sets, so a loop over 4,213 duplicates costs one output line
+    unless debug output is on. The buffer is written out early if it
+    reaches `max_buffered` lines.
+    """
+
+    def __init__(
+        self,
+        task_name: str,
+        level: str = "info",
+        stream: Optional[IO[str]] = None,
+        sample_size: int = 3,
+        max_buffered: int = 1000,
+    ):
+        self.task_name = task_name
+        self.level = level
+        self.stream = stream
+        self.sample_size = sample_size
+        self.max_buffered = max_buffered
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._counts: Dict[str, Dict[str, Any]] = {}
+
+    def enabled(self, level: str) -> bool:
+        """Whether lines at `level` are kept."""
+        return LEVELS[level] >= LEVELS[self.level]
+
+    def _record(self, level: str, message: str, fields: Dict[str, Any]) -> str:
+        return json.dumps({
+            "task": self.task_name,
+            "timestamp": datetime.now().isoformat(),
+            "level": level,
+            "message": message,
+            **fields
+        })
+
+    def log(self, level: str, message: str, **fields) -> None:
+        """Buffer one line at `level`."""
+        if not self.enabled(level):
+            return
+        line = self._record(level, message, fields)
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.max_buffered
+        if full:
+            self._write()
+
+    def debug(self, message: str, **fields) -> None:
+        self.log("debug", message, **fields)
+
+    def info(self, message: str, **fields) -> None:
+        self.log("info", message, **fields)
+
+    def warning(self, message: str, **fields) -> None:
+        self.log("warning", message, **fields)
+
+    def error(self, message: str, **fields) -> None:
+        self.log("error", message, **fields)
+
+    def count(self, message: str, level: str = "info", **fields) -> None:
+        """
+        Count an occurrence of a repetitive message.
+
+        The occurrence itself is logged at debug level; flush() reports the
+        total at `level` with a few sample field sets.
+        """
+        with self._lock:
+            entry = self._counts.setdefault(message, {"level": level, "count": 0, "samples": []})
+            entry["count"] += 1
+            if fields and len(entry["samples"]) < self.sample_size:
+                entry["samples"].append(fields)
+        self.debug(message, **fields)
+
+    def _write(self) -> None:
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            stream = self.stream or sys.stdout
+            with _OUTPUT_LOCK:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+
+    def flush(self) -> None:
+        """Emit the aggregated counts and write out everything buffered."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for message, entry in counts.items():
+            fields: Dict[str, Any] = {"count": entry["count"]}
+            if entry["samples"]:
+                fields["samples"] = entry["samples"]
+            self.log(entry["level"], message, **fields)
+        self._write()
@@ -1,18 +1,213 @@
 #!/usr/bin/env python3
 """Memory capture task - extract key items from daily memory files."""
 
+import concurrent.futures
+import hashlib
 import json
+import os
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
+from . import docstore
 from .base import Task
+from .memory_store import STORE_ERRORS, MemoryStore, open_store
+from .minhash import MinHashIndex, text_digest, tokenize
+from .tokens import TokenCache
+
+
+# Extraction patterns, compiled once
+# Pattern 1: Headers (##, ###, etc.)
+HEADER_PATTERN = re.compile(r'^(#{2,})\s+(.+)$', re.MULTILINE)
+# Pattern 2: Bold items (- ** ... **)
+BOLD_PATTERN = re.compile(r'^\s*-\s+\*\*(.+?)\*\*(.*)$', re.MULTILINE)
+# Pattern 3: Lines with markers
+MARKER_PATTERNS = {
+    "todo": re.compile(r'(?i)TODO:?\s*(.+)', re.MULTILINE),
+    "decision": re.compile(r'(?i)DECISION:?\s*(.+)', re.MULTILINE),
+    "blocker": re.compile(r'(?i)BLOCKER:?\s*(.+)', re.MULTILINE),
+    "action": re.compile(r'(?i)ACTION:?\s*(.+)', re.MULTILINE),
+    "note": re.compile(r'(?i)NOTE:?\s*(.+)', re.MULTILINE),
+}
+# Pattern 4: Bullet points that look important (contain certain keywords)
+BULLET_PATTERN = re.compile(r'^\s*[-*]\s+(.+)$', re.MULTILINE)
+IMPORTANT_KEYWORDS = [
+    "decided", "completed", "shipped", "launched", "fixed", "broke",
+    "learned", "discovered", "insight", "problem", "solution"
+]
+
+# All important keywords in one alternation, searched in C instead of
+# eleven `in` tests per bullet
+_IMPORTANT_RE = re.compile("|".join(re.escape(keyword) for keyword in IMPORTANT_KEYWORDS))
+
+# Lines where pattern 1, 2 or 4 can start: "##" at the start, or "-"/"*"
+# as the first non-blank character. Entirely blank lines are left out:
+# ^\s*[-*] starting there matches iff it matches from the next non-blank
+# line, with the same groups and end, because \s* cannot give back
+# whitespace to [-*].
+_LINE_CANDIDATE_RE = re.compile(r'^(?:\#\#|[^\S\n]*[-*])', re.MULTILINE)
+
+# Case-sensitive marker patterns for lowercased ASCII text, where they
+# match exactly where the (?i) ones match on the original
+_LOWER_MARKER_PATTERNS = {
+    marker: re.compile(marker + r':?\s*(.+)') for marker in MARKER_PATTERNS
+}
+
+
+def extract_items(content: str) -> List[Tuple[str, List[str]]]:
+    """
+    Extract (text, markers) items from markdown content.
+    
+    Returns exactly what running re.finditer for the header, bold,
+    marker and bullet patterns one after another returns, in the same
+    order, but with less work:
+    
+    - One scan finds the candidate lines for headers, bold items and
+      bullets; each pattern is then tried with pattern.match() there,
+      keeping its own resume offset, so matches that span lines (\s also
+      matches newlines) are consumed exactly as in a finditer pass.
+    - For ASCII content, markers are found with case-sensitive scans of
+      the lowercased text, which use the regex engine's fast literal
+      search; texts are sliced from the original at the same offsets.
+    
+    Items of one kind share a single markers list (fewer allocations, so
+    far fewer garbage-collector passes on big files); treat it as
+    read-only.
+    """
+    header_markers, bold_markers, bullet_markers = ["header"], ["bold_item"], ["important_bullet"]
+    headers: List[Tuple[str, List[str]]] = []
+    bold_items: List[Tuple[str, List[str]]] = []
+    bullets: List[Tuple[str, List[str]]] = []
+    header_resume = bold_resume = bullet_resume = 0
+    
+    for candidate in _LINE_CANDIDATE_RE.finditer(content):
+        pos = candidate.start()
+        
+        if content.startswith("##", pos):
+            if pos >= header_resume:
+                match = HEADER_PATTERN.match(content, pos)
+                if match:
+                    headers.append((match.group(2).strip(), header_markers))
+                    header_resume = match.end()
+            continue
+        
+        if pos >= bold_resume and content[candidate.end() - 1] == "-":
+            match = BOLD_PATTERN.match(content, pos)
+            if match:
+                bold_items.append(((match.group(1) + match.group(2)).strip(), bold_markers))
+                bold_resume = match.end()
+        
+        if pos >= bullet_resume:
+            match = BULLET_PATTERN.match(content, pos)
+            if match:
+                bullet_resume = match.end()
+                text = match.group(1).strip()
+                if _IMPORTANT_RE.search(text.lower()):
+                    bullets.append((text, bullet_markers))
+    
+    items = headers + bold_items
+    if content.isascii():
+        lowered = content.lower()
+        for marker, pattern in _LOWER_MARKER_PATTERNS.items():
+            markers = [marker]
+            items.extend(
+                (content[match.start(1):match.end(1)].strip(), markers)
+                for match in pattern.finditer(lowered)
+            )
+    else:
+        # Unicode case folding (e.g. "ſ" matches "s") needs the real patterns
+        for marker, pattern in MARKER_PATTERNS.items():
+            markers = [marker]
+            items.extend((match.group(1).strip(), markers) for match in pattern.finditer(content))
+    
+    return items + bullets
+
+
+# Daily files are named by date: memory/2026-02-10.md
+_DAILY_FILE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})\.md')
+
+
+def _extract_file(file_path: Path) -> Tuple[List[Tuple[str, List[str]]], int]:
+    """
+    Read a whole daily file and extract its items (a backfill worker).
+    
+    Module-level so a process pool can pickle it.
+    
+    Returns:
+        (items, characters parsed); ([], 0) if the file cannot be read
+    """
+    try:
+        with open(file_path, "r") as f:
+            content = f.read()
+    except (IOError, UnicodeDecodeError):
+        return [], 0
+    return extract_items(content), len(content)
+
+
+def _parse_date(value: Any) -> date:
+    """A date, an ISO date string, or a relative age ("30d") as a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    match = re.fullmatch(r'(\d+)d', str(value).strip())
+    if match:
+        return datetime.now().date() - timedelta(days=int(match.group(1)))
+    return date.fromisoformat(str(value))
 
 
 class MemoryCaptureTask(Task):
     """Capture key facts, decisions, and preferences from daily memory files."""
     
+    interval_seconds = 1800
+    skip_unchanged = True
+    
+    def __init__(self, dry_run: bool = False):
+        super().__init__(dry_run=dry_run)
+        # Backfill range (inclusive) and pool size; see configure()
+        self.since: Optional[date] = None
+        self.until: Optional[date] = None
+        self.workers: Optional[int] = None
+    
+    def configure(
+        self,
+        since: Any = None,
+        until: Any = None,
+        workers: Optional[int] = None,
+        **options: Any,
+    ) -> None:
+        """
+        Switch to backfill mode: capture from every daily file dated
+        `since` through `until` (default: today) instead of today's and
+        yesterday's.
+        
+        Files are read whole (checkpoints are neither used nor updated)
+        and parsed across a pool of `workers` processes (default: one per
+        CPU); their items then go through one dedup pass, oldest file
+        first, and one store rewrite.
+        
+        Args:
+            since: First date (date, "2026-01-01" or a relative "365d")
+            until: Last date, same formats (requires since)
+            workers: Extraction processes; 1 parses in-process
+        
+        Raises:
+            ValueError: On unknown options, unparsable dates, until without
+                since, or an empty range
+        """
+        super().configure(**options)
+        if until is not None and since is None:
+            raise ValueError("--until requires --since")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        if since is not None:
+            self.since = _parse_date(since)
+            self.until = _parse_date(until) if until is not None else datetime.now().date()
+            if self.until < self.since:
+                raise ValueError(f"Backfill range is empty: {self.since} > {self.until}")
+        self.workers = workers
+    
     @property
     def name(self) -> str:
         return "memory_capture"
@@ -21,6 +216,39 @@ class MemoryCaptureTask(Task):
     def description(self) -> str:
         return "Extract key items from today's and yesterday's memory files"
     
+    def _daily_files(self) -> List[Tuple[Path, str]]:
+        """
+        Return (path, label) for today's and yesterday's daily files, or
+        in backfill mode for the existing daily files in the range, oldest
+        first, labeled with their date.
+        """
+        memory_dir = self._workspace / "memory"
+        if self.since is not None:
+            if not memory_dir.is_dir():
+                return []
+            dated = []
+            for file_path in memory_dir.iterdir():
+                match = _DAILY_FILE_RE.fullmatch(file_path.name)
+                if not match:
+                    continue
+                try:
+                    file_date = date.fromisoformat(match.group(1))
+                except ValueError:
+                    continue
+                if self.since <= file_date <= self.until and file_path.is_file():
+                    dated.append((file_date, file_path))
+            return [(file_path, file_date.isoformat()) for file_date, file_path in sorted(dated)]
+        
+        today = datetime.now().date()
+        yesterday = today - timedelta(days=1)
+        return [
+            (memory_dir / f"{today.isoformat()}.md", "today"),
+            (memory_dir / f"{yesterday.isoformat()}.md", "yesterday"),
+        ]
+    
+    def input_paths(self) -> List[Path]:
+        return [file_path for file_path, _ in self._daily_files()]
+    
     def _calculate_importance(self, text: str, markers: List[str]) -> float:
         """
         Calculate importance score based on content and markers.
@@ -54,90 +282,114 @@ class MemoryCaptureTask(Task):
         
         return min(score, 1.0)  # Cap at 1.0
     
-    def _extract_items(self, file_path: Path) -> List[Tuple[str, List[str]]]:
+    def _read_since_checkpoint(
+        self,
+        file_path: Path,
+        checkpoint: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]], int]:
         """
-        Extract key items from a markdown file.
+        Read the part of a daily file that previous runs have not parsed.
+        
+        A checkpoint records the file's inode, the byte offset just past
+        the last complete line that was parsed, and a hash of that line.
+        Reading resumes at the offset only if the inode is unchanged, the
+        file is at least that long and the line still hashes the same;
+        otherwise (rewritten, truncated or replaced) the whole file is
+        read again. An unterminated last line is parsed but left before
+        the new offset, so it is read again once it is complete.
         
         Returns:
-            List of (text, markers) tuples
+            (content, new checkpoint, offset reading started at); content
+            is None if the file cannot be read
         """
-        if not file_path.exists():
-            return []
-        
         try:
-            with open(file_path, "r") as f:
-                content = f.read()
-        except IOError:
-            return []
-        
-        items = []
-        
-        # Pattern 1: Headers (##, ###, etc.)
-        header_pattern = r'^(#{2,})\s+(.+)$'
-        for match in re.finditer(header_pattern, content, re.MULTILINE):
-            level = len(match.group(1))
-            text = match.group(2).strip()
-            items.append((text, ["header"]))
-        
-        # Pattern 2: Bold items (- ** ... **)
-        bold_pattern = r'^\s*-\s+\*\*(.+?)\*\*(.*)$'
-        for match in re.finditer(bold_pattern, content, re.MULTILINE):
-            text = (match.group(1) + match.group(2)).strip()
-            items.append((text, ["bold_item"]))
-        
-        # Pattern 3: Lines with markers
-        marker_patterns = {
-            "TODO": r'(?i)TODO:?\s*(.+)',
-            "DECISION": r'(?i)DECISION:?\s*(.+)',
-            "BLOCKER": r'(?i)BLOCKER:?\s*(.+)',
-            "ACTION": r'(?i)ACTION:?\s*(.+)',
-            "NOTE": r'(?i)NOTE:?\s*(.+)',
-        }
+            with open(file_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                start = 0
+                if (
+                    checkpoint
+                    and checkpoint.get("inode") == stat.st_ino
+                    and stat.st_size >= checkpoint.get("offset", 0)
+                ):
+                    f.seek(checkpoint["line_start"])
+                    last_line = f.read(checkpoint["offset"] - checkpoint["line_start"])
+                    if hashlib.sha1(last_line).hexdigest() == checkpoint.get("line_hash"):
+                        start = checkpoint["offset"]
+                f.seek(start)
+                data = f.read()
+        except (IOError, KeyError, TypeError, ValueError):
+            return None, None, 0
         
-        for marker, pattern in marker_patterns.items():
-            for match in re.finditer(pattern, content, re.MULTILINE):
-                text = match.group(1).strip()
-                items.append((text, [marker.lower()]))
-        
-        # Pattern 4: Bullet points that look important (contain certain keywords)
-        important_keywords = [
-            "decided", "completed", "shipped", "launched", "fixed", "broke",
-            "learned", "discovered", "insight", "problem", "solution"
-        ]
-        bullet_pattern = r'^\s*[-*]\s+(.+)$'
-        for match in re.finditer(bullet_pattern, content, re.MULTILINE):
-            text = match.group(1).strip()
-            if any(keyword in text.lower() for keyword in important_keywords):
-                items.append((text, ["important_bullet"]))
+        end = data.rfind(b"\n") + 1
+        if end:
+            line_start = data.rfind(b"\n", 0, end - 1) + 1
+            checkpoint = {
+                "inode": stat.st_ino,
+                "offset": start + end,
+                "line_start": start + line_start,
+                "line_hash": hashlib.sha1(data[line_start:end]).hexdigest(),
+            }
+        elif not start:
+            checkpoint = None
         
-        return items
+        # Same newline handling as reading in text mode
+        content = data.decode().replace("\r\n", "\n").replace("\r", "\n")
+        return content, checkpoint, start
     
-    def _calculate_word_overlap(self, text1: str, text2: str) -> float:
-        """Calculate Jaccard similarity (word overlap ratio)."""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
+    def _extract_parallel(
+        self,
+        file_paths: List[Path],
+    ) -> List[Tuple[List[Tuple[str, List[str]]], int]]:
+        """
+        Extract items from whole files across a process pool.
         
-        intersection = len(words1 & words2)
-        union = len(words1 | words2)
+        Extraction is CPU-bound regex work, so threads would serialize on
+        the GIL; each worker reads and parses its own files and only the
+        items travel back. Falls back to parsing in-process for a single
+        file or worker, or if no pool can be started.
         
-        return intersection / union if union > 0 else 0.0
+        Returns:
+            (items, characters parsed) per file, in the order given
+        """
+        workers = min(self.workers or os.cpu_count() or 1, len(file_paths))
+        if workers > 1:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                    # A few chunks per worker: less IPC, still balanced
+                    chunksize = max(1, len(file_paths) // (workers * 4))
+                    return list(pool.map(_extract_file, file_paths, chunksize=chunksize))
+            except (OSError, NotImplementedError, concurrent.futures.process.BrokenProcessPool) as e:
+                self.logger.warning("Process pool unavailable, extracting in-process", error=str(e))
+        return [_extract_file(file_path) for file_path in file_paths]
+    
+    def _save_checkpoints(self, path: Path, checkpoints: Dict[str, Dict[str, Any]]) -> None:
+        """Persist capture checkpoints (never in dry-run)."""
+        if self.dry_run:
+            return
+        try:
+            docstore.save(path, checkpoints, fsync=False)
+        except IOError as e:
+            self.logger.warning("Failed to save capture checkpoints", error=str(e))
     
-    def _is_duplicate(self, text: str, existing_memories: List[Dict], threshold: float = 0.85) -> bool:
-        """Check if text is already in memory store."""
-        for memory in existing_memories:
-            existing_text = memory.get("text", "")
-            similarity = self._calculate_word_overlap(text, existing_text)
-            if similarity >= threshold:
-                return True
-        return False
+    def _is_duplicate(
+        self,
+        token_ids: FrozenSet[int],
+        index: MinHashIndex,
+        signature: Tuple[int, ...],
+        threshold: float = 0.85,
+    ) -> bool:
+        """
+        Check if a text (as token IDs and MinHash signature) is already in
+        memory store.
+        
+        Only LSH candidates from the index are compared, each with exact
+        Jaccard similarity of token ID sets against the threshold.
+        """
+        return index.find_similar(token_ids, threshold, signature) is not None
     
     def run(self) -> Dict[str, Any]:
         """Execute memory capture."""
         memory_dir = self._workspace / "memory"
-        store_path = memory_dir / "store.json"
         
         # Ensure memory directory exists
         if not memory_dir.exists():
@@ -146,43 +398,85 @@ class MemoryCaptureTask(Task):
                 "message": "Memory directory does not exist"
             }
         
+        with open_store(memory_dir) as store:
+            return self._capture(memory_dir, store)
+    
+    def _capture(self, memory_dir: Path, store: MemoryStore) -> Dict[str, Any]:
+        """Capture into an open store (SQLite or store.json, see memory_store)."""
         # Load existing store
-        existing_memories = []
-        if store_path.exists():
-            try:
-                with open(store_path, "r") as f:
-                    existing_memories = json.load(f)
-                if not isinstance(existing_memories, list):
-                    existing_memories = []
-            except (json.JSONDecodeError, IOError):
-                existing_memories = []
-        
-        # Get today and yesterday's dates
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
+        try:
+            with self.span("load_store"):
+                existing_memories = [memory for _, memory in store.items()]
+        except STORE_ERRORS as e:
+            return {
+                "success": False,
+                "message": f"Failed to read memory store: {e}"
+            }
         
-        # Find daily files
-        daily_files = [
-            (memory_dir / f"{today.isoformat()}.md", "today"),
-            (memory_dir / f"{yesterday.isoformat()}.md", "yesterday"),
-        ]
+        # Token IDs and near-duplicate index over the stored texts, both
+        # kept next to the store, so stored texts are not tokenized again
+        existing_texts = [m.get("text", "") for m in existing_memories]
+        tokens_path = memory_dir / "store.tokens.json"
+        index_path = memory_dir / "store.minhash.json"
+        with self.span("load_index"):
+            tokens = TokenCache.open(tokens_path, existing_texts)
+            index = MinHashIndex.open(index_path, existing_texts, tokens=tokens)
+        
+        # Find today's and yesterday's daily files (or the backfill range)
+        daily_files = self._daily_files()
+        backfill = self.since is not None
+        
+        # Per-file checkpoints: only content appended since the last run is parsed
+        checkpoints_path = memory_dir / "store.checkpoints.json"
+        try:
+            checkpoints = docstore.load(checkpoints_path)
+            if not isinstance(checkpoints, dict):
+                checkpoints = {}
+        except (json.JSONDecodeError, IOError):
+            checkpoints = {}
+        new_checkpoints: Dict[str, Dict[str, Any]] = {}
         
         # Extract items
         all_items = []
         files_processed = []
+        chars_parsed = 0
         
-        for file_path, label in daily_files:
-            if file_path.exists():
-                items = self._extract_items(file_path)
+        if backfill:
+            # Whole files, parsed in parallel; merged below in date order
+            with self.span("extract"):
+                extracted = self._extract_parallel([file_path for file_path, _ in daily_files])
+            for (file_path, label), (items, chars) in zip(daily_files, extracted):
                 all_items.extend([(text, markers, label) for text, markers in items])
                 files_processed.append(str(file_path.name))
-                self.log(f"Extracted {len(items)} items from {file_path.name}")
+                chars_parsed += chars
+                self.logger.count("Extracted items", file=file_path.name, items=len(items))
+        else:
+            for file_path, label in daily_files:
+                if file_path.exists():
+                    with self.span("extract"):
+                        content, checkpoint, start = self._read_since_checkpoint(
+                            file_path, checkpoints.get(file_path.name)
+                        )
+                        items = extract_items(content) if content else []
+                    all_items.extend([(text, markers, label) for text, markers in items])
+                    files_processed.append(str(file_path.name))
+                    if checkpoint:
+                        new_checkpoints[file_path.name] = checkpoint
+                    if content:
+                        chars_parsed += len(content)
+                    self.log(
+                        f"Extracted {len(items)} items from {file_path.name}",
+                        resumed_at=start,
+                    )
         
         if not all_items:
+            if not backfill:
+                self._save_checkpoints(checkpoints_path, new_checkpoints)
             return {
                 "success": True,
                 "message": "No items found in daily files",
                 "files_processed": files_processed,
+                "chars_parsed": chars_parsed,
                 "items_extracted": 0,
                 "items_added": 0,
                 "items_skipped": 0
@@ -198,10 +492,15 @@ class MemoryCaptureTask(Task):
                 skipped_count += 1
                 continue
             
-            # Skip if duplicate
-            if self._is_duplicate(text, existing_memories + new_memories):
+            # Skip if duplicate (an empty word set never is)
+            words = tokenize(text)
+            with self.span("duplicate_scan"):
+                token_ids = tokens.intern(words)
+                signature = index.signature(words) if words else None
+                is_duplicate = bool(words) and self._is_duplicate(token_ids, index, signature)
+            if is_duplicate:
                 skipped_count += 1
-                self.log(f"Skipping duplicate", text_preview=text[:50])
+                self.logger.count("Skipping duplicate", text_preview=text[:50])
                 continue
             
             # Calculate importance
@@ -213,13 +512,16 @@ class MemoryCaptureTask(Task):
                 "timestamp": datetime.now().isoformat(),
                 "importance": round(importance, 2),
                 "source": source,
-                "markers": markers,
+                "markers": list(markers),
                 "category": "auto_captured"
             }
             
             new_memories.append(memory)
-            self.log(
-                f"Captured new memory",
+            key = text_digest(text)
+            tokens.put(key, token_ids)
+            index.add(key, token_ids, signature)
+            self.logger.count(
+                "Captured new memory",
                 importance=importance,
                 markers=markers,
                 text_preview=text[:50]
@@ -228,20 +530,13 @@ class MemoryCaptureTask(Task):
         # Append to store (unless dry-run)
         if new_memories and not self.dry_run:
             try:
-                combined_memories = existing_memories + new_memories
-                
-                # Create backup first
-                if store_path.exists():
-                    backup_path = store_path.with_suffix(".json.bak")
-                    with open(backup_path, "w") as f:
-                        json.dump(existing_memories, f, indent=2)
-                
-                # Write updated store
-                with open(store_path, "w") as f:
-                    json.dump(combined_memories, f, indent=2)
+                with self.span("write_store"):
+                    # Row inserts, or an atomic store.json replace (old file
+                    # kept as store.json.bak)
+                    store.insert(new_memories)
                 
                 self.log(f"Wrote {len(new_memories)} new memories to store")
-            except IOError as e:
+            except STORE_ERRORS as e:
                 return {
                     "success": False,
                     "message": f"Failed to write memory store: {e}",
@@ -250,10 +545,26 @@ class MemoryCaptureTask(Task):
                     "items_skipped": skipped_count
                 }
         
+        # Persist new token IDs and signatures (also the first build for an
+        # existing store)
+        if not self.dry_run:
+            try:
+                if tokens.dirty:
+                    tokens.save(tokens_path)
+                if index.dirty:
+                    index.save(index_path)
+            except IOError as e:
+                self.logger.warning("Failed to save token cache or near-duplicate index", error=str(e))
+        
+        # Only now that the store holds the items is their input consumed
+        if not backfill:
+            self._save_checkpoints(checkpoints_path, new_checkpoints)
+        
         return {
             "success": True,
             "message": f"Captured {len(new_memories)} new memories from {len(files_processed)} files",
             "files_processed": files_processed,
+            "chars_parsed": chars_parsed,
             "items_extracted": len(all_items),
             "items_added": len(new_memories),
             "items_skipped": skipped_count
@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 """Memory consolidation task - prune old and duplicate memories."""
 
-import json
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set
 
 from .base import Task
+from .memory_store import STORE_ERRORS, JsonlMemoryStore, MemoryStore, open_store, store_paths
+from .minhash import text_digest
+from .simjoin import SimilarityJoin, dedup_keep_first, frequency_rank
+from .tokens import TokenCache
 
 
 class MemoryConsolidateTask(Task):
     """Consolidate memory store by pruning old/low-importance and duplicate entries."""
     
+    interval_seconds = 86400
+    skip_unchanged = True
+    
     @property
     def name(self) -> str:
         return "memory_consolidate"
@@ -20,48 +27,48 @@ class MemoryConsolidateTask(Task):
     def description(self) -> str:
         return "Prune old, low-importance, and duplicate memory entries"
     
-    def _calculate_word_overlap(self, text1: str, text2: str) -> float:
-        """
-        Calculate Jaccard similarity (word overlap ratio).
-        
-        Returns:
-            Float between 0 and 1, where 1 is identical
-        """
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = len(words1 & words2)
-        union = len(words1 | words2)
-        
-        return intersection / union if union > 0 else 0.0
+    def input_paths(self) -> List[Path]:
+        return store_paths(self._workspace / "memory")
     
-    def _is_duplicate(self, text: str, existing_texts: List[str], threshold: float = 0.9) -> bool:
-        """
-        Check if text is a duplicate of any existing text.
-        
-        Args:
-            text: Text to check
-            existing_texts: List of existing texts to compare against
-            threshold: Similarity threshold (0.9 = 90% overlap)
-        
-        Returns:
-            True if duplicate found
-        """
-        for existing in existing_texts:
-            similarity = self._calculate_word_overlap(text, existing)
-            if similarity >= threshold:
-                return True
-        return False
+    def input_fingerprint(self) -> Optional[str]:
+        """Store fingerprint plus today's date, since the age cutoff moves daily."""
+        fingerprint = super().input_fingerprint()
+        return f"{fingerprint}:{datetime.now().date().isoformat()}"
     
     def run(self) -> Dict[str, Any]:
         """Execute memory consolidation."""
-        store_path = self._workspace / "memory/store.json"
+        with open_store(self._workspace / "memory") as store:
+            if isinstance(store, JsonlMemoryStore):
+                return self._consolidate_streaming(store)
+            return self._consolidate(store)
+    
+    def _is_expired(self, memory: Dict[str, Any], cutoff_date: datetime) -> bool:
+        """Whether a memory is old (before cutoff_date) AND low importance (< 0.3)."""
+        timestamp_str = memory.get("timestamp", "")
+        try:
+            timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+        except (ValueError, AttributeError):
+            # Keep if we can't parse timestamp (be conservative)
+            return False
+        if timestamp.tzinfo is not None:
+            # memory-engine timestamps are UTC; compare in local time
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
         
+        importance = memory.get("importance", 0.5)
+        if timestamp < cutoff_date and importance < 0.3:
+            self.logger.count(
+                "Pruning old low-importance memory",
+                timestamp=timestamp_str,
+                importance=importance,
+                text_preview=memory.get("text", "")[:50]
+            )
+            return True
+        return False
+    
+    def _consolidate(self, store: MemoryStore) -> Dict[str, Any]:
+        """Consolidate an open store (SQLite or store.json, see memory_store)."""
         # Check if store exists
-        if not store_path.exists():
+        if not store.exists():
             return {
                 "success": True,
                 "message": "No memory store found (store.json does not exist)",
@@ -71,68 +78,59 @@ class MemoryConsolidateTask(Task):
         
         # Read store
         try:
-            with open(store_path, "r") as f:
-                memories = json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            with self.span("load_store"):
+                items = store.items()
+        except STORE_ERRORS as e:
             return {
                 "success": False,
                 "message": f"Failed to read memory store: {e}"
             }
-        
-        if not isinstance(memories, list):
-            return {
-                "success": False,
-                "message": "Memory store is not a list"
-            }
+        memories = [memory for _, memory in items]
         
         original_count = len(memories)
         self.log(f"Loaded {original_count} memories from store")
         
+        # Token IDs per text, cached next to the store by memory_capture
+        tokens_path = store.path.parent / "store.tokens.json"
+        with self.span("load_tokens"):
+            tokens = TokenCache.open(tokens_path, (m.get("text", "") for m in memories))
+        
         # Prune old, low-importance entries (>14 days old, importance < 0.3)
         cutoff_date = datetime.now() - timedelta(days=14)
-        kept_memories = []
+        kept_items = []
+        pruned_ids = []
         pruned_by_age = 0
         
-        for memory in memories:
-            # Parse timestamp
-            timestamp_str = memory.get("timestamp", "")
-            try:
-                timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-            except (ValueError, AttributeError):
-                # Keep if we can't parse timestamp (be conservative)
-                kept_memories.append(memory)
-                continue
-            
-            importance = memory.get("importance", 0.5)
-            
-            # Prune if old AND low importance
-            if timestamp < cutoff_date and importance < 0.3:
+        for memory_id, memory in items:
+            if self._is_expired(memory, cutoff_date):
+                pruned_ids.append(memory_id)
                 pruned_by_age += 1
-                self.log(
-                    f"Pruning old low-importance memory",
-                    timestamp=timestamp_str,
-                    importance=importance,
-                    text_preview=memory.get("text", "")[:50]
-                )
             else:
-                kept_memories.append(memory)
+                kept_items.append((memory_id, memory))
+        kept_memories = [memory for _, memory in kept_items]
+        
+        # Prune duplicates (keep first occurrence): >= 0.9 Jaccard with
+        # an earlier kept memory, found in one similarity join
+        keys = [text_digest(memory.get("text", "")) for memory in kept_memories]
+        token_sets = [tokens.ids(memory.get("text", ""), key) for memory, key in zip(kept_memories, keys)]
+        with self.span("duplicate_scan"):
+            duplicate_of = dedup_keep_first(token_sets, threshold=0.9)
         
-        # Prune duplicates (keep first occurrence)
-        seen_texts = []
+        seen_keys = []
         deduplicated_memories = []
         pruned_by_duplication = 0
         
-        for memory in kept_memories:
-            text = memory.get("text", "")
-            
-            if self._is_duplicate(text, seen_texts, threshold=0.9):
+        for (memory_id, memory), key, original in zip(kept_items, keys, duplicate_of):
+            if original is not None:
+                pruned_ids.append(memory_id)
                 pruned_by_duplication += 1
-                self.log(
-                    f"Pruning duplicate memory",
-                    text_preview=text[:50]
+                self.logger.count(
+                    "Pruning duplicate memory",
+                    text_preview=memory.get("text", "")[:50],
+                    duplicate_of=kept_memories[original].get("text", "")[:50]
                 )
             else:
-                seen_texts.append(text)
+                seen_keys.append(key)
                 deduplicated_memories.append(memory)
         
         final_count = len(deduplicated_memories)
@@ -147,28 +145,134 @@ class MemoryConsolidateTask(Task):
             remaining_count=final_count
         )
         
-        # Write back (unless dry-run)
-        if not self.dry_run:
+        # Write back (unless dry-run or nothing was pruned)
+        if pruned_total and not self.dry_run:
             try:
-                # Create backup first
-                backup_path = store_path.with_suffix(".json.bak")
-                with open(backup_path, "w") as f:
-                    json.dump(memories, f, indent=2)
+                with self.span("write_store"):
+                    # Row deletes, or an atomic store.json replace (old file
+                    # kept as store.json.bak)
+                    store.delete(pruned_ids)
                 
-                # Write cleaned store
-                with open(store_path, "w") as f:
-                    json.dump(deduplicated_memories, f, indent=2)
-                
-                self.log(f"Wrote cleaned store to {store_path}")
-            except IOError as e:
+                self.log(f"Wrote cleaned store to {store.path}")
+            except STORE_ERRORS as e:
                 return {
                     "success": False,
                     "message": f"Failed to write memory store: {e}",
                     "pruned_count": pruned_total,
                     "remaining_count": final_count
                 }
+            tokens.retain(seen_keys)
+        
+        if tokens.dirty and not self.dry_run:
+            try:
+                tokens.save(tokens_path)
+            except IOError as e:
+                self.logger.warning("Failed to save token cache", error=str(e))
+        
+        return self._result(original_count, pruned_by_age, pruned_by_duplication)
+    
+    def _consolidate_streaming(self, store: JsonlMemoryStore) -> Dict[str, Any]:
+        """
+        Consolidate store.jsonl in one streamed pass.
+        
+        Memories are read one at a time and survivors are appended to a
+        new segment that replaces the file at the end, so the run holds
+        the token cache and the duplicate index (kept token sets and short
+        previews), never the memories themselves. A first pass over the
+        texts syncs the token cache, whose document frequencies fix the
+        token order the similarity join needs. Prunes exactly what
+        _consolidate() prunes.
+        """
+        if not store.exists():
+            return {
+                "success": True,
+                "message": "No memory store found (store.jsonl does not exist)",
+                "pruned_count": 0,
+                "remaining_count": 0
+            }
+        
+        tokens_path = store.path.parent / "store.tokens.json"
+        try:
+            with self.span("load_tokens"):
+                tokens = TokenCache.open(tokens_path, (m.get("text", "") for _, m in store.stream()))
+        except STORE_ERRORS as e:
+            return {
+                "success": False,
+                "message": f"Failed to read memory store: {e}"
+            }
+        join = SimilarityJoin(0.9, frequency_rank(tokens.values()))
         
-        # Alert if significant pruning occurred
+        cutoff_date = datetime.now() - timedelta(days=14)
+        original_count = 0
+        pruned_by_age = 0
+        pruned_by_duplication = 0
+        seen_keys = []
+        # Preview of each kept memory, by SimilarityJoin position
+        previews: Dict[int, str] = {}
+        
+        try:
+            with self.span("stream_store"):
+                segment = None if self.dry_run else store.rewrite()
+                with segment or nullcontext():
+                    for _, memory in store.stream():
+                        original_count += 1
+                        if self._is_expired(memory, cutoff_date):
+                            pruned_by_age += 1
+                            continue
+                        
+                        text = memory.get("text", "")
+                        key = text_digest(text)
+                        position = len(seen_keys) + pruned_by_duplication
+                        original = join.add(tokens.ids(text, key))
+                        if original is not None:
+                            pruned_by_duplication += 1
+                            self.logger.count(
+                                "Pruning duplicate memory",
+                                text_preview=text[:50],
+                                duplicate_of=previews[original]
+                            )
+                            continue
+                        
+                        previews[position] = text[:50]
+                        seen_keys.append(key)
+                        if segment is not None:
+                            segment.append(memory)
+                    
+                    if segment is not None and not (pruned_by_age or pruned_by_duplication):
+                        segment.discard()
+        except STORE_ERRORS as e:
+            return {
+                "success": False,
+                "message": f"Failed to stream memory store: {e}"
+            }
+        
+        final_count = len(seen_keys)
+        pruned_total = original_count - final_count
+        self.log(
+            f"Consolidation complete",
+            original_count=original_count,
+            pruned_by_age=pruned_by_age,
+            pruned_by_duplication=pruned_by_duplication,
+            pruned_total=pruned_total,
+            remaining_count=final_count
+        )
+        
+        if pruned_total and not self.dry_run:
+            self.log(f"Wrote cleaned store to {store.path}")
+            tokens.retain(seen_keys)
+        
+        if tokens.dirty and not self.dry_run:
+            try:
+                tokens.save(tokens_path)
+            except IOError as e:
+                self.logger.warning("Failed to save token cache", error=str(e))
+        
+        return self._result(original_count, pruned_by_age, pruned_by_duplication)
+    
+    def _result(self, original_count: int, pruned_by_age: int, pruned_by_duplication: int) -> Dict[str, Any]:
+        """The run's result, alerting if significant pruning occurred."""
+        pruned_total = pruned_by_age + pruned_by_duplication
+        final_count = original_count - pruned_total
         if pruned_total > 50:
             self.alert(
                 f"Memory consolidation pruned {pruned_total} entries "
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Memory decay task - decay memory scores over time and archive low scorers."""
+
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import docstore
+from .base import Task
+from .memory_store import STORE_ERRORS, JsonlMemoryStore, MemoryStore, open_store, store_paths, to_shape
+
+# Scores never rise above this (as in the old decay.sh)
+MAX_SCORE = 2.0
+
+# Memories at or below minScore * ARCHIVE_FACTOR are archived (as in decay.sh)
+ARCHIVE_FACTOR = 1.5
+
+# (more than N accesses, weight): frequently used memories decay slower (as in decay.sh)
+ACCESS_WEIGHTS = ((5, 1.2), (2, 1.1))
+
+# memory-engine/config.json "decay" settings used when the file lacks them
+DEFAULT_CONFIG = {
+    "halfLifeDays": 14,
+    "minScore": 0.1,
+    "boostOnRecall": 0.3,
+    "categoryWeights": {},
+}
+
+_DAY_SECONDS = 86400.0
+_UNPARSED = object()
+
+
+def _epoch(value: Any, cache: Dict[Any, Optional[float]]) -> Optional[float]:
+    """
+    Seconds since the epoch for an ISO timestamp or date (naive values are
+    local time), or None if it cannot be parsed. Results are memoized in
+    `cache`: memories captured in one run share a timestamp.
+    """
+    epoch = cache.get(value, _UNPARSED)
+    if epoch is not _UNPARSED:
+        return epoch
+    try:
+        epoch = datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        # Before Python 3.11, fromisoformat() rejects a "Z" suffix
+        try:
+            epoch = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            epoch = None
+    except TypeError:
+        epoch = None
+    cache[value] = epoch
+    return epoch
+
+
+def access_weight(access_count: Optional[int]) -> float:
+    """Decay weight for a memory's accessCount (see ACCESS_WEIGHTS)."""
+    for threshold, weight in ACCESS_WEIGHTS:
+        if (access_count or 0) > threshold:
+            return weight
+    return 1.0
+
+
+def recalled(
+    accessed: Sequence[Optional[float]],
+    created: Sequence[Optional[float]],
+    previous_run: Optional[float],
+) -> List[bool]:
+    """
+    Which memories were recalled since the previous run: last accessed
+    after both the previous run and their creation. Capture sets
+    lastAccessed to the creation time, so a new memory that was never
+    recalled does not count. Nothing counts on the first run.
+    """
+    if previous_run is None:
+        return [False] * len(accessed)
+    return [
+        a is not None and a > previous_run and (c is None or a > c)
+        for a, c in zip(accessed, created)
+    ]
+
+
+def decay_scores(
+    scores: Sequence[float],
+    accessed: Sequence[Optional[float]],
+    created: Sequence[Optional[float]],
+    weights: Sequence[float],
+    now: float,
+    previous_run: Optional[float],
+    half_life_days: float,
+    boost_on_recall: float,
+) -> List[float]:
+    """
+    New scores for parallel arrays of scores, last-access and creation
+    times (epoch seconds) and weights (category weight times
+    access_weight()).
+    
+    score * 0.5 ** (days / (half_life_days * weight)), where days counts
+    from the latest of the creation time, the last access and the previous
+    run, so running daily or weekly decays by the same total and a higher
+    weight means slower decay. A recalled memory (see recalled())
+    gains boost_on_recall. Results are capped at MAX_SCORE and rounded to
+    4 places.
+    """
+    rate = -math.log(2) / (half_life_days * _DAY_SECONDS)
+    # First run: decay from the last access or creation alone
+    floor = now if previous_run is None else previous_run
+    starts = []
+    for a, c in zip(accessed, created):
+        start = c if a is None else a if c is None else max(a, c)
+        if previous_run is not None and start is not None:
+            start = max(start, previous_run)
+        starts.append(floor if start is None else start)
+    boosts = [boost_on_recall if r else 0.0 for r in recalled(accessed, created, previous_run)]
+    exp = math.exp
+    return [
+        round(min(MAX_SCORE, score * exp(rate / weight * max(0.0, now - t)) + boost), 4)
+        for score, t, weight, boost in zip(scores, starts, weights, boosts)
+    ]
+
+
+class MemoryDecayTask(Task):
+    """Decay memory scores by time since last access and archive low scorers."""
+    
+    interval_seconds = 86400
+    
+    @property
+    def name(self) -> str:
+        return "memory_decay"
+    
+    @property
+    def description(self) -> str:
+        return "Decay memory scores over time and archive low-relevance memories"
+    
+    @property
+    def _config_path(self) -> Path:
+        return self._workspace / "scripts/memory-engine/config.json"
+    
+    def input_paths(self) -> List[Path]:
+        return store_paths(self._workspace / "memory") + [self._config_path]
+    
+    def _load_config(self) -> Dict[str, Any]:
+        """
+        The "decay" section of memory-engine/config.json, with defaults.
+        
+        Raises:
+            IOError: If the file exists but cannot be read
+            ValueError: If it is not valid JSON or a setting is out of range
+        """
+        config = dict(DEFAULT_CONFIG)
+        if self._config_path.exists():
+            config.update((docstore.load(self._config_path) or {}).get("decay") or {})
+        if config["halfLifeDays"] <= 0:
+            raise ValueError(f"decay.halfLifeDays must be positive, got {config['halfLifeDays']}")
+        for category, weight in config["categoryWeights"].items():
+            if weight <= 0:
+                raise ValueError(f"decay.categoryWeights.{category} must be positive, got {weight}")
+        return config
+    
+    def _previous_run(self, state_path: Path, store: MemoryStore) -> Optional[float]:
+        """When decay last ran: our state file, else the store's lastDecay (set by decay.sh)."""
+        cache: Dict[Any, Optional[float]] = {}
+        try:
+            previous = _epoch(docstore.load(state_path).get("last_run"), cache)
+            if previous is not None:
+                return previous
+        except (IOError, ValueError, AttributeError):
+            pass
+        return _epoch(store.meta().get("lastDecay"), cache)
+    
+    def run(self) -> Dict[str, Any]:
+        """Execute the decay pass."""
+        try:
+            config = self._load_config()
+        except (IOError, ValueError, TypeError, AttributeError) as e:
+            return {
+                "success": False,
+                "message": f"Failed to read decay config: {e}"
+            }
+        
+        with open_store(self._workspace / "memory") as store:
+            return self._decay(store, config)
+    
+    def _decay(self, store: MemoryStore, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Decay an open store (see memory_store)."""
+        if not store.exists():
+            return {
+                "success": True,
+                "message": "No memory store found",
+                "archived_count": 0,
+                "remaining_count": 0
+            }
+        
+        state_path = store.path.parent / "store.decay.json"
+        now = time.time()
+        try:
+            with self.span("load_store"):
+                previous_run = self._previous_run(state_path, store)
+                rows = store.columns(
+                    ("score", "importance", "category", "access_count", "last_accessed", "timestamp")
+                )
+        except STORE_ERRORS as e:
+            return {
+                "success": False,
+                "message": f"Failed to read memory store: {e}"
+            }
+        
+        min_score = config["minScore"]
+        archive_below = min_score * ARCHIVE_FACTOR
+        category_weights = config["categoryWeights"]
+        
+        with self.span("decay"):
+            # One array per column
+            ids, score_column, importance_column, categories, access_counts, accessed, created = (
+                zip(*rows) if rows else ((),) * 7
+            )
+            # Taskrunner memories have no score yet; they start at their importance
+            scores = [
+                score if score is not None else importance if importance is not None else 1.0
+                for score, importance in zip(score_column, importance_column)
+            ]
+            timestamps: Dict[Any, Optional[float]] = {}
+            access_times = [_epoch(a, timestamps) for a in accessed]
+            created_times = [_epoch(c, timestamps) for c in created]
+            weight = category_weights.get
+            weights = [
+                weight(category, 1.0) * access_weight(count)
+                for category, count in zip(categories, access_counts)
+            ]
+            new_scores = [
+                max(score, min_score)
+                for score in decay_scores(
+                    scores, access_times, created_times, weights, now, previous_run,
+                    config["halfLifeDays"], config["boostOnRecall"]
+                )
+            ]
+        
+        # Final score of each memory to archive, by id
+        archived_scores = {
+            memory_id: score for memory_id, score in zip(ids, new_scores) if score <= archive_below
+        }
+        changes = {
+            memory_id: {"score": new}
+            for memory_id, old, new in zip(ids, scores, new_scores)
+            if new > archive_below and new != old
+        }
+        recalled_count = sum(recalled(access_times, created_times, previous_run))
+        kept_scores = [score for score in new_scores if score > archive_below]
+        average_score = round(sum(kept_scores) / len(kept_scores), 2) if kept_scores else 0
+        
+        self.log(
+            "Decay complete",
+            memory_count=len(ids),
+            archived_count=len(archived_scores),
+            recalled_count=recalled_count,
+            average_score=average_score
+        )
+        
+        if not self.dry_run:
+            try:
+                with self.span("write_store"):
+                    last_decay = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    if isinstance(store, JsonlMemoryStore):
+                        self._rewrite_jsonl(store, changes, archived_scores, last_decay)
+                    else:
+                        if archived_scores:
+                            self._archive(store.path.parent, [
+                                dict(memory, score=archived_scores[memory_id])
+                                for memory_id, memory in store.get(archived_scores)
+                            ])
+                        store.apply(changes, archived_scores, lastDecay=last_decay)
+                docstore.save(
+                    state_path,
+                    {"last_run": datetime.fromtimestamp(now, timezone.utc).isoformat()},
+                    fsync=False
+                )
+            except STORE_ERRORS as e:
+                return {
+                    "success": False,
+                    "message": f"Failed to write memory store: {e}"
+                }
+        
+        if len(archived_scores) > 50:
+            self.alert(
+                f"Memory decay archived {len(archived_scores)} low-relevance memories. "
+                f"{len(kept_scores)} memories remaining.",
+                level="info"
+            )
+        
+        return {
+            "success": True,
+            "message": (
+                f"Decayed {len(ids)} memories, archived {len(archived_scores)} "
+                f"(avg score: {average_score})"
+            ),
+            "memory_count": len(ids),
+            "updated_count": len(changes),
+            "recalled_count": recalled_count,
+            "archived_count": len(archived_scores),
+            "remaining_count": len(kept_scores),
+            "average_score": average_score
+        }
+    
+    def _rewrite_jsonl(
+        self,
+        store: JsonlMemoryStore,
+        changes: Dict[int, Dict[str, Any]],
+        archived_scores: Dict[int, float],
+        last_decay: str
+    ) -> None:
+        """
+        Archive, apply score changes, remove and set lastDecay in one
+        streamed pass (instead of one for the archive and three rewrites).
+        """
+        archived = []
+        with store.rewrite(dict(store.meta(), lastDecay=last_decay)) as segment:
+            for memory_id, memory in store.stream():
+                score = archived_scores.get(memory_id)
+                if score is not None:
+                    archived.append(dict(memory, score=score))
+                    continue
+                fields = changes.get(memory_id)
+                if fields:
+                    memory.update(fields)
+                segment.append(memory)
+            # Before the new segment replaces the file
+            if archived:
+                self._archive(store.path.parent, archived)
+    
+    def _archive(self, memory_dir: Path, memories: List[Dict[str, Any]]) -> None:
+        """Append memories (with their final score) to today's memory/archive/decayed-DATE.json."""
+        archive_path = memory_dir / "archive" / f"decayed-{datetime.now().date().isoformat()}.json"
+        try:
+            archived = docstore.load(archive_path)
+            if not isinstance(archived, list):
+                archived = []
+        except FileNotFoundError:
+            archived = []
+        
+        for memory in memories:
+            archived.append(to_shape(memory, "memories"))
+            self.logger.count(
+                "Archiving low-score memory",
+                score=memory["score"],
+                text_preview=memory.get("text", "")[:50]
+            )
+        docstore.save(archive_path, archived, indent=2)
@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+"""
+Memory store backends shared by the memory tasks and the memory-engine scripts.
+
+Three on-disk formats hold the same memories:
+
+- memory/store.json: the JSON file the tasks and scripts have always
+  used, either a plain list (taskrunner tasks) or {"memories": [...],
+  "meta": {...}} (memory-engine scripts). Every write rewrites the file.
+- memory/store.db: SQLite in WAL mode, with indexes on timestamp,
+  importance and category. Inserts, deletes and score updates touch only
+  the affected rows, and readers never block the writer.
+- memory/store.jsonl: one memory per line. Inserts append; other writes
+  stream the file into a new segment, so nothing holds the whole store
+  in memory (memory_consolidate streams it the same way).
+
+open_store() picks store.db, then store.jsonl, once either exists (see
+`runner.py store migrate`), else the JSON file. All three backends
+expose the same methods and hand out memories in one normalized shape:
+the taskrunner keys (text, timestamp, importance, source, markers,
+category) plus score, last_accessed and access_count where known, and
+any other fields as-is.
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import docstore
+
+STORE_DB = "store.db"
+STORE_JSON = "store.json"
+STORE_JSONL = "store.jsonl"
+
+# What reading or writing any backend can raise
+STORE_ERRORS = (IOError, ValueError, sqlite3.Error)
+
+# Normalized fields, in output order; all but text may be missing (None)
+FIELDS = (
+    "text", "timestamp", "importance", "source", "markers", "category",
+    "score", "last_accessed", "access_count",
+)
+
+# memory-engine ({"memories": [...]}) keys for normalized fields
+ENGINE_KEYS = {
+    "text": "content",
+    "timestamp": "created",
+    "last_accessed": "lastAccessed",
+    "access_count": "accessCount",
+}
+_FROM_ENGINE = {engine: field for field, engine in ENGINE_KEYS.items()}
+
+SHAPES = ("list", "memories")
+BACKENDS = ("sqlite", "jsonl")
+
+Memory = Dict[str, Any]
+
+
+def normalize(entry: Memory) -> Memory:
+    """A memory in either JSON shape, as a normalized dict."""
+    if "content" in entry and "text" not in entry:
+        entry = {_FROM_ENGINE.get(key, key): value for key, value in entry.items()}
+    memory = {field: entry[field] for field in FIELDS if entry.get(field) is not None}
+    memory.setdefault("text", "")
+    for key, value in entry.items():
+        if key not in memory and key not in FIELDS:
+            memory[key] = value
+    return memory
+
+
+def to_shape(memory: Memory, shape: str) -> Memory:
+    """
+    A normalized memory as an entry of the given JSON shape.
+
+    "list" entries are the normalized dict itself. "memories" entries use
+    the memory-engine keys and get the defaults its scripts expect: score
+    from importance (else 1.0), accessCount 0, lastAccessed = created.
+    """
+    if shape == "list":
+        return dict(memory)
+    if shape != "memories":
+        raise ValueError(f"Unknown store shape '{shape}' (expected one of {', '.join(SHAPES)})")
+    entry = {ENGINE_KEYS.get(key, key): value for key, value in memory.items()}
+    entry.setdefault("score", memory.get("importance", 1.0))
+    entry.setdefault("accessCount", 0)
+    if "created" in entry:
+        entry.setdefault("lastAccessed", entry["created"])
+    return entry
+
+
+def parse_document(data: Any) -> Tuple[str, List[Memory], Dict[str, Any]]:
+    """
+    Split a store.json document into (shape, normalized memories, meta).
+
+    Raises:
+        ValueError: If it is neither a list nor {"memories": [...]}
+    """
+    if isinstance(data, list):
+        entries, shape, meta = data, "list", {}
+    elif isinstance(data, dict) and isinstance(data.get("memories"), list):
+        entries, shape, meta = data["memories"], "memories", data.get("meta") or {}
+    else:
+        raise ValueError("Memory store is not a list")
+    if not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("Memory store entries must be objects")
+    return shape, [normalize(entry) for entry in entries], dict(meta)
+
+
+def build_document(memories: Iterable[Memory], shape: str, meta: Optional[Dict[str, Any]] = None) -> Any:
+    """The store.json document for normalized memories in `shape`."""
+    entries = [to_shape(memory, shape) for memory in memories]
+    if shape == "list":
+        return entries
+    return {"memories": entries, "meta": dict(meta or {})}
+
+
+class JsonMemoryStore:
+    """
+    memory/store.json as a store.
+
+    Memory IDs are list positions, so a delete renumbers the memories
+    after it. Every write replaces the file atomically, keeping the
+    previous one as store.json.bak, in the shape the file already had (a
+    plain list for a new file).
+    """
+
+    backend = "json"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._memories: Optional[List[Memory]] = None
+        self._shape = "list"
+        self._meta: Dict[str, Any] = {}
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _load(self) -> List[Memory]:
+        """
+        Raises:
+            IOError: If the file cannot be read
+            ValueError: If it is not valid JSON or not a store document
+        """
+        if self._memories is None:
+            if self.path.exists():
+                self._shape, self._memories, self._meta = parse_document(docstore.load(self.path))
+            else:
+                self._memories = []
+        return self._memories
+
+    def _save(self, memories: List[Memory]) -> None:
+        docstore.save(self.path, build_document(memories, self._shape, self._meta), backup=True)
+        self._memories = memories
+
+    def items(self) -> List[Tuple[int, Memory]]:
+        """(id, memory) pairs in store order."""
+        return list(enumerate(self._load()))
+
+    def columns(self, fields: Iterable[str]) -> List[Tuple[Any, ...]]:
+        """(id, value, ...) for the given normalized fields, in store order."""
+        fields = _check_columns(fields)
+        return [
+            (memory_id, *[memory.get(field) for field in fields])
+            for memory_id, memory in enumerate(self._load())
+        ]
+
+    def get(self, ids: Iterable[int]) -> List[Tuple[int, Memory]]:
+        """(id, memory) pairs for the given ids that exist, in store order."""
+        memories = self._load()
+        return [(memory_id, memories[memory_id]) for memory_id in sorted(set(ids)) if 0 <= memory_id < len(memories)]
+
+    def count(self) -> int:
+        return len(self._load())
+
+    def insert(self, memories: Iterable[Memory]) -> int:
+        """Append memories (either JSON shape); returns how many."""
+        new = [normalize(memory) for memory in memories]
+        if new:
+            self._save(self._load() + new)
+        return len(new)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """Remove memories by id; returns how many were removed."""
+        doomed = set(ids)
+        memories = self._load()
+        kept = [memory for memory_id, memory in enumerate(memories) if memory_id not in doomed]
+        removed = len(memories) - len(kept)
+        if removed:
+            self._save(kept)
+        return removed
+
+    def update(self, changes: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Set normalized fields (e.g. score) on memories by id.
+
+        Returns:
+            Number of memories updated
+        """
+        _check_fields(changes)
+        memories = [dict(memory) for memory in self._load()]
+        updated = 0
+        for memory_id, fields in changes.items():
+            if 0 <= memory_id < len(memories):
+                memories[memory_id].update(fields)
+                updated += 1
+        if updated:
+            self._save(memories)
+        return updated
+
+    def apply(self, changes: Dict[int, Dict[str, Any]], deletes: Iterable[int] = (), **meta: Any) -> None:
+        """
+        update(changes), delete(deletes) and set_meta(**meta) as a single
+        write of the file. Ids refer to the store before the call.
+        """
+        _check_fields(changes)
+        doomed = set(deletes)
+        memories = self._load()
+        kept = [
+            dict(memory, **changes[memory_id]) if changes.get(memory_id) else memory
+            for memory_id, memory in enumerate(memories)
+            if memory_id not in doomed
+        ]
+        self._meta.update(meta)
+        if kept != memories or (meta and self._shape == "memories"):
+            self._save(kept)
+
+    def meta(self) -> Dict[str, Any]:
+        self._load()
+        return dict(self._meta)
+
+    def set_meta(self, **values: Any) -> None:
+        """Update store metadata (kept only by the {"memories"} shape)."""
+        memories = self._load()
+        self._meta.update(values)
+        if self._shape == "memories":
+            self._save(memories)
+
+    def export(self, shape: Optional[str] = None) -> Any:
+        """The store as a JSON document (default: the file's own shape)."""
+        return build_document(self._load(), shape or self._shape, self._meta)
+
+    def import_document(self, data: Any, replace: bool = False) -> int:
+        """
+        Add (or with replace=True, replace everything with) a store.json
+        document's memories. A new or replaced file takes the document's
+        shape.
+        """
+        shape, memories, meta = parse_document(data)
+        existing = [] if replace else self._load()
+        if replace or not self.path.exists():
+            self._shape = shape
+        self._meta.update(meta)
+        self._save(existing + memories)
+        return len(memories)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "JsonMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _check_fields(changes: Dict[int, Dict[str, Any]]) -> None:
+    for fields in changes.values():
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+
+
+def _check_columns(fields: Iterable[str]) -> Tuple[str, ...]:
+    fields = tuple(fields)
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    timestamp TEXT,
+    importance REAL,
+    source TEXT,
+    markers TEXT,
+    category TEXT,
+    score REAL,
+    last_accessed TEXT,
+    access_count INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS memories_timestamp ON memories (timestamp);
+CREATE INDEX IF NOT EXISTS memories_importance ON memories (importance);
+CREATE INDEX IF NOT EXISTS memories_category ON memories (category);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = ", ".join(FIELDS)
+
+
+class SqliteMemoryStore:
+    """
+    memory/store.db as a store.
+
+    Memory IDs are SQLite row ids, and store order is id order (insertion
+    order). markers and any fields outside FIELDS are stored as JSON. Each
+    write is one transaction; with docstore.FSYNC off, WAL commits are not
+    synced (synchronous=NORMAL), which still survives a process crash.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path, timeout: float = 30.0):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path), timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"PRAGMA synchronous={'FULL' if docstore.FSYNC else 'NORMAL'}")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def exists(self) -> bool:
+        return True
+
+    @staticmethod
+    def _row(memory: Memory) -> Tuple[Any, ...]:
+        memory = normalize(memory)
+        values = [memory.get(field) for field in FIELDS]
+        markers = FIELDS.index("markers")
+        if values[markers] is not None:
+            values[markers] = json.dumps(values[markers])
+        extra = {key: value for key, value in memory.items() if key not in FIELDS}
+        return (*values, json.dumps(extra) if extra else None)
+
+    @staticmethod
+    def _memory(row: Tuple[Any, ...]) -> Memory:
+        memory = {field: value for field, value in zip(FIELDS, row) if value is not None}
+        memory.setdefault("text", "")
+        if "markers" in memory:
+            memory["markers"] = json.loads(memory["markers"])
+        if row[len(FIELDS)]:
+            memory.update(json.loads(row[len(FIELDS)]))
+        return memory
+
+    def items(self, where: str = "", params: Iterable[Any] = ()) -> List[Tuple[int, Memory]]:
+        """
+        (id, memory) pairs in store order.
+
+        Args:
+            where: Optional SQL condition on the columns, e.g.
+                "category = ? AND importance >= ?"
+            params: Values for its placeholders
+        """
+        sql = f"SELECT id, {_COLUMNS}, extra FROM memories"
+        if where:
+            sql += f" WHERE {where}"
+        rows = self.connection.execute(sql + " ORDER BY id", tuple(params))
+        return [(row[0], self._memory(row[1:])) for row in rows]
+
+    def columns(self, fields: Iterable[str]) -> List[Tuple[Any, ...]]:
+        """
+        (id, value, ...) for the given normalized fields, in store order.
+
+        Reads only those columns, without building memory dicts.
+        """
+        fields = _check_columns(fields)
+        rows = self.connection.execute(
+            f"SELECT {', '.join(('id',) + fields)} FROM memories ORDER BY id"
+        ).fetchall()
+        if "markers" in fields:
+            markers = fields.index("markers") + 1
+            rows = [
+                row[:markers] + (json.loads(row[markers]) if row[markers] else None,) + row[markers + 1:]
+                for row in rows
+            ]
+        return rows
+
+    def get(self, ids: Iterable[int]) -> List[Tuple[int, Memory]]:
+        """(id, memory) pairs for the given ids that exist, in store order."""
+        return self.items("id IN (SELECT value FROM json_each(?))", (json.dumps(sorted(set(ids))),))
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def insert(self, memories: Iterable[Memory]) -> int:
+        """Append memories (either JSON shape); returns how many."""
+        rows = [self._row(memory) for memory in memories]
+        placeholders = ", ".join("?" * (len(FIELDS) + 1))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO memories ({_COLUMNS}, extra) VALUES ({placeholders})", rows
+            )
+        return len(rows)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """Remove memories by id; returns how many were removed."""
+        with self.connection:
+            return self._delete(ids)
+
+    def _delete(self, ids: Iterable[int]) -> int:
+        cursor = self.connection.executemany(
+            "DELETE FROM memories WHERE id = ?", ((memory_id,) for memory_id in ids)
+        )
+        return cursor.rowcount
+
+    def update(self, changes: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Set normalized fields (e.g. score) on memories by id.
+
+        Returns:
+            Number of memories updated
+        """
+        _check_fields(changes)
+        with self.connection:
+            return self._update(changes)
+
+    def _update(self, changes: Dict[int, Dict[str, Any]]) -> int:
+        # One prepared statement per set of changed fields (usually one)
+        batches: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+        for memory_id, fields in changes.items():
+            if fields:
+                values = [json.dumps(value) if key == "markers" else value for key, value in fields.items()]
+                batches.setdefault(tuple(fields), []).append((*values, memory_id))
+        updated = 0
+        for keys, rows in batches.items():
+            assignments = ", ".join(f"{key} = ?" for key in keys)
+            cursor = self.connection.executemany(f"UPDATE memories SET {assignments} WHERE id = ?", rows)
+            updated += cursor.rowcount
+        return updated
+
+    def apply(self, changes: Dict[int, Dict[str, Any]], deletes: Iterable[int] = (), **meta: Any) -> None:
+        """update(changes), delete(deletes) and set_meta(**meta) in one transaction."""
+        _check_fields(changes)
+        with self.connection:
+            self._update(changes)
+            self._delete(deletes)
+            self._set_meta(meta)
+
+    def meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM meta")}
+
+    def set_meta(self, **values: Any) -> None:
+        with self.connection:
+            self._set_meta(values)
+
+    def _set_meta(self, values: Dict[str, Any]) -> None:
+        self.connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def export(self, shape: Optional[str] = None) -> Any:
+        """The store as a store.json document (default: a plain list)."""
+        return build_document((memory for _, memory in self.items()), shape or "list", self.meta())
+
+    def import_document(self, data: Any, replace: bool = False) -> int:
+        """Add (or with replace=True, replace everything with) a store.json document's memories."""
+        _, memories, meta = parse_document(data)
+        rows = [self._row(memory) for memory in memories]
+        placeholders = ", ".join("?" * (len(FIELDS) + 1))
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM memories")
+            self.connection.executemany(
+                f"INSERT INTO memories ({_COLUMNS}, extra) VALUES ({placeholders})", rows
+            )
+            self._set_meta(meta)
+        return len(rows)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "SqliteMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JsonlSegment:
+    """
+    A new version of a store.jsonl file, written memory by memory (from
+    JsonlMemoryStore.rewrite()). It replaces the file when the `with`
+    block exits cleanly, unless discard() was called, and then releases
+    the store's write lock (`lock_file`).
+    """
+
+    def __init__(self, path: Path, meta: Dict[str, Any], lock_file: IO):
+        self._lock_file = lock_file
+        try:
+            self._file = docstore.AtomicFile(path, backup=True)
+            self.count = 0
+            if meta:
+                self._file.write(_encode_line({"meta": meta}))
+        except BaseException:
+            lock_file.close()
+            raise
+
+    def append(self, memory: Memory) -> None:
+        """Write a normalized memory (as stream() returns them)."""
+        self._file.write(_encode_line(memory))
+        self.count += 1
+
+    def discard(self) -> None:
+        self._file.discard()
+
+    def __enter__(self) -> "JsonlSegment":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self._file.__exit__(*exc_info)
+        finally:
+            self._lock_file.close()
+
+
+def _encode_line(entry: Dict[str, Any]) -> bytes:
+    return (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+
+
+class JsonlMemoryStore:
+    """
+    memory/store.jsonl as a store.
+
+    One normalized memory per line, after an optional {"meta": {...}}
+    header line. Memory IDs are line positions (0 = first memory), so a
+    delete renumbers the memories after it, as with store.json.
+
+    stream() reads one line at a time and insert() appends, so neither
+    depends on the store size. Deletes, updates and metadata changes
+    stream the file into a new segment that replaces it (the old one is
+    kept as store.jsonl.bak); rewrite() exposes that for callers that
+    filter the store in one pass.
+
+    Appends and rewrites take an exclusive flock on store.jsonl.lock, a
+    rewrite from before it reads the file until the new segment is in
+    place, so an append (e.g. `runner.py store add` from capture.sh) can
+    never land in the file a rewrite is about to replace. Readers need no
+    lock. Do not insert() while holding a rewrite() of the same store.
+    """
+
+    backend = "jsonl"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock_path = path.with_name(path.name + ".lock")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _lock(self) -> IO:
+        """Take the store's write lock; it is released when the returned file is closed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self._lock_path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            lock_file.close()
+            raise
+        return lock_file
+
+    def _entries(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        (line number, parsed line) for every non-blank line.
+
+        Raises:
+            IOError: If the file cannot be read
+            ValueError: If a line is not a JSON object
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{self.path}:{line_number}: {e}") from None
+                if not isinstance(entry, dict):
+                    raise ValueError(f"{self.path}:{line_number}: memory is not an object")
+                yield line_number, entry
+
+    def stream(self) -> Iterator[Tuple[int, Memory]]:
+        """(id, memory) pairs in store order, read lazily."""
+        memory_id = 0
+        for line_number, entry in self._entries():
+            if line_number == 1 and "meta" in entry and "text" not in entry:
+                continue
+            yield memory_id, normalize(entry)
+            memory_id += 1
+
+    def items(self) -> List[Tuple[int, Memory]]:
+        """(id, memory) pairs in store order."""
+        return list(self.stream())
+
+    def columns(self, fields: Iterable[str]) -> List[Tuple[Any, ...]]:
+        """(id, value, ...) for the given normalized fields, in store order."""
+        fields = _check_columns(fields)
+        return [(memory_id, *[memory.get(field) for field in fields]) for memory_id, memory in self.stream()]
+
+    def get(self, ids: Iterable[int]) -> List[Tuple[int, Memory]]:
+        """(id, memory) pairs for the given ids that exist, in store order."""
+        wanted = set(ids)
+        return [(memory_id, memory) for memory_id, memory in self.stream() if memory_id in wanted]
+
+    def count(self) -> int:
+        return sum(1 for _ in self.stream())
+
+    def meta(self) -> Dict[str, Any]:
+        for line_number, entry in self._entries():
+            if line_number == 1 and "meta" in entry and "text" not in entry:
+                return dict(entry["meta"] or {})
+            break
+        return {}
+
+    def rewrite(self, meta: Optional[Dict[str, Any]] = None) -> JsonlSegment:
+        """
+        Start a new version of the file (with the current metadata unless
+        `meta` is given); append() the memories to keep to it. Holds the
+        write lock until the segment's `with` block exits, so stream the
+        store inside it.
+
+        Example:
+            with store.rewrite() as segment:
+                for memory_id, memory in store.stream():
+                    if keep(memory):
+                        segment.append(memory)
+        """
+        lock_file = self._lock()
+        try:
+            meta = self.meta() if meta is None else meta
+        except BaseException:
+            lock_file.close()
+            raise
+        return JsonlSegment(self.path, meta, lock_file)
+
+    def insert(self, memories: Iterable[Memory]) -> int:
+        """Append memories (either JSON shape); returns how many."""
+        lines = [_encode_line(normalize(memory)) for memory in memories]
+        if not lines:
+            return 0
+        with self._lock(), open(self.path, "ab") as f:
+            f.write(b"".join(lines))
+            if docstore.FSYNC:
+                f.flush()
+                os.fsync(f.fileno())
+        return len(lines)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """Remove memories by id; returns how many were removed."""
+        doomed = set(ids)
+        removed = 0
+        with self.rewrite() as segment:
+            for memory_id, memory in self.stream():
+                if memory_id in doomed:
+                    removed += 1
+                else:
+                    segment.append(memory)
+            if not removed:
+                segment.discard()
+        return removed
+
+    def update(self, changes: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Set normalized fields (e.g. score) on memories by id.
+
+        Returns:
+            Number of memories updated
+        """
+        _check_fields(changes)
+        updated = 0
+        with self.rewrite() as segment:
+            for memory_id, memory in self.stream():
+                fields = changes.get(memory_id)
+                if fields:
+                    memory.update(fields)
+                    updated += 1
+                segment.append(memory)
+            if not updated:
+                segment.discard()
+        return updated
+
+    def apply(self, changes: Dict[int, Dict[str, Any]], deletes: Iterable[int] = (), **meta: Any) -> None:
+        """update(changes), delete(deletes) and set_meta(**meta) in one rewrite."""
+        _check_fields(changes)
+        doomed = set(deletes)
+        with self.rewrite(dict(self.meta(), **meta)) as segment:
+            for memory_id, memory in self.stream():
+                if memory_id not in doomed:
+                    memory.update(changes.get(memory_id, {}))
+                    segment.append(memory)
+
+    def set_meta(self, **values: Any) -> None:
+        meta = self.meta()
+        meta.update(values)
+        with self.rewrite(meta) as segment:
+            for _, memory in self.stream():
+                segment.append(memory)
+
+    def export(self, shape: Optional[str] = None) -> Any:
+        """The store as a store.json document (default: a plain list)."""
+        return build_document((memory for _, memory in self.stream()), shape or "list", self.meta())
+
+    def import_document(self, data: Any, replace: bool = False) -> int:
+        """Add (or with replace=True, replace everything with) a store.json document's memories."""
+        _, memories, meta = parse_document(data)
+        if not replace and not meta:
+            return self.insert(memories)
+        with self.rewrite(dict(self.meta(), **meta)) as segment:
+            if not replace:
+                for _, memory in self.stream():
+                    segment.append(memory)
+            for memory in memories:
+                segment.append(memory)
+        return len(memories)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "JsonlMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+MemoryStore = Union[JsonMemoryStore, SqliteMemoryStore, JsonlMemoryStore]
+
+
+def store_paths(memory_dir: Path) -> List[Path]:
+    """Files whose changes mean the store changed (for input fingerprints)."""
+    db = memory_dir / STORE_DB
+    if db.exists():
+        return [db, db.with_name(db.name + "-wal")]
+    if (memory_dir / STORE_JSONL).exists():
+        return [memory_dir / STORE_JSONL]
+    return [memory_dir / STORE_JSON]
+
+
+def open_store(memory_dir: Path) -> MemoryStore:
+    """The workspace's store: store.db, else store.jsonl, if either exists; else store.json."""
+    db = memory_dir / STORE_DB
+    if db.exists():
+        return SqliteMemoryStore(db)
+    if (memory_dir / STORE_JSONL).exists():
+        return JsonlMemoryStore(memory_dir / STORE_JSONL)
+    return JsonMemoryStore(memory_dir / STORE_JSON)
+
+
+def migrate(memory_dir: Path, backend: str = "sqlite") -> int:
+    """
+    Move memory/store.json into memory/store.db (or store.jsonl).
+
+    The JSON file is renamed to store.json.imported afterwards, so no
+    script keeps reading a stale copy.
+
+    Args:
+        memory_dir: Directory holding the store
+        backend: "sqlite" or "jsonl"
+
+    Returns:
+        Number of memories imported (0 if there was no store.json)
+
+    Raises:
+        FileExistsError: If the workspace already has store.db or store.jsonl
+        IOError, ValueError: If store.json cannot be read or parsed
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown store backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    for name in (STORE_DB, STORE_JSONL):
+        if (memory_dir / name).exists():
+            raise FileExistsError(f"{memory_dir / name} already exists")
+    source = memory_dir / STORE_JSON
+    data = docstore.load(source) if source.exists() else []
+    parse_document(data)  # Validate before creating the new store
+    if backend == "sqlite":
+        target: MemoryStore = SqliteMemoryStore(memory_dir / STORE_DB)
+    else:
+        target = JsonlMemoryStore(memory_dir / STORE_JSONL)
+    with target:
+        imported = target.import_document(data, replace=True)
+    if source.exists():
+        source.replace(source.with_name(source.name + ".imported"))
+    return imported
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""MinHash signatures with an LSH banding index for near-duplicate text lookup."""
+
+import base64
+import hashlib
+import os
+from array import array
+import random
+import struct
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from . import docstore
+
+if TYPE_CHECKING:
+    from .tokens import TokenCache
+
+# Universal hashing modulo a 32-bit prime keeps signatures compact (4 bytes/value)
+_PRIME = 4294967291
+
+
+def text_digest(text: str) -> str:
+    """Stable key for a memory text."""
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Word set used for Jaccard similarity (lowercased, whitespace-split)."""
+    return frozenset(text.lower().split())
+
+
+def jaccard(words1: FrozenSet[Hashable], words2: FrozenSet[Hashable]) -> float:
+    """Jaccard similarity of two word (or token ID) sets; 0.0 if either is empty."""
+    if not words1 or not words2:
+        return 0.0
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
+
+
+class MinHashIndex:
+    """
+    Locality-sensitive index over word sets, keyed by text digest.
+
+    Each text gets a MinHash signature of num_perm values, split into
+    `bands` bands of num_perm / bands rows. Texts sharing any whole band
+    are candidates, so a lookup touches only a few buckets instead of the
+    whole store; callers verify candidates with exact Jaccard.
+
+    With the defaults (64 permutations, 16 bands x 4 rows), a pair at
+    Jaccard 0.85 becomes a candidate with probability 1 - (1 - 0.85^4)^16,
+    about 0.999992, and identical word sets always do.
+
+    Signatures persist as JSON next to the memory store. open() reconciles
+    them with the store's current texts by digest, so entries for removed
+    memories are dropped and only new texts are hashed. save() appends just
+    the added and removed keys to a change log next to the file, and
+    rewrites the file only now and then (see docstore.ChangeLog).
+
+    Candidates are verified against the sets passed to add(): word sets,
+    or token ID sets from a TokenCache (callers then pass signatures,
+    which are always computed from the words).
+    """
+
+    VERSION = 1
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._pack = struct.Struct(f"<{num_perm}I")
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._tokens: Dict[str, FrozenSet[str]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(bands)]
+        # Each word's num_perm hash values; bounded, see signature()
+        self._word_hashes: Dict[str, array] = {}
+        self.max_cached_words = 200_000
+        # Keys added and removed since the file was read or written
+        self._added: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._log: Optional[docstore.ChangeLog] = None
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    @property
+    def dirty(self) -> bool:
+        """True if there are changes save() has not written yet."""
+        return bool(self._added or self._removed)
+
+    def _hash_word(self, word: str) -> array:
+        h = zlib.crc32(word.encode())
+        return array("I", [(a * h + b) % _PRIME for a, b in self._perms])
+
+    def signature(self, words: Iterable[str]) -> Tuple[int, ...]:
+        """
+        MinHash signature of a non-empty word set.
+
+        A word's hash values are computed once and cached (up to
+        max_cached_words words, then the cache starts over), so a
+        signature is mostly an elementwise min over cached rows.
+        """
+        cache = self._word_hashes
+        rows = []
+        for word in words:
+            row = cache.get(word)
+            if row is None:
+                if len(cache) >= self.max_cached_words:
+                    cache.clear()
+                row = cache[word] = self._hash_word(word)
+            rows.append(row)
+        if len(rows) == 1:
+            return tuple(rows[0])
+        return tuple(map(min, *rows))
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows] for i in range(self.bands)]
+
+    def add(self, key: str, words: FrozenSet[Hashable], signature: Optional[Tuple[int, ...]] = None) -> None:
+        """
+        Index a word set under `key` (empty sets are never similar, so
+        skipped). `signature` is required if `words` are token IDs.
+        """
+        if not words or key in self._signatures:
+            return
+        if signature is None:
+            signature = self.signature(words)
+        self._signatures[key] = signature
+        self._tokens[key] = words
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(band_key, set()).add(key)
+        self._added.add(key)
+        self._removed.discard(key)
+
+    def remove(self, key: str) -> None:
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        self._tokens.pop(key, None)
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = band.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band[band_key]
+        if key in self._added:
+            self._added.discard(key)
+        else:
+            self._removed.add(key)
+
+    def tokens(self, key: str) -> FrozenSet[Hashable]:
+        return self._tokens[key]
+
+    def candidates(self, words: FrozenSet[Hashable], signature: Optional[Tuple[int, ...]] = None) -> Set[str]:
+        """Keys sharing at least one band with `words` (whose signature may be passed)."""
+        if not words or not self._signatures:
+            return set()
+        if signature is None:
+            signature = self.signature(words)
+        found: Set[str] = set()
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = band.get(band_key)
+            if bucket:
+                found |= bucket
+        return found
+
+    def find_similar(
+        self,
+        words: FrozenSet[Hashable],
+        threshold: float,
+        signature: Optional[Tuple[int, ...]] = None,
+    ) -> Optional[str]:
+        """A key whose word set has Jaccard >= threshold with `words`, if any."""
+        for key in self.candidates(words, signature):
+            if jaccard(words, self._tokens[key]) >= threshold:
+                return key
+        return None
+
+    # -- persistence --------------------------------------------------------
+
+    @classmethod
+    def open(
+        cls,
+        path: Path,
+        texts: Iterable[str],
+        tokens: Optional["TokenCache"] = None,
+        **kwargs,
+    ) -> "MinHashIndex":
+        """
+        Load the index at `path` and sync it with `texts`.
+
+        Signatures saved under different parameters, or an unreadable
+        file, are ignored and recomputed. With a TokenCache the index
+        holds its token ID sets, so stored texts are not tokenized again.
+        """
+        index = cls(**kwargs)
+        index._log = docstore.ChangeLog(path)
+        saved: Dict[str, str] = {}
+        try:
+            data = docstore.load(path)
+            if (
+                data.get("version") == cls.VERSION
+                and data.get("num_perm") == index.num_perm
+                and data.get("seed") == index.seed
+            ):
+                saved = data.get("signatures", {})
+                for entry in index._log.read({"generation": data.get("generation")}):
+                    if "signature" in entry:
+                        saved[entry["key"]] = entry["signature"]
+                    else:
+                        saved.pop(entry.get("key"), None)
+        except (IOError, ValueError, AttributeError):
+            pass
+
+        current: Dict[str, str] = {}
+        for text in texts:
+            current.setdefault(text_digest(text), text)
+
+        loaded: Set[str] = set()
+        for key, text in current.items():
+            signature = None
+            if key in saved:
+                try:
+                    signature = index._pack.unpack(base64.b64decode(saved[key]))
+                    loaded.add(key)
+                except (ValueError, TypeError, struct.error):
+                    signature = None
+            if tokens is None:
+                index.add(key, tokenize(text), signature)
+                continue
+            ids = tokens.ids(text, key)
+            if ids and signature is None:
+                signature = index.signature(tokens.words(ids))
+            index.add(key, ids, signature)
+
+        # What the file lacks compared to the store
+        index._added = set(index._signatures) - loaded
+        index._removed = set(saved) - set(index._signatures)
+        return index
+
+    def _encode(self, key: str) -> str:
+        return base64.b64encode(self._pack.pack(*self._signatures[key])).decode()
+
+    def save(self, path: Path) -> None:
+        """
+        Write the changes since open() (or the last save) to the change
+        log, or, when it declines, the whole index under a new generation.
+        """
+        if self._log is None or self._log.snapshot_path != path:
+            self._log = docstore.ChangeLog(path)
+        changes = [{"key": key, "signature": self._encode(key)} for key in sorted(self._added)]
+        changes.extend({"key": key} for key in sorted(self._removed))
+        if not self._log.append(changes):
+            generation = os.urandom(8).hex()
+            docstore.save(
+                path,
+                {
+                    "version": self.VERSION,
+                    "num_perm": self.num_perm,
+                    "seed": self.seed,
+                    "generation": generation,
+                    "signatures": {key: self._encode(key) for key in self._signatures},
+                },
+                fsync=False,
+            )
+            self._log.reset({"generation": generation})
+        self._added.clear()
+        self._removed.clear()
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+BM25 recall over the memory store, from an inverted index kept in SQLite.
+
+The index lives next to the store in memory/store.recall.db and works
+with every store backend (see memory_store). It holds each memory's
+term frequencies, length and display fields, so queries never read the
+store itself:
+
+    from tasks.recall import RecallIndex
+
+    with RecallIndex(memory_dir) as index:
+        for hit in index.search("deploy pipeline", categories=["decision"]):
+            print(hit["relevance"], hit["text"])
+
+Before answering, search() compares the store files' inode, size and
+mtime with those seen at the last sync. Only if they changed is the store
+read again, and then only memories whose text is new or gone touch the
+postings; score and category changes (e.g. from memory_decay) are plain
+row updates.
+
+Ranking: BM25 (k1=1.2, b=0.75) over lowercased alphanumeric terms. A
+hit's relevance is its BM25 score relative to the best hit (1.0 for the
+best); hits below min_relevance are dropped, and the rest are ordered by
+relevance * (1 + memory score), so memories that decay has kept strong
+come first among similar matches.
+"""
+
+import json
+import math
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import docstore
+from .memory_store import STORE_ERRORS, open_store, store_paths
+from .minhash import text_digest
+
+RECALL_DB = "store.recall.db"
+
+# memory-engine/config.json "recall" settings used when the file lacks them
+DEFAULT_CONFIG = {
+    "maxResults": 15,
+    "minRelevance": 0.4,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Errors from reading the store or the index
+RECALL_ERRORS = STORE_ERRORS
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    score REAL NOT NULL,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_score ON docs (score);
+CREATE TABLE IF NOT EXISTS memories (
+    doc INTEGER PRIMARY KEY,
+    memory_id INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    text TEXT NOT NULL,
+    source TEXT,
+    timestamp TEXT,
+    access_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS memories_memory_id ON memories (memory_id);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE,
+    df INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term_id, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Fields of a hit, in the order queries select them
+_HIT_FIELDS = ("memory_id", "text", "category", "score", "source", "timestamp", "access_count")
+_HIT_COLUMNS = "m.memory_id, m.text, d.category, d.score, m.source, m.timestamp, m.access_count"
+
+
+def terms(text: str) -> List[str]:
+    """Index terms of a text: lowercased runs of letters and digits."""
+    return _TERM_RE.findall(text.lower())
+
+
+def load_config(path: Path) -> Dict[str, Any]:
+    """
+    The "recall" section of memory-engine/config.json, with defaults.
+
+    Raises:
+        IOError: If the file exists but cannot be read
+        ValueError: If it is not valid JSON, or not an object
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path.exists():
+        document = docstore.load(path) or {}
+        section = (document.get("recall") or {}) if isinstance(document, dict) else None
+        if not isinstance(section, dict):
+            raise ValueError(f"{path}: expected an object with a \"recall\" object")
+        config.update(section)
+    return config
+
+
+def _fingerprint(paths: Iterable[Path]) -> str:
+    """inode, size and mtime of the store files (as in Task.input_fingerprint)."""
+    parts = []
+    for path in sorted(paths):
+        try:
+            st = path.stat()
+            parts.append(f"{path}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return "\n".join(parts)
+
+
+class RecallIndex:
+    """
+    The recall index for the store in `memory_dir`.
+
+    Args:
+        memory_dir: Directory holding the store
+        config: "recall" settings (see load_config); defaults otherwise
+        timeout: Seconds to wait for another process's sync to finish
+    """
+
+    VERSION = 1
+
+    def __init__(self, memory_dir: Path, config: Optional[Dict[str, Any]] = None, timeout: float = 30.0):
+        self.memory_dir = memory_dir
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.path = memory_dir / RECALL_DB
+        memory_dir.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+            if self._state("version") != str(self.VERSION):
+                self._reset()
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, **values: Any) -> None:
+        self.connection.executemany(
+            "INSERT INTO state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(key, str(value)) for key, value in values.items()],
+        )
+
+    def _reset(self) -> None:
+        for table in ("docs", "memories", "terms", "postings", "state"):
+            self.connection.execute(f"DELETE FROM {table}")
+        self._set_state(version=self.VERSION, doc_count=0, total_length=0)
+
+    def _term_ids(self, words: Iterable[str]) -> Dict[str, int]:
+        """IDs of indexed terms among `words`."""
+        return dict(self.connection.execute(
+            "SELECT term, term_id FROM terms WHERE term IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(words)),),
+        ))
+
+    # -- maintenance --------------------------------------------------------
+
+    def sync(self, force: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the store.
+
+        Does nothing (without reading the store) if the store files are
+        unchanged since the last sync, unless `force` is set.
+
+        Returns:
+            Counts of docs added, removed and updated (all 0 if skipped)
+
+        Raises:
+            IOError, ValueError, sqlite3.Error: If the store or the index
+                cannot be read or written
+        """
+        counts = {"added": 0, "removed": 0, "updated": 0}
+        paths = store_paths(self.memory_dir)
+        if not force and self._state("fingerprint") == _fingerprint(paths):
+            return counts
+
+        connection = self.connection
+        # Serialize syncs between processes; a sync that waited may find
+        # the work already done
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            fingerprint = _fingerprint(paths)
+            if not force and self._state("fingerprint") == fingerprint:
+                connection.rollback()
+                return counts
+            with open_store(self.memory_dir) as store:
+                rows = store.columns(("text", "category", "score", "importance", "source", "timestamp", "access_count"))
+            counts = self._apply(rows)
+            self._set_state(fingerprint=fingerprint)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        return counts
+
+    def _apply(self, rows: Sequence[Tuple[Any, ...]]) -> Dict[str, int]:
+        """Diff store rows against the index by text digest and apply the changes."""
+        connection = self.connection
+        existing: Dict[str, List[Tuple[Any, ...]]] = {}
+        for doc_row in connection.execute(
+            "SELECT m.doc, m.digest, m.memory_id, d.category, d.score, m.source, m.timestamp, m.access_count "
+            "FROM memories m JOIN docs d ON d.doc = m.doc ORDER BY m.doc DESC"
+        ):
+            existing.setdefault(doc_row[1], []).append(doc_row)
+
+        added: List[Tuple[Any, ...]] = []
+        updates: List[Tuple[Any, ...]] = []
+        for memory_id, text, category, score, importance, source, timestamp, access_count in rows:
+            text = text or ""
+            # Memories without a score (taskrunner captures) rank by importance
+            score = score if score is not None else importance if importance is not None else 1.0
+            fields = (memory_id, category, score, source, timestamp, access_count)
+            digest = text_digest(text)
+            matches = existing.get(digest)
+            if matches:
+                doc_row = matches.pop()
+                if doc_row[2:] != fields:
+                    updates.append((doc_row[0],) + fields)
+            else:
+                added.append((digest, text) + fields)
+        removed = [doc_row[0] for matches in existing.values() for doc_row in matches]
+
+        df_delta: Counter = Counter()
+        length_delta = 0
+
+        if removed:
+            # Postings are keyed by term, so find a removed doc's terms from its text
+            deleted: List[Tuple[str, int]] = []
+            for doc, text in connection.execute(
+                "SELECT doc, text FROM memories WHERE doc IN (SELECT value FROM json_each(?))",
+                (json.dumps(removed),),
+            ):
+                words = terms(text)
+                length_delta -= len(words)
+                unique = set(words)
+                df_delta.update({word: -1 for word in unique})
+                deleted.extend((word, doc) for word in unique)
+            term_ids = self._term_ids({word for word, _ in deleted})
+            connection.executemany(
+                "DELETE FROM postings WHERE term_id = ? AND doc = ?",
+                [(term_ids[word], doc) for word, doc in deleted],
+            )
+            connection.executemany("DELETE FROM docs WHERE doc = ?", [(doc,) for doc in removed])
+            connection.executemany("DELETE FROM memories WHERE doc = ?", [(doc,) for doc in removed])
+
+        if updates:
+            connection.executemany(
+                "UPDATE docs SET category = ?, score = ? WHERE doc = ?",
+                [(category, score, doc) for doc, _, category, score, _, _, _ in updates],
+            )
+            connection.executemany(
+                "UPDATE memories SET memory_id = ?, source = ?, timestamp = ?, access_count = ? WHERE doc = ?",
+                [
+                    (memory_id, source, timestamp, access_count, doc)
+                    for doc, memory_id, _, _, source, timestamp, access_count in updates
+                ],
+            )
+
+        if added:
+            frequencies = [Counter(terms(text)) for _, text, *_ in added]
+            vocabulary = set().union(*frequencies)
+            connection.executemany(
+                "INSERT OR IGNORE INTO terms (term, df) VALUES (?, 0)",
+                [(word,) for word in vocabulary],
+            )
+            term_ids = self._term_ids(vocabulary)
+            first_doc = connection.execute("SELECT COALESCE(MAX(doc), 0) + 1 FROM docs").fetchone()[0]
+            docs, memories, postings = [], [], []
+            for doc, (counts, (digest, text, memory_id, category, score, source, timestamp, access_count)) in enumerate(
+                zip(frequencies, added), first_doc
+            ):
+                length = sum(counts.values())
+                length_delta += length
+                df_delta.update(counts.keys())
+                docs.append((doc, length, score, category))
+                memories.append((doc, memory_id, digest, text, source, timestamp, access_count))
+                postings.extend((term_ids[word], doc, tf, length) for word, tf in counts.items())
+            postings.sort()
+            connection.executemany("INSERT INTO docs (doc, length, score, category) VALUES (?, ?, ?, ?)", docs)
+            connection.executemany(
+                "INSERT INTO memories (doc, memory_id, digest, text, source, timestamp, access_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                memories,
+            )
+            connection.executemany("INSERT INTO postings (term_id, doc, tf, length) VALUES (?, ?, ?, ?)", postings)
+
+        connection.executemany(
+            "UPDATE terms SET df = df + ? WHERE term = ?",
+            [(delta, word) for word, delta in df_delta.items() if delta],
+        )
+        connection.execute("DELETE FROM terms WHERE df <= 0")
+        self._set_state(
+            doc_count=int(self._state("doc_count") or 0) + len(added) - len(removed),
+            total_length=int(self._state("total_length") or 0) + length_delta,
+        )
+        return {"added": len(added), "removed": len(removed), "updated": len(updates)}
+
+    # -- queries ------------------------------------------------------------
+
+    def search(
+        self,
+        query: str = "",
+        categories: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        min_relevance: Optional[float] = None,
+        sync: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Memories matching `query`, best first.
+
+        Args:
+            query: Free text; empty returns the highest-scored memories
+            categories: Only memories in these categories
+            limit: Most results to return (default: recall.maxResults)
+            min_relevance: Drop hits whose BM25 score is below this
+                fraction of the best hit's (default: recall.minRelevance)
+            sync: Sync with the store first (see sync())
+
+        Returns:
+            One dict per hit: memory_id, text, category, score, source,
+            timestamp, access_count, relevance (None without a query) and
+            rank (the sort key)
+        """
+        if sync:
+            self.sync()
+        if limit is None:
+            limit = self.config["maxResults"]
+        if min_relevance is None:
+            min_relevance = self.config["minRelevance"]
+
+        category_sql, params = "", []
+        if categories:
+            category_sql = "d.category IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(categories)))
+
+        words = set(terms(query))
+        if not words:
+            rows = self.connection.execute(
+                f"SELECT {_HIT_COLUMNS}, NULL, d.score FROM docs d JOIN memories m ON m.doc = d.doc "
+                f"WHERE {category_sql or 1} ORDER BY d.score DESC, d.doc LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            return [self._hit(row) for row in rows]
+
+        doc_count = int(self._state("doc_count") or 0)
+        idf = [
+            (term_id, math.log(1 + (doc_count - df + 0.5) / (df + 0.5)))
+            for term_id, df in self.connection.execute(
+                "SELECT term_id, df FROM terms WHERE term IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(words)),),
+            )
+        ]
+        if not idf:
+            return []
+        average_length = max(int(self._state("total_length") or 0) / doc_count, 1.0)
+
+        # tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length)),
+        # from postings alone unless filtering by category
+        category_join = f"JOIN docs d ON d.doc = p.doc AND {category_sql}" if categories else ""
+        rows = self.connection.execute(
+            f"""
+            WITH q (term_id, idf) AS (
+                SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+            ),
+            hits AS (
+                SELECT p.doc AS doc, SUM(q.idf * p.tf * {K1 + 1} / (p.tf + {K1 * (1 - B)} + ? * p.length)) AS bm25
+                FROM q JOIN postings p ON p.term_id = q.term_id {category_join}
+                GROUP BY p.doc
+            ),
+            ranked AS (SELECT doc, bm25 / MAX(bm25) OVER () AS relevance FROM hits)
+            SELECT r.doc, r.relevance, r.relevance * (1 + d.score) AS rank
+            FROM ranked r JOIN docs d ON d.doc = r.doc
+            WHERE r.relevance >= ?
+            ORDER BY rank DESC, r.doc
+            LIMIT ?
+            """,
+            (json.dumps(idf), K1 * B / average_length, *params, min_relevance - 1e-9, limit),
+        ).fetchall()
+        # Display fields only for the hits returned
+        fields = {
+            row[0]: row[1:]
+            for row in self.connection.execute(
+                f"SELECT d.doc, {_HIT_COLUMNS} FROM docs d JOIN memories m ON m.doc = d.doc "
+                "WHERE d.doc IN (SELECT value FROM json_each(?))",
+                (json.dumps([doc for doc, _, _ in rows]),),
+            )
+        }
+        return [self._hit(fields[doc] + (relevance, rank)) for doc, relevance, rank in rows]
+
+    @staticmethod
+    def _hit(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        hit = dict(zip(_HIT_FIELDS, row))
+        hit["relevance"] = None if row[-2] is None else round(row[-2], 4)
+        hit["rank"] = round(row[-1], 4)
+        return hit
+
+    def record_access(self, hits: Sequence[Dict[str, Any]]) -> int:
+        """
+        Mark hits as recalled in the store (last_accessed = now,
+        access_count + 1), which memory_decay rewards with boostOnRecall.
+
+        Hits are matched to memories by text digest, not memory_id: a
+        capture or consolidate between search() and this call may have
+        renumbered the store. Hits whose text is gone are skipped.
+
+        Returns:
+            Number of memories updated
+        """
+        if not hits:
+            return 0
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        wanted = Counter(text_digest(hit["text"] or "") for hit in hits)
+        paths = store_paths(self.memory_dir)
+        with open_store(self.memory_dir) as store:
+            before = _fingerprint(paths)
+            changes = {}
+            for memory_id, text, access_count in store.columns(("text", "access_count")):
+                digest = text_digest(text or "")
+                if wanted[digest]:
+                    wanted[digest] -= 1
+                    changes[memory_id] = {"last_accessed": now, "access_count": (access_count or 0) + 1}
+            updated = store.update(changes)
+            after = _fingerprint(paths)
+        if updated and self._state("fingerprint") == before:
+            # The index matched the store just before our write, so applying
+            # that write is a full sync; otherwise the next search() syncs
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE memories SET access_count = ? WHERE memory_id = ?",
+                    [(fields["access_count"], memory_id) for memory_id, fields in changes.items()],
+                )
+                self._set_state(fingerprint=after)
+        return updated
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "RecallIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
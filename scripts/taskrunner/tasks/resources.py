@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Resource usage snapshots for task runs (getrusage + /proc I/O counters)."""
+
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# Per-thread counters when the platform has them, so concurrent tasks in
+# `runner.py run-many` don't see each other's CPU time or I/O
+_RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None)
+_PROC_SELF_IO = Path("/proc/self/io")
+_PROC_THREAD_IO = Path("/proc/thread-self/io") if Path("/proc/thread-self/io").exists() else _PROC_SELF_IO
+
+# ru_maxrss is kilobytes on Linux but bytes on macOS
+_MAXRSS_TO_KB = 1 / 1024 if sys.platform == "darwin" else 1
+
+
+def _read_proc_io(path: Path) -> Dict[str, int]:
+    """Parse /proc/<self>/io; empty on platforms without procfs."""
+    counters = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key.strip()] = int(value)
+    except (IOError, ValueError):
+        pass
+    return counters
+
+
+def snapshot(scope: str = "thread") -> Dict[str, Any]:
+    """
+    Capture the counters needed to compute a usage delta.
+
+    scope is "thread" for the calling thread's counters (falling back to
+    the process where the OS has none) or "process" for the whole process.
+    Async runs need "process": their work happens on the event loop thread
+    and in to_thread() workers, not on the thread that waits for them.
+    """
+    if scope == "thread" and _RUSAGE_THREAD is not None:
+        own, io_path = resource.getrusage(_RUSAGE_THREAD), _PROC_THREAD_IO
+    else:
+        scope, own, io_path = "process", resource.getrusage(resource.RUSAGE_SELF), _PROC_SELF_IO
+    return {
+        "scope": scope,
+        "self": own,
+        "process": resource.getrusage(resource.RUSAGE_SELF),
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN),
+        "io": _read_proc_io(io_path),
+    }
+
+
+def usage_since(before: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resource usage between `before` (from snapshot()) and now.
+
+    CPU time, context switches and I/O are deltas in the snapshot's scope,
+    reported as "scope": "thread" (the calling thread only) or "process"
+    (everything the process did meanwhile, including concurrent tasks).
+    peak_rss_kb is the process high-water mark. The "children" block covers
+    subprocesses reaped in the meantime (e.g. curl or `openclaw cron
+    list`); it is process-wide, so concurrent tasks share it.
+    """
+    after = snapshot(before["scope"])
+    own, own_before = after["self"], before["self"]
+    children, children_before = after["children"], before["children"]
+
+    usage: Dict[str, Any] = {
+        "scope": before["scope"],
+        "cpu_user_seconds": round(own.ru_utime - own_before.ru_utime, 4),
+        "cpu_system_seconds": round(own.ru_stime - own_before.ru_stime, 4),
+        "peak_rss_kb": int(after["process"].ru_maxrss * _MAXRSS_TO_KB),
+        "voluntary_ctx_switches": own.ru_nvcsw - own_before.ru_nvcsw,
+        "involuntary_ctx_switches": own.ru_nivcsw - own_before.ru_nivcsw,
+    }
+
+    io, io_before = after["io"], before["io"]
+    for key, name in [
+        ("read_bytes", "read_bytes"),
+        ("write_bytes", "write_bytes"),
+        ("rchar", "read_chars"),
+        ("wchar", "write_chars"),
+    ]:
+        if key in io and key in io_before:
+            usage[name] = io[key] - io_before[key]
+
+    usage["children"] = {
+        "cpu_user_seconds": round(children.ru_utime - children_before.ru_utime, 4),
+        "cpu_system_seconds": round(children.ru_stime - children_before.ru_stime, 4),
+        "peak_rss_kb": int(children.ru_maxrss * _MAXRSS_TO_KB),
+    }
+    return usage
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Exact Jaccard similarity join over token ID sets (prefix and size filtering)."""
+
+import math
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+from .minhash import jaccard
+
+# Slack for the float products in the filter bounds. The bounds only have
+# to be loose enough never to drop a pair jaccard() would accept; every
+# candidate is then verified with jaccard() itself.
+_EPS = 1e-9
+
+
+def _min_overlap(size: int, threshold: float) -> int:
+    """Fewest shared tokens a set of `size` needs with a match (>= t * size)."""
+    return max(1, math.ceil(threshold * size - _EPS))
+
+
+def frequency_rank(sets: Iterable[FrozenSet[int]]) -> Dict[int, int]:
+    """Rank every token in `sets` by document frequency, rarest first."""
+    frequency: Counter = Counter()
+    for token_ids in sets:
+        frequency.update(token_ids)
+    return {token_id: position for position, (token_id, _) in enumerate(
+        sorted(frequency.items(), key=lambda item: (item[1], item[0]))
+    )}
+
+
+class SimilarityJoin:
+    """
+    Keep-first near-duplicate detection, one set at a time.
+
+    add() reports whether a set duplicates (jaccard >= threshold) any
+    earlier kept set, and keeps it if not. Only kept sets are indexed, so
+    memory grows with the kept sets, not with everything seen.
+
+    Filtering (see dedup_keep_first) needs one token order fixed in
+    advance. Any order gives exact results; rarest-first (frequency_rank)
+    keeps the probed prefixes short.
+
+    Args:
+        threshold: Jaccard threshold in (0, 1]
+        rank: Position of every token that add() will see
+    """
+
+    def __init__(self, threshold: float, rank: Dict[int, int]):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self._rank = rank
+        self._index: Dict[int, List[int]] = {}
+        self._kept: Dict[int, FrozenSet[int]] = {}
+        self._added = 0
+
+    def add(self, token_ids: FrozenSet[int]) -> Optional[int]:
+        """
+        Check the next set against the kept ones.
+
+        Returns:
+            The add() position (from 0) of a kept set it duplicates, or
+            None if it is kept
+        """
+        position = self._added
+        self._added += 1
+        size = len(token_ids)
+        if not size:
+            return None
+
+        threshold = self.threshold
+        prefix = sorted(token_ids, key=self._rank.__getitem__)[:size - _min_overlap(size, threshold) + 1]
+        min_size = threshold * size - _EPS
+        max_size = size / threshold + _EPS
+
+        checked = set()
+        for token_id in prefix:
+            for j in self._index.get(token_id, ()):
+                if j in checked:
+                    continue
+                checked.add(j)
+                other = self._kept[j]
+                if min_size <= len(other) <= max_size and jaccard(token_ids, other) >= threshold:
+                    return j
+
+        self._kept[position] = token_ids
+        for token_id in prefix:
+            self._index.setdefault(token_id, []).append(position)
+        return None
+
+
+def dedup_keep_first(sets: Sequence[FrozenSet[int]], threshold: float) -> List[Optional[int]]:
+    """
+    Find near-duplicates, keeping the first occurrence.
+
+    Set i is a duplicate if some earlier *kept* set j has
+    jaccard(sets[i], sets[j]) >= threshold. Which sets are kept is exactly
+    what comparing each set against every kept set before it decides,
+    without the quadratic scan (when a set duplicates several kept sets,
+    the one reported may not be the earliest):
+
+    - Tokens are ranked rarest first. If J(x, y) >= t then x and y share
+      at least ceil(t * max(|x|, |y|)) tokens, so they must share a token
+      within the first |x| - ceil(t * |x|) + 1 ranked tokens of x (its
+      prefix). Only prefixes go into the inverted index, and only a
+      set's prefix is probed, so frequent tokens are rarely looked up.
+    - Candidates of size below t * |x| or above |x| / t cannot reach the
+      threshold and are skipped before verification.
+
+    Args:
+        sets: Token ID sets in store order (see TokenCache); empty sets
+            are never similar to anything
+        threshold: Jaccard threshold in (0, 1]
+
+    Returns:
+        For each set, the index of a kept set it duplicates, or None if it
+        is kept
+    """
+    join = SimilarityJoin(threshold, frequency_rank(sets))
+    return [join.add(token_ids) for token_ids in sets]
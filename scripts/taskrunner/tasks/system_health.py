@@ -1,18 +1,22 @@
 #!/usr/bin/env python3
 """System health check task."""
 
+import asyncio
 import json
 import shutil
 import subprocess
 from pathlib import Path
 from typing import Any, Dict, List
 
+from . import aio
 from .base import Task
 
 
 class SystemHealthTask(Task):
     """Quick system health check."""
     
+    interval_seconds = 300
+    
     @property
     def name(self) -> str:
         return "system_health"
@@ -21,17 +25,20 @@ class SystemHealthTask(Task):
     def description(self) -> str:
         return "Check OpenClaw gateway, disk space, and cron job health"
     
-    def _check_gateway(self) -> Dict[str, Any]:
+    async def _check_gateway(self) -> Dict[str, Any]:
         """Check if OpenClaw gateway is running."""
         try:
-            result = subprocess.run(
-                ["curl", "-s", "-o", "/dev/null", "-w", "%{http_code}", "http://localhost:18789"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            try:
+                status_code = str(await aio.http_probe("http://localhost:18789", timeout=5))
+            except asyncio.TimeoutError:
+                # Before OSError: since Python 3.11 this is TimeoutError, an OSError
+                return {
+                    "status": "unhealthy",
+                    "details": "Gateway request timed out"
+                }
+            except OSError:
+                status_code = "000"  # same as curl when nothing answers
             
-            status_code = result.stdout.strip()
             is_running = status_code.startswith("2") or status_code.startswith("3")
             
             return {
@@ -39,11 +46,6 @@ class SystemHealthTask(Task):
                 "http_code": status_code,
                 "details": "Gateway responding" if is_running else "Gateway not responding"
             }
-        except subprocess.TimeoutExpired:
-            return {
-                "status": "unhealthy",
-                "details": "Gateway request timed out"
-            }
         except Exception as e:
             return {
                 "status": "unknown",
@@ -81,13 +83,11 @@ class SystemHealthTask(Task):
                 "details": f"Failed to check disk space: {e}"
             }
     
-    def _check_cron_jobs(self) -> Dict[str, Any]:
+    async def _check_cron_jobs(self) -> Dict[str, Any]:
         """Check for failed cron jobs."""
         try:
-            result = subprocess.run(
+            result = await aio.run_subprocess(
                 ["openclaw", "cron", "list", "--json"],
-                capture_output=True,
-                text=True,
                 timeout=10,
             )
 
@@ -174,14 +174,21 @@ class SystemHealthTask(Task):
                 "details": f"Failed to check cron jobs: {e}",
             }
 
-    def run(self) -> Dict[str, Any]:
+    async def _timed(self, span_name: str, check) -> Dict[str, Any]:
+        """Await a check inside its own span."""
+        with self.span(span_name):
+            return await check
+    
+    async def run(self) -> Dict[str, Any]:
         """Execute system health check."""
         self.log("Running system health check")
         
-        # Run all checks
-        gateway = self._check_gateway()
-        disk = self._check_disk_space()
-        cron = self._check_cron_jobs()
+        # Run all checks concurrently
+        gateway, disk, cron = await asyncio.gather(
+            self._timed("gateway", self._check_gateway()),
+            self._timed("disk", asyncio.to_thread(self._check_disk_space)),
+            self._timed("cron", self._check_cron_jobs()),
+        )
         
         # Determine overall status
         statuses = [gateway["status"], disk["status"], cron["status"]]
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Interned token-ID sets for memory texts, cached next to the store."""
+
+import base64
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from . import docstore
+from .minhash import text_digest, tokenize
+
+
+def _pack(ids: Iterable[int]) -> str:
+    """Sorted IDs as base64 little-endian uint32."""
+    packed = array("I", sorted(ids))
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode()
+
+
+def _unpack(encoded: str) -> array:
+    unpacked = array("I", base64.b64decode(encoded))
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+class TokenCache:
+    """
+    Each memory text's word set (see minhash.tokenize) as a set of integer
+    token IDs, keyed by text digest.
+
+    Words are interned once into a shared vocabulary, so similarity checks
+    between cached texts are integer set operations with no lowercasing,
+    splitting or string hashing. A changed text has a new digest, so its
+    old entry is never reused.
+
+    Persisted as JSON next to the memory store: the vocabulary plus one
+    sorted uint32 array per text. open() reconciles the file with the
+    store's current texts, dropping entries for removed memories and
+    tokenizing only texts it has not seen. save() appends just the new
+    words and the added and removed entries to a change log next to the
+    file, and rewrites the file only now and then (see docstore.ChangeLog).
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self._vocab: List[str] = []
+        self._word_ids: Dict[str, int] = {}
+        self._sets: Dict[str, FrozenSet[int]] = {}
+        # Keys added (or changed) and removed since the file was read or written
+        self._added: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._log: Optional[docstore.ChangeLog] = None
+        # In-memory token ID -> ID in the file (they differ once save() renumbers)
+        self._file_ids: Dict[int, int] = {}
+        self._file_vocab_size = 0
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sets
+
+    @property
+    def dirty(self) -> bool:
+        """True if there are changes save() has not written yet."""
+        return bool(self._added or self._removed)
+
+    def intern(self, words: Iterable[str]) -> FrozenSet[int]:
+        """Token IDs for a word set, adding unseen words to the vocabulary."""
+        word_ids = self._word_ids
+        ids = []
+        for word in words:
+            token_id = word_ids.get(word)
+            if token_id is None:
+                token_id = word_ids[word] = len(self._vocab)
+                self._vocab.append(word)
+            ids.append(token_id)
+        return frozenset(ids)
+
+    def words(self, ids: Iterable[int]) -> List[str]:
+        """The words behind token IDs (e.g. to compute a MinHash signature)."""
+        vocab = self._vocab
+        return [vocab[token_id] for token_id in ids]
+
+    def values(self) -> Iterable[FrozenSet[int]]:
+        """Every cached token ID set (e.g. for simjoin.frequency_rank)."""
+        return self._sets.values()
+
+    def get(self, key: str) -> Optional[FrozenSet[int]]:
+        """Cached token IDs for a text digest, if any."""
+        return self._sets.get(key)
+
+    def ids(self, text: str, key: Optional[str] = None) -> FrozenSet[int]:
+        """
+        Token IDs for `text`, tokenizing it only on the first request.
+
+        Args:
+            text: Memory text
+            key: Its text_digest(), if already known
+        """
+        if key is None:
+            key = text_digest(text)
+        ids = self._sets.get(key)
+        if ids is None:
+            ids = self._sets[key] = self.intern(tokenize(text))
+            self._added.add(key)
+            self._removed.discard(key)
+        return ids
+
+    def put(self, key: str, ids: FrozenSet[int]) -> None:
+        """Cache token IDs (from intern()) for the text with digest `key`."""
+        if self._sets.get(key) != ids:
+            self._sets[key] = ids
+            self._added.add(key)
+            self._removed.discard(key)
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """Drop entries whose digest is not in `keys`."""
+        keys = set(keys)
+        for key in [key for key in self._sets if key not in keys]:
+            del self._sets[key]
+            self._added.discard(key)
+            self._removed.add(key)
+
+    # -- persistence --------------------------------------------------------
+
+    @classmethod
+    def open(cls, path: Path, texts: Iterable[str]) -> "TokenCache":
+        """
+        Load the cache at `path` and sync it with `texts`.
+
+        An unreadable file, or one written by another version, is ignored
+        and every text is tokenized again.
+        """
+        cache = cls()
+        cache._log = docstore.ChangeLog(path)
+        saved: Dict[str, str] = {}
+        try:
+            data = docstore.load(path)
+            if data.get("version") == cls.VERSION:
+                vocab = list(data.get("vocab", []))
+                saved = data.get("entries", {})
+                for entry in cache._log.read({"generation": data.get("generation")}):
+                    if "vocab" in entry:
+                        vocab.extend(entry["vocab"])
+                    elif "ids" in entry:
+                        saved[entry["key"]] = entry["ids"]
+                    else:
+                        saved.pop(entry.get("key"), None)
+                cache._vocab = vocab
+                cache._word_ids = {word: token_id for token_id, word in enumerate(cache._vocab)}
+        except (IOError, ValueError, AttributeError, TypeError, KeyError):
+            cache._vocab, cache._word_ids, saved = [], {}, {}
+        cache._file_ids = {token_id: token_id for token_id in range(len(cache._vocab))}
+        cache._file_vocab_size = len(cache._vocab)
+
+        loaded: Set[str] = set()
+        for text in texts:
+            key = text_digest(text)
+            if key in cache._sets:
+                continue
+            encoded = saved.get(key)
+            if encoded is not None:
+                try:
+                    ids = _unpack(encoded)
+                    if not ids or max(ids) < len(cache._vocab):
+                        cache._sets[key] = frozenset(ids)
+                        loaded.add(key)
+                        continue
+                except (ValueError, TypeError):
+                    pass
+            cache._sets[key] = cache.intern(tokenize(text))
+
+        # What the file lacks compared to the store
+        cache._added = set(cache._sets) - loaded
+        cache._removed = set(saved) - set(cache._sets)
+        return cache
+
+    def _changes(self) -> List[Dict[str, Any]]:
+        """Change log entries for the added and removed keys; new words get the next file IDs."""
+        file_ids = self._file_ids
+        new_words: List[str] = []
+        entries: List[Dict[str, Any]] = []
+        for key in sorted(self._added):
+            ids = sorted(self._sets[key])
+            for token_id in ids:
+                if token_id not in file_ids:
+                    file_ids[token_id] = self._file_vocab_size + len(new_words)
+                    new_words.append(self._vocab[token_id])
+            entries.append({"key": key, "ids": _pack(file_ids[token_id] for token_id in ids)})
+        entries.extend({"key": key} for key in sorted(self._removed))
+        self._file_vocab_size += len(new_words)
+        return ([{"vocab": new_words}] if new_words else []) + entries
+
+    def save(self, path: Path) -> None:
+        """
+        Write the changes since open() (or the last save) to the change
+        log, or, when it declines, the whole cache under a new generation
+        with the vocabulary renumbered to the words still in use (the
+        in-memory IDs are unchanged).
+        """
+        if self._log is None or self._log.snapshot_path != path:
+            self._log = docstore.ChangeLog(path)
+        if not self._log.append(self._changes()):
+            used = sorted(set().union(*self._sets.values())) if self._sets else []
+            remap = {old: new for new, old in enumerate(used)}
+            generation = os.urandom(8).hex()
+            docstore.save(
+                path,
+                {
+                    "version": self.VERSION,
+                    "generation": generation,
+                    "vocab": [self._vocab[token_id] for token_id in used],
+                    "entries": {
+                        key: _pack(remap[token_id] for token_id in ids)
+                        for key, ids in self._sets.items()
+                    },
+                },
+                fsync=False,
+            )
+            self._log.reset({"generation": generation})
+            self._file_ids, self._file_vocab_size = remap, len(used)
+        self._added.clear()
+        self._removed.clear()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Tests for tasks/alerts.py: journal offsets, ack and compaction, and repeat suppression."""
+
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from runner import alert_main
+from tasks.alerts import AlertJournal, alert_fingerprint
+from test_all import run_tests, temp_dir
+
+
+def alert(message: str) -> dict:
+    return {"task": "t", "level": "warning", "message": message}
+
+
+def append(journal: AlertJournal, message: str, window: float = 3600):
+    return journal.append(alert(message), dedup_key=alert_fingerprint("t", message), window=window)
+
+
+def test_offsets_read_and_ack():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        first = journal.append(alert("one"))
+        second = journal.append(alert("two"))
+        alerts, next_offset = journal.read()
+        assert [a["message"] for a in alerts] == ["one", "two"]
+        assert [a["ack_offset"] for a in alerts] == [first, second] and next_offset == second
+        # Acknowledge part of a batch
+        journal.ack(first)
+        assert [a["message"] for a in journal.read()[0]] == ["two"]
+        assert [a["message"] for a in journal.read(since=0)[0]] == ["one", "two"]
+        # Acknowledging an older offset never moves the cursor back
+        journal.ack(next_offset)
+        journal.ack(first)
+        assert journal.read() == ([], next_offset)
+
+
+def test_torn_and_invalid_lines_are_skipped():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        journal.append(alert("one"))
+        with open(journal.journal_path, "ab") as f:
+            f.write(b"not json\n{\"message\": \"half")
+        alerts, next_offset = journal.read()
+        assert [a["message"] for a in alerts] == ["one"]
+        # The torn line is not consumed: it is re-read once complete
+        assert next_offset == journal.journal_path.stat().st_size - len(b'{"message": "half')
+
+
+def test_compaction_keeps_offsets_stable():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        offsets = [journal.append(alert(f"alert {i}")) for i in range(5)]
+        journal.ack(offsets[2], background=False)
+        assert journal.journal_path.stat().st_size == offsets[4]  # below COMPACT_MIN_BYTES
+        journal.compact()
+        assert journal.journal_path.stat().st_size == offsets[4] - offsets[2]
+        alerts, next_offset = journal.read()
+        assert [a["ack_offset"] for a in alerts] == offsets[3:] and next_offset == offsets[4]
+        assert journal.append(alert("after")) > offsets[4]
+        journal.ack(offsets[3])
+        assert [a["message"] for a in journal.read()[0]] == ["alert 4", "after"]
+
+
+def crash_compaction(journal: AlertJournal, at: str) -> None:
+    """Run compact() but stop it before ("replace") or after replacing the journal file."""
+    save_cursor = journal._save_cursor
+
+    def save(cursor):
+        if at == "save" and "compacting" not in cursor:
+            raise SystemExit("crash")
+        save_cursor(cursor)
+        if at == "replace":
+            raise SystemExit("crash")
+
+    with mock.patch.object(journal, "_save_cursor", save):
+        try:
+            journal.compact()
+        except SystemExit:
+            pass
+
+
+def test_compaction_crash_keeps_base_and_file_paired():
+    for at in ("replace", "save"):
+        with temp_dir() as tmp:
+            journal = AlertJournal(tmp)
+            offsets = [journal.append(alert(f"alert {i}")) for i in range(5)]
+            journal.ack(offsets[2], background=False)
+            crash_compaction(journal, at)
+            reopened = AlertJournal(tmp)
+            alerts, next_offset = reopened.read()
+            assert [a["ack_offset"] for a in alerts] == offsets[3:] and next_offset == offsets[4], at
+            assert reopened.append(alert("after")) > offsets[4], at
+            # A later compaction finishes the job
+            reopened.compact()
+            assert reopened.journal_path.stat().st_size == offsets[4] - offsets[2] + len(
+                json.dumps(alert("after")) + "\n"
+            ), at
+            assert [a["message"] for a in reopened.read()[0]] == ["alert 3", "alert 4", "after"], at
+
+
+def test_ack_compacts_once_enough_is_acknowledged():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        journal.COMPACT_MIN_BYTES = 100
+        offsets = [journal.append(alert(f"alert {i}")) for i in range(5)]
+        journal.ack(offsets[3], background=False)
+        assert journal.journal_path.stat().st_size == offsets[4] - offsets[3]
+        assert [a["message"] for a in journal.read()[0]] == ["alert 4"]
+
+
+def test_legacy_pending_json_is_imported_once():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        journal.legacy_path.write_text(json.dumps([alert("old one"), alert("old two")]))
+        journal.append(alert("new"))
+        assert [a["message"] for a in journal.read()[0]] == ["old one", "old two", "new"]
+        assert not journal.legacy_path.exists()
+        assert journal.legacy_path.with_suffix(".json.imported").exists()
+        # A reader imports it too, without any append
+        other = AlertJournal(tmp / "other")
+        other.alerts_dir.mkdir()
+        other.legacy_path.write_text(json.dumps([alert("old")]))
+        assert [a["message"] for a in other.read()[0]] == ["old"]
+
+
+def test_fingerprint_masks_numbers_and_case():
+    assert alert_fingerprint("t", "Disk 86% full") == alert_fingerprint("t", "disk  87% FULL")
+    assert alert_fingerprint("t", "Disk full") != alert_fingerprint("u", "Disk full")
+
+
+def test_repeats_are_counted_then_reported():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        assert append(journal, "Disk 86% full") is not None
+        assert append(journal, "Disk 87% full") is None
+        assert append(journal, "Disk 88% full") is None
+        # Window over: delivered with the count of everything seen meanwhile
+        journal._dedup[alert_fingerprint("t", "Disk 86% full")]["last_emitted"] -= 7200
+        assert append(journal, "Disk 89% full") is not None
+        alerts, _ = journal.read()
+        assert [a.get("occurrences") for a in alerts] == [None, 4]
+        assert alerts[1]["message"].startswith("Disk 89% full (seen 4 times since ")
+
+
+def test_processes_see_each_others_counts():
+    with temp_dir() as tmp:
+        first, second = AlertJournal(tmp), AlertJournal(tmp)
+        assert append(first, "Gateway down") is not None
+        assert append(second, "Gateway down") is None
+        assert append(first, "Gateway down") is None
+        assert first._dedup == second._sync_dedup()
+        assert first._dedup[alert_fingerprint("t", "Gateway down")]["count"] == 3
+
+
+def test_suppression_appends_instead_of_rewriting_the_index():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        append(journal, "Gateway down")
+        size = journal.dedup_log_path.stat().st_size
+        append(journal, "Gateway down")
+        assert not journal.dedup_path.exists()
+        lines = journal.dedup_log_path.read_bytes().splitlines()
+        assert journal.dedup_log_path.stat().st_size == size + len(lines[-1]) + 1
+        assert json.loads(lines[-1])["count"] == 2
+
+
+def test_log_is_folded_into_the_snapshot():
+    with temp_dir() as tmp:
+        journal, other = AlertJournal(tmp), AlertJournal(tmp)
+        journal.DEDUP_COMPACT_BYTES = 1024
+        append(other, "Gateway down")
+        for i in range(40):
+            append(journal, f"Alert {chr(65 + i % 26)}{chr(65 + i // 26)}")
+        assert journal.dedup_path.exists()
+        assert journal.dedup_log_path.stat().st_size < 1024
+        # The other process notices the new generation and reloads
+        assert append(other, "Gateway down") is None
+        assert other._sync_dedup() == journal._sync_dedup()
+        assert len(other._dedup) == 41
+
+
+def test_compaction_drops_expired_counters():
+    with temp_dir() as tmp:
+        journal = AlertJournal(tmp)
+        append(journal, "Short-lived", window=0.001)
+        append(journal, "Long-lived")
+        time.sleep(0.01)
+        journal.compact()
+        assert list(json.loads(journal.dedup_path.read_text())) == [alert_fingerprint("t", "Long-lived")]
+        assert AlertJournal(tmp)._sync_dedup() == journal._dedup
+
+
+def test_alert_command_uses_task_alert_shape_and_dedup():
+    with temp_dir() as tmp, contextlib.chdir(tmp):
+        results = []
+        for purged in (3, 4):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                assert alert_main(["--source", "session-watchdog", f"Purged {purged} sessions"]) == 0
+            results.append(json.loads(out.getvalue())["delivered"])
+        assert results == [True, False]
+        [delivered], _ = AlertJournal(Path("$HOME/.openclaw/workspace/scripts/taskrunner/alerts")).read()
+        assert delivered["task"] == "session-watchdog" and delivered["level"] == "info"
+        assert delivered["message"] == "Purged 3 sessions" and "timestamp" in delivered
+
+
+def test_shared_journal_per_directory():
+    with temp_dir() as tmp:
+        assert AlertJournal.shared(tmp) is AlertJournal.shared(tmp)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -1,16 +1,40 @@
 #!/usr/bin/env python3
-"""Test runner for all tasks."""
+"""Test runner for all tasks and the behaviour tests next to this file."""
 
+import contextlib
+import importlib
 import sys
+import tempfile
+import traceback
 from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterator
 
 # Add tasks to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from tasks.memory_capture import MemoryCaptureTask
 from tasks.memory_consolidate import MemoryConsolidateTask
+from tasks.memory_decay import MemoryDecayTask
 from tasks.system_health import SystemHealthTask
 
+# Behaviour tests next to this file; each test_* function raises on failure
+TEST_MODULES = [
+    "test_simjoin",
+    "test_minhash",
+    "test_tokens",
+    "test_memory_decay",
+    "test_alerts",
+    "test_history",
+    "test_metrics",
+    "test_memory_store",
+    "test_recall",
+    "test_system_health",
+    "test_retries",
+    "test_runner",
+    "test_watch",
+]
+
 
 def test_task(task_class, task_name: str) -> bool:
     """
@@ -78,6 +102,36 @@ def test_task(task_class, task_name: str) -> bool:
         return False
 
 
+@contextlib.contextmanager
+def temp_dir() -> Iterator[Path]:
+    """A scratch directory for one test, removed afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        yield Path(tmp)
+
+
+def run_tests(module: ModuleType) -> Dict[str, bool]:
+    """
+    Run a test module's test_* functions in definition order.
+    
+    Returns:
+        Pass/fail per "module.function" name
+    """
+    results = {}
+    for name, test in vars(module).items():
+        if not name.startswith("test_") or not callable(test):
+            continue
+        label = f"{module.__name__}.{name}"
+        try:
+            test()
+            print(f"✓ {label}")
+            results[label] = True
+        except Exception:
+            print(f"❌ {label}")
+            traceback.print_exc()
+            results[label] = False
+    return results
+
+
 def main():
     """Run all task tests."""
     print("="*60)
@@ -88,6 +142,7 @@ def main():
     tasks = [
         (MemoryCaptureTask, "memory_capture"),
         (MemoryConsolidateTask, "memory_consolidate"),
+        (MemoryDecayTask, "memory_decay"),
         (SystemHealthTask, "system_health"),
     ]
     
@@ -97,6 +152,12 @@ def main():
         passed = test_task(task_class, task_name)
         results[task_name] = passed
     
+    for module_name in TEST_MODULES:
+        print(f"\n{'='*60}")
+        print(f"Testing: {module_name}")
+        print(f"{'='*60}")
+        results.update(run_tests(importlib.import_module(module_name)))
+    
     # Summary
     print("\n" + "="*60)
     print("TEST SUMMARY")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Tests for history.py: segment rotation and the binary-searched per-task index."""
+
+import json
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import history
+from history import INDEX_RECORD, TaskHistory, parse_since
+from test_all import run_tests, temp_dir
+
+
+def record(task: str, n: int) -> dict:
+    """Record number n, timestamped at epoch 1000 + n."""
+    return {"task": task, "timestamp": datetime.fromtimestamp(1000 + n).isoformat(), "n": n}
+
+
+def fill(history_log: TaskHistory, count: int) -> None:
+    """Append alternating a/b records."""
+    for n in range(count):
+        history_log.append(record("ab"[n % 2], n))
+
+
+def test_rotates_by_size_and_compresses():
+    with temp_dir() as logs:
+        history_log = TaskHistory(logs, max_segment_bytes=300, rotate_daily=False)
+        fill(history_log, 20)
+        segments = sorted(path.name for path in (logs / "segments").iterdir())
+        assert segments and all(name.endswith(".jsonl.gz") for name in segments)
+        assert (logs / "tasks.jsonl").stat().st_size <= 300
+        assert [r["n"] for r in history_log.query("a", limit=None)] == list(range(0, 20, 2))
+
+
+def test_rotates_when_the_day_changes():
+    with temp_dir() as logs:
+        history_log = TaskHistory(logs, compress=False)
+        history_log.append(record("a", 0))
+        meta = json.loads(history_log.meta_path.read_text())
+        history_log.meta_path.write_text(json.dumps(dict(meta, active_day="2000-01-01")))
+        history_log.append(record("a", 1))
+        assert [path.name for path in (logs / "segments").iterdir()] == ["tasks-000000.jsonl"]
+        assert [r["n"] for r in history_log.query("a")] == [0, 1]
+
+
+def test_index_has_one_fixed_size_entry_per_record():
+    with temp_dir() as tmp:
+        history_log = TaskHistory(tmp)
+        fill(history_log, 10)
+        assert history_log._index_path("a").stat().st_size == 5 * INDEX_RECORD.size
+
+
+def test_time_range_and_limit_queries():
+    with temp_dir() as tmp:
+        history_log = TaskHistory(tmp, max_segment_bytes=400, rotate_daily=False)
+        fill(history_log, 40)
+        # Timestamped 1000 + n; a has the even n
+        assert [r["n"] for r in history_log.query("a", since=1010, until=1020, limit=None)] == [
+            10, 12, 14, 16, 18, 20
+        ]
+        assert [r["n"] for r in history_log.query("a", since=1011, until=1019.5, limit=None)] == [12, 14, 16, 18]
+        assert [r["n"] for r in history_log.query("b", limit=3)] == [35, 37, 39]
+        assert history_log.query("a", since=2000) == []
+        assert history_log.query("missing") == []
+
+
+def test_bisect_finds_range_bounds():
+    with temp_dir() as tmp:
+        path = tmp / "x.idx"
+        path.write_bytes(b"".join(INDEX_RECORD.pack(t, 0, 0) for t in [1, 2, 2, 2, 5]))
+        with open(path, "rb") as f:
+            assert TaskHistory._bisect(f, 5, 2, strict=False) == 1
+            assert TaskHistory._bisect(f, 5, 2, strict=True) == 4
+            assert TaskHistory._bisect(f, 5, 0, strict=False) == 0
+            assert TaskHistory._bisect(f, 5, 9, strict=True) == 5
+
+
+def test_existing_log_is_indexed_on_first_query():
+    with temp_dir() as logs:
+        lines = [record("a", n) for n in range(3)] + ["not json"]
+        (logs / "tasks.jsonl").write_text("".join(
+            (line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines
+        ))
+        history_log = TaskHistory(logs)
+        assert [r["n"] for r in history_log.query("a", limit=None)] == [0, 1, 2]
+        since = parse_since(datetime.fromtimestamp(1001).isoformat())
+        assert [r["n"] for r in history_log.query("a", since=since, limit=None)] == [1, 2]
+
+
+def test_reindex_matches_appended_index():
+    with temp_dir() as tmp:
+        history_log = TaskHistory(tmp, max_segment_bytes=300, rotate_daily=False)
+        fill(history_log, 15)
+        # A record that started before the previous one was logged
+        history_log.append(record("b", 3))
+        appended = {task: history_log._index_path(task).read_bytes() for task in "ab"}
+        history_log.rebuild_index()
+        assert {task: history_log._index_path(task).read_bytes() for task in "ab"} == appended
+        assert [r["n"] for r in history_log.query("b", since=1013, limit=None)] == [13, 3]
+
+
+def test_query_waits_for_a_writer():
+    with temp_dir() as tmp:
+        history_log = TaskHistory(tmp, max_segment_bytes=300, rotate_daily=False)
+        fill(history_log, 4)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(history_log.query("a", limit=None)))
+        with TaskHistory(tmp)._locked():
+            reader.start()
+            reader.join(0.2)
+            assert reader.is_alive()
+        reader.join()
+        assert [r["n"] for r in results[0]] == [0, 2]
+
+
+def test_parse_since_relative_ages():
+    with mock.patch.object(history.time, "time", return_value=100000.0):
+        assert parse_since("30m") == 100000.0 - 1800
+        assert parse_since("2d") == 100000.0 - 172800
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Tests for tasks/memory_decay.py: decay timing, the recall and access boosts, and archiving."""
+
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.memory_decay import MemoryDecayTask, access_weight, decay_scores, recalled
+from test_all import run_tests, temp_dir
+
+DAY = 86400.0
+
+
+def iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def test_new_memory_is_not_boosted():
+    now = time.time()
+    created = now - 3600
+    # Captured since the previous run, lastAccessed == created, never recalled
+    assert decay_scores([0.5], [created], [created], [1.0], now, now - DAY, 14, 0.3) == [
+        round(0.5 * 0.5 ** (1 / 24 / 14), 4)
+    ]
+    assert recalled([created], [created], now - DAY) == [False]
+
+
+def test_recalled_memory_is_boosted():
+    now = time.time()
+    created, accessed = now - 30 * DAY, now - 3600
+    [score] = decay_scores([0.5], [accessed], [created], [1.0], now, now - DAY, 14, 0.3)
+    assert score == round(0.5 * 0.5 ** (1 / 24 / 14) + 0.3, 4)
+    assert recalled([accessed], [created], now - DAY) == [True]
+
+
+def test_access_before_previous_run_is_not_a_recall():
+    now = time.time()
+    created, accessed = now - 30 * DAY, now - 2 * DAY
+    # Decays from the previous run, not from the older access
+    assert decay_scores([1.0], [accessed], [created], [1.0], now, now - DAY, 14, 0.3) == [
+        round(0.5 ** (1 / 14), 4)
+    ]
+    assert recalled([accessed], [created], now - DAY) == [False]
+
+
+def test_first_run_decays_from_creation_without_boost():
+    now = time.time()
+    created = now - 14 * DAY
+    assert decay_scores([1.0, 1.0], [None, now], [created, None], [1.0, 1.0], now, None, 14, 0.3) == [0.5, 1.0]
+
+
+def test_run_does_not_count_new_captures_as_recalled():
+    now = time.time()
+    with temp_dir() as workspace:
+        memory_dir = workspace / "memory"
+        memory_dir.mkdir()
+        fresh = iso(now - 3600)
+        old = iso(now - 30 * DAY)
+        store = {
+            "memories": [
+                # As capture.sh writes them
+                {"content": "fresh capture", "score": 0.5, "created": fresh,
+                 "lastAccessed": fresh, "accessCount": 0},
+                {"content": "recalled memory", "score": 0.5, "created": old,
+                 "lastAccessed": iso(now - 60), "accessCount": 1},
+            ],
+            "meta": {},
+        }
+        (memory_dir / "store.json").write_text(json.dumps(store))
+        (memory_dir / "store.decay.json").write_text(json.dumps({"last_run": iso(now - DAY)}))
+
+        task = MemoryDecayTask()
+        task._workspace = workspace
+        result = task.run()
+
+        assert result["success"], result
+        assert result["recalled_count"] == 1
+        fresh_score, recalled_score = (
+            memory["score"] for memory in json.loads((memory_dir / "store.json").read_text())["memories"]
+        )
+        assert fresh_score < 0.5
+        assert recalled_score > 0.79
+
+
+def run_decay(workspace: Path, memories: list) -> dict:
+    """Run the task on a store.json holding `memories` (never decayed before)."""
+    memory_dir = workspace / "memory"
+    memory_dir.mkdir()
+    (memory_dir / "store.json").write_text(json.dumps({"memories": memories, "meta": {}}))
+    task = MemoryDecayTask()
+    task._workspace = workspace
+    result = task.run()
+    assert result["success"], result
+    return json.loads((memory_dir / "store.json").read_text())
+
+
+def test_frequently_accessed_memories_decay_slower():
+    assert [access_weight(count) for count in (None, 0, 2, 3, 5, 6)] == [1.0, 1.0, 1.0, 1.1, 1.1, 1.2]
+    created = iso(time.time() - 14 * DAY)
+    with temp_dir() as tmp:
+        store = run_decay(tmp, [
+            {"content": f"accessed {count} times", "score": 1.0, "created": created,
+             "lastAccessed": created, "accessCount": count}
+            for count in (0, 3, 6)
+        ])
+    assert [memory["score"] for memory in store["memories"]] == [
+        0.5, round(0.5 ** (1 / 1.1), 4), round(0.5 ** (1 / 1.2), 4)
+    ]
+
+
+def test_archives_up_to_one_and_a_half_min_score_at_the_floor():
+    now = time.time()
+    created = iso(now - 60)
+    old = iso(now - 140 * DAY)
+    with temp_dir() as tmp:
+        # minScore 0.1: 0.15 and below is archived, with scores floored at 0.1
+        store = run_decay(tmp, [
+            {"content": "just above", "score": 0.16, "created": created, "lastAccessed": created},
+            {"content": "at the line", "score": 0.15, "created": created, "lastAccessed": created},
+            {"content": "long forgotten", "score": 1.0, "created": old, "lastAccessed": old},
+        ])
+        [archive] = (tmp / "memory/archive").iterdir()
+        archived = json.loads(archive.read_text())
+    assert [memory["content"] for memory in store["memories"]] == ["just above"]
+    assert store["meta"]["lastDecay"].endswith("Z")
+    assert [(memory["content"], memory["score"]) for memory in archived] == [
+        ("at the line", 0.15), ("long forgotten", 0.1)
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Tests for tasks/memory_store.py: the JSON, SQLite and JSONL backends and `store migrate`."""
+
+import contextlib
+import io
+import json
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from runner import store_main
+from tasks import memory_store
+from tasks.memory_store import JsonlMemoryStore, JsonMemoryStore, SqliteMemoryStore, migrate, open_store
+from test_all import run_tests, temp_dir
+
+ENGINE_DOCUMENT = {
+    "memories": [
+        {"content": "Deploy with make ship", "score": 1.2, "created": "2026-02-01T09:00:00Z",
+         "lastAccessed": "2026-02-03T09:00:00Z", "accessCount": 2, "category": "ops"},
+        {"content": "Prefers short answers", "score": 0.4, "created": "2026-02-02T09:00:00Z",
+         "category": "preference", "source": "chat"},
+    ],
+    "meta": {"lastDecay": "2026-02-03T00:00:00Z"},
+}
+
+BACKENDS = [
+    ("json", lambda d: JsonMemoryStore(d / memory_store.STORE_JSON)),
+    ("sqlite", lambda d: SqliteMemoryStore(d / memory_store.STORE_DB)),
+    ("jsonl", lambda d: JsonlMemoryStore(d / memory_store.STORE_JSONL)),
+]
+
+
+def each_backend():
+    """(name, empty store) for every backend, each in its own directory."""
+    for name, make in BACKENDS:
+        with temp_dir() as tmp:
+            with make(tmp) as store:
+                yield name, store
+
+
+def texts(store) -> list:
+    return [memory["text"] for _, memory in store.items()]
+
+
+def test_insert_normalizes_both_shapes():
+    for name, store in each_backend():
+        store.insert([
+            {"text": "taskrunner memory", "importance": 0.7, "markers": ["decision"]},
+            {"content": "engine memory", "created": "2026-02-01T09:00:00Z", "accessCount": 3, "mood": "calm"},
+        ])
+        (_, first), (_, second) = store.items()
+        assert first == {"text": "taskrunner memory", "importance": 0.7, "markers": ["decision"]}, name
+        assert second == {
+            "text": "engine memory", "timestamp": "2026-02-01T09:00:00Z", "access_count": 3, "mood": "calm"
+        }, name
+        assert store.count() == 2, name
+
+
+def test_update_delete_and_columns():
+    for name, store in each_backend():
+        store.insert({"text": f"memory {i}", "score": 1.0} for i in range(4))
+        ids = [memory_id for memory_id, _ in store.items()]
+        assert store.update({ids[1]: {"score": 0.5}, ids[2]: {"score": 0.25, "markers": ["x"]}}) == 2, name
+        assert [row[1:] for row in store.columns(("score", "markers"))] == [
+            (1.0, None), (0.5, None), (0.25, ["x"]), (1.0, None)
+        ], name
+        assert store.delete([ids[0], ids[2]]) == 2, name
+        assert texts(store) == ["memory 1", "memory 3"], name
+        assert [memory["text"] for _, memory in store.get([store.items()[1][0]])] == ["memory 3"], name
+        try:
+            store.update({ids[1]: {"bogus": 1}})
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{name}: unknown field accepted")
+
+
+def test_apply_updates_deletes_and_sets_meta_together():
+    for name, store in each_backend():
+        store.import_document({"memories": [{"content": f"memory {i}", "score": 1.0} for i in range(3)]})
+        ids = [memory_id for memory_id, _ in store.items()]
+        store.apply({ids[2]: {"score": 0.5}}, [ids[0]], lastDecay="2026-02-05T00:00:00Z")
+        assert [row[1:] for row in store.columns(("text", "score"))] == [("memory 1", 1.0), ("memory 2", 0.5)], name
+        assert store.meta() == {"lastDecay": "2026-02-05T00:00:00Z"}, name
+
+
+def test_json_apply_is_one_write():
+    with temp_dir() as tmp:
+        store = JsonMemoryStore(tmp / memory_store.STORE_JSON)
+        store.import_document(ENGINE_DOCUMENT)
+        saves = []
+        store._save = saves.append
+        store.apply({1: {"score": 0.3}}, [0], lastDecay="2026-02-05T00:00:00Z")
+        assert len(saves) == 1 and [memory["score"] for memory in saves[0]] == [0.3]
+
+
+def test_meta_and_document_round_trip():
+    for name, store in each_backend():
+        assert store.import_document(ENGINE_DOCUMENT) == 2, name
+        store.set_meta(lastConsolidate="2026-02-04")
+        assert store.meta() == {"lastDecay": "2026-02-03T00:00:00Z", "lastConsolidate": "2026-02-04"}, name
+        exported = store.export("memories")
+        assert [entry["content"] for entry in exported["memories"]] == ["Deploy with make ship", "Prefers short answers"]
+        # memory-engine defaults fill in what the entry lacked
+        assert exported["memories"][1]["lastAccessed"] == "2026-02-02T09:00:00Z", name
+        assert exported["memories"][1]["accessCount"] == 0, name
+        assert exported["memories"][0]["accessCount"] == 2, name
+        assert store.import_document([{"text": "only one"}], replace=True) == 1, name
+        assert texts(store) == ["only one"], name
+
+
+def test_json_store_keeps_its_shape_and_a_backup():
+    with temp_dir() as tmp:
+        path = tmp / memory_store.STORE_JSON
+        path.write_text(json.dumps(ENGINE_DOCUMENT))
+        with JsonMemoryStore(path) as store:
+            store.delete([0])
+        data = json.loads(path.read_text())
+        assert [entry["content"] for entry in data["memories"]] == ["Prefers short answers"]
+        assert data["meta"] == ENGINE_DOCUMENT["meta"]
+        assert json.loads(path.with_name("store.json.bak").read_text()) == ENGINE_DOCUMENT
+
+
+def test_jsonl_store_streams_and_appends():
+    with temp_dir() as tmp:
+        store = JsonlMemoryStore(tmp / memory_store.STORE_JSONL)
+        store.import_document(ENGINE_DOCUMENT)
+        size = store.path.stat().st_size
+        store.insert([{"text": "appended"}])
+        assert store.path.read_bytes()[size:] == b'{"text":"appended"}\n'
+        assert json.loads(store.path.read_text().splitlines()[0]) == {"meta": ENGINE_DOCUMENT["meta"]}
+        with store.rewrite() as segment:
+            for _, memory in store.stream():
+                if memory["text"] != "appended":
+                    segment.append(memory)
+        assert texts(store) == ["Deploy with make ship", "Prefers short answers"]
+        assert store.path.with_name("store.jsonl.bak").exists()
+
+
+def test_jsonl_append_during_rewrite_is_kept():
+    with temp_dir() as tmp:
+        store = JsonlMemoryStore(tmp / memory_store.STORE_JSONL)
+        store.insert([{"text": "old"}, {"text": "stale"}])
+        writer = threading.Thread(target=store.insert, args=([{"text": "appended"}],))
+        with store.rewrite() as segment:
+            # capture.sh's `store add` arrives while the rewrite is streaming
+            writer.start()
+            writer.join(0.2)
+            assert writer.is_alive()
+            for _, memory in store.stream():
+                if memory["text"] != "stale":
+                    segment.append(memory)
+        writer.join()
+        assert texts(store) == ["old", "appended"]
+
+
+def test_open_store_prefers_db_then_jsonl():
+    with temp_dir() as memory_dir:
+        assert open_store(memory_dir).backend == "json"
+        (memory_dir / memory_store.STORE_JSONL).write_text("")
+        assert open_store(memory_dir).backend == "jsonl"
+        with open_store(memory_dir) as store:
+            assert store.count() == 0
+        SqliteMemoryStore(memory_dir / memory_store.STORE_DB).close()
+        with open_store(memory_dir) as store:
+            assert store.backend == "sqlite"
+
+
+def test_migrate_to_each_backend():
+    for backend in memory_store.BACKENDS:
+        with temp_dir() as memory_dir:
+            (memory_dir / memory_store.STORE_JSON).write_text(json.dumps(ENGINE_DOCUMENT))
+            assert migrate(memory_dir, backend) == 2
+            assert not (memory_dir / memory_store.STORE_JSON).exists()
+            assert (memory_dir / "store.json.imported").exists()
+            with open_store(memory_dir) as store:
+                assert store.backend == backend
+                assert store.export("memories") == JsonMemoryStore(memory_dir / "store.json.imported").export()
+            try:
+                migrate(memory_dir, backend)
+            except FileExistsError:
+                pass
+            else:
+                raise AssertionError(f"{backend}: migrated twice")
+
+
+def test_store_migrate_command():
+    with temp_dir() as memory_dir:
+        (memory_dir / memory_store.STORE_JSON).write_text(json.dumps([{"text": "a"}, {"text": "b"}]))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert store_main(["--memory-dir", str(memory_dir), "migrate", "--to", "jsonl"]) == 0
+        assert json.loads(out.getvalue()) == {
+            "success": True, "imported": 2, "path": str(memory_dir / memory_store.STORE_JSONL)
+        }
+        with contextlib.redirect_stderr(io.StringIO()):
+            assert store_main(["--memory-dir", str(memory_dir), "migrate"]) == 1
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert store_main(["--memory-dir", str(memory_dir), "info"]) == 0
+        assert json.loads(out.getvalue())["count"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Tests for metrics.py: run aggregation and the Prometheus textfile."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from metrics import DURATION_BUCKETS, MetricsExporter
+from test_all import run_tests, temp_dir
+
+
+def result(**fields) -> dict:
+    return dict({"task": "t", "timestamp": "2026-02-10T09:00:00", "success": True}, **fields)
+
+
+def samples(exporter: MetricsExporter) -> dict:
+    """Sample lines of the textfile as {series: value}."""
+    lines = exporter.textfile_path.read_text().splitlines()
+    return dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+
+
+def test_outcomes_and_counters():
+    with temp_dir() as tmp:
+        exporter = MetricsExporter(tmp / "taskrunner.prom")
+        exporter.observe(result(duration_seconds=0.2))
+        exporter.observe(result(success=False, duration_seconds=1.5, retry_attempts=1))
+        exporter.observe(result(success=False, locked=True))
+        exporter.observe(result(coalesced=True, duration_seconds=9.0))
+        exporter.observe(result(cached=True, duration_seconds=0))
+        values = samples(exporter)
+        assert values['taskrunner_task_runs_total{task="t",outcome="success"}'] == "3"
+        # A locked run counts as contention only
+        assert values['taskrunner_task_runs_total{task="t",outcome="failure"}'] == "1"
+        assert values['taskrunner_task_lock_contention_total{task="t"}'] == "1"
+        assert values['taskrunner_task_retry_attempts_total{task="t"}'] == "1"
+        assert values['taskrunner_task_coalesced_total{task="t"}'] == "1"
+        assert values['taskrunner_task_cached_total{task="t"}'] == "1"
+
+
+def test_duration_histogram_is_cumulative():
+    with temp_dir() as tmp:
+        exporter = MetricsExporter(tmp / "taskrunner.prom")
+        for duration in (0.05, 0.5, 3, 1000):
+            exporter.observe(result(duration_seconds=duration))
+        values = samples(exporter)
+        bucket = 'taskrunner_task_duration_seconds_bucket{{task="t",le="{}"}}'.format
+        assert values[bucket("0.1")] == "1"
+        assert values[bucket("0.5")] == "2"
+        assert values[bucket("5.0")] == "3"
+        assert values[bucket("300.0")] == "3"
+        assert values[bucket("+Inf")] == "4"
+        assert values['taskrunner_task_duration_seconds_count{task="t"}'] == "4"
+        assert float(values['taskrunner_task_duration_seconds_sum{task="t"}']) == 1003.55
+        # Coalesced and cached runs did not execute, so they are not timed
+        exporter.observe(result(cached=True, duration_seconds=0.01))
+        assert samples(exporter)['taskrunner_task_duration_seconds_count{task="t"}'] == "4"
+
+
+def test_last_success_and_label_escaping():
+    with temp_dir() as tmp:
+        exporter = MetricsExporter(tmp / "taskrunner.prom")
+        exporter.observe(result(task='we"ird', success=False))
+        text = exporter.textfile_path.read_text()
+        assert 'task="we\\"ird"' in text
+        assert "taskrunner_task_last_success_timestamp_seconds{" not in text
+        exporter.observe(result(task='we"ird', timestamp="2026-02-10T10:00:00"))
+        values = samples(exporter)
+        assert float(values['taskrunner_task_last_success_timestamp_seconds{task="we\\"ird"}']) > 0
+
+
+def test_state_survives_new_exporters_and_old_state():
+    with temp_dir() as tmp:
+        path = tmp / "taskrunner.prom"
+        MetricsExporter(path).observe(result(duration_seconds=1))
+        # State written before the cached counter existed
+        state = json.loads(path.with_suffix(".state.json").read_text())
+        del state["t"]["cached"]
+        path.with_suffix(".state.json").write_text(json.dumps(state))
+        exporter = MetricsExporter(path)
+        exporter.observe(result(cached=True))
+        values = samples(exporter)
+        assert values['taskrunner_task_runs_total{task="t",outcome="success"}'] == "2"
+        assert values['taskrunner_task_cached_total{task="t"}'] == "1"
+        assert len(json.loads(exporter.state_path.read_text())["t"]["buckets"]) == len(DURATION_BUCKETS) + 1
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
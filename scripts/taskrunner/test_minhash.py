@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Tests for tasks/minhash.py: near-duplicate lookup and the signature file with its change log."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.minhash import MinHashIndex, text_digest, tokenize
+from test_all import run_tests, temp_dir
+
+TEXTS = [f"memory number {i} about topic {i % 7} and detail {i * 31}" for i in range(40)]
+
+
+def test_finds_near_duplicates():
+    index = MinHashIndex()
+    for text in TEXTS:
+        index.add(text_digest(text), tokenize(text))
+    assert index.find_similar(tokenize("Memory number 3 about topic 3 and detail 93"), 0.85) == text_digest(TEXTS[3])
+    assert index.find_similar(tokenize("something else entirely"), 0.85) is None
+
+
+def test_save_appends_changes_instead_of_rewriting():
+    with temp_dir() as tmp:
+        path = tmp / "store.minhash.json"
+        MinHashIndex.open(path, TEXTS).save(path)
+        snapshot = path.read_bytes()
+        log_path = path.with_suffix(".log")
+        assert not log_path.exists()
+
+        texts = TEXTS[1:] + ["a newly captured memory"]
+        index = MinHashIndex.open(path, texts)
+        assert index.dirty
+        index.save(path)
+        assert path.read_bytes() == snapshot
+        header, *entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert header == {"generation": json.loads(snapshot)["generation"]}
+        assert [entry["key"] for entry in entries] == [text_digest(texts[-1]), text_digest(TEXTS[0])]
+
+        # Snapshot plus log is the whole index again
+        reopened = MinHashIndex.open(path, texts)
+        assert not reopened.dirty
+        assert reopened._signatures == index._signatures
+
+
+def test_log_is_folded_into_a_new_snapshot():
+    with temp_dir() as tmp:
+        path = tmp / "store.minhash.json"
+        MinHashIndex.open(path, TEXTS[:4]).save(path)
+        generation = json.loads(path.read_text())["generation"]
+        # Far more change than half the snapshot
+        MinHashIndex.open(path, TEXTS).save(path)
+        assert json.loads(path.read_text())["generation"] != generation
+        assert not path.with_suffix(".log").exists()
+        assert not MinHashIndex.open(path, TEXTS).dirty
+
+
+def test_log_of_an_older_snapshot_is_ignored():
+    with temp_dir() as tmp:
+        path = tmp / "store.minhash.json"
+        MinHashIndex.open(path, TEXTS).save(path)
+        index = MinHashIndex.open(path, TEXTS + ["one more memory text"])
+        index.save(path)
+        stale_log = path.with_suffix(".log").read_bytes()
+        # A new snapshot, then a crash before the old log was dropped
+        fresh = MinHashIndex.open(path, TEXTS[:4])
+        fresh._log.append = lambda entries: False
+        fresh.save(path)
+        path.with_suffix(".log").write_bytes(stale_log)
+        reopened = MinHashIndex.open(path, TEXTS + ["one more memory text"])
+        assert reopened._added == {text_digest(text) for text in TEXTS[4:] + ["one more memory text"]}
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Tests for tasks/recall.py: index sync with the store and BM25 ranking."""
+
+import contextlib
+import math
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.memory_store import open_store
+from tasks.recall import B, K1, RecallIndex, terms
+from test_all import run_tests, temp_dir
+
+MEMORIES = [
+    {"text": "Deploy the gateway with make deploy", "category": "ops", "score": 1.0},
+    {"text": "The deploy pipeline runs tests before deploy", "category": "ops", "score": 0.2},
+    {"text": "Prefers short answers in Slack", "category": "preference", "score": 1.5},
+    {"text": "Gateway health check uses port 18789", "category": "ops", "score": 0.8},
+    {"text": "Weekly review every Friday", "category": "routine", "score": 0.5},
+]
+
+
+def bm25(texts, query):
+    """Reference BM25 scores per text index (same formula as the index)."""
+    docs = [Counter(terms(text)) for text in texts]
+    average_length = sum(sum(doc.values()) for doc in docs) / len(docs)
+    scores = {}
+    for i, doc in enumerate(docs):
+        length = sum(doc.values())
+        total = 0.0
+        for word in set(terms(query)):
+            df = sum(1 for other in docs if word in other)
+            if word in doc:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                tf = doc[word]
+                total += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+        if total:
+            scores[i] = total
+    return scores
+
+
+@contextlib.contextmanager
+def with_store(memories) -> Iterator[Path]:
+    """A temporary memory dir whose store holds `memories`."""
+    with temp_dir() as memory_dir:
+        with open_store(memory_dir) as store:
+            store.insert(memories)
+        yield memory_dir
+
+
+def test_ranking_matches_reference_bm25():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        for query in ("deploy", "gateway deploy", "gateway port", "short"):
+            expected = bm25([m["text"] for m in MEMORIES], query)
+            best = max(expected.values())
+            hits = index.search(query, min_relevance=0)
+            assert {hit["memory_id"]: hit["relevance"] for hit in hits} == {
+                i: round(score / best, 4) for i, score in expected.items()
+            }, query
+            ranks = [
+                (score / best * (1 + MEMORIES[i]["score"]), -i) for i, score in expected.items()
+            ]
+            assert [hit["memory_id"] for hit in hits] == [-i for _, i in sorted(ranks, reverse=True)], query
+
+
+def test_relevance_threshold_categories_and_limit():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        assert {hit["memory_id"] for hit in index.search("gateway deploy", min_relevance=0)} == {0, 1, 3}
+        assert [hit["memory_id"] for hit in index.search("gateway deploy", min_relevance=1.0)] == [0]
+        assert {hit["memory_id"] for hit in index.search("deploy gateway", categories=["preference"])} == set()
+        assert [hit["memory_id"] for hit in index.search("", limit=2)] == [2, 0]
+        assert [hit["memory_id"] for hit in index.search("", categories=["routine"])] == [4]
+        assert index.search("nothing matches this") == []
+
+
+def test_sync_applies_only_the_changes():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        assert index.sync() == {"added": 5, "removed": 0, "updated": 0}
+        assert index.sync() == {"added": 0, "removed": 0, "updated": 0}
+        with open_store(memory_dir) as store:
+            store.update({4: {"score": 0.1}})
+            store.delete([2])
+            store.insert([{"text": "Deploy freeze on Fridays", "category": "ops", "score": 1.0}])
+        # Ids after the deleted memory shift down; that is an update, not a re-index
+        assert index.sync() == {"added": 1, "removed": 1, "updated": 2}
+        assert [hit["memory_id"] for hit in index.search("short answers")] == []
+        assert [hit["memory_id"] for hit in index.search("fridays")] == [4]
+        # Same results as an index built from scratch
+        with open_store(memory_dir) as store:
+            memories = [memory for _, memory in store.items()]
+        with with_store(memories) as copy, RecallIndex(Path(copy)) as fresh:
+            for query in ("deploy", "gateway", "friday weekly", ""):
+                assert index.search(query, min_relevance=0) == fresh.search(query, min_relevance=0), query
+
+
+def test_record_access_updates_store_without_resync():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        hits = index.search("health check")
+        assert index.record_access(hits) == 1
+        with open_store(memory_dir) as store:
+            [(_, memory)] = store.get([3])
+        assert memory["access_count"] == 1 and memory["last_accessed"].endswith("Z")
+        assert index.search("health check")[0]["access_count"] == 1
+        assert index.sync() == {"added": 0, "removed": 0, "updated": 0}
+
+
+
+def test_record_access_matches_hits_by_text_after_renumbering():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        hits = index.search("health check")
+        assert [hit["memory_id"] for hit in hits] == [3]
+        # A consolidate between search and record_access renumbers the store
+        with open_store(memory_dir) as store:
+            store.delete([0])
+        assert index.record_access(hits) == 1
+        with open_store(memory_dir) as store:
+            counts = [memory.get("access_count") for _, memory in store.items()]
+        assert counts == [None, None, 1, None]
+        # The index was out of date before our write: it still syncs the delete
+        assert index.sync() == {"added": 0, "removed": 1, "updated": 4}
+
+
+def test_record_access_skips_forgotten_memories():
+    with with_store(MEMORIES) as memory_dir, RecallIndex(memory_dir) as index:
+        hits = index.search("weekly review")
+        with open_store(memory_dir) as store:
+            store.update({4: {"text": "Weekly review moved to Monday"}})
+        assert index.record_access(hits) == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for retries.py: claiming and expiring entries in the persistent RetryQueue."""
+
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import retries
+from retries import RetryQueue, backoff_delay
+from test_all import run_tests, temp_dir
+
+
+def test_claim_waits_for_the_due_time():
+    with temp_dir() as tmp, mock.patch.object(retries.time, "time", return_value=1000.0):
+        queue = RetryQueue(tmp / "retries.json")
+        queue.schedule("capture", 2, 30, error="boom")
+        assert queue.claim("capture", due_by=1029.0) is None
+        assert queue.due_at("capture") == 1030.0
+        entry = queue.claim("capture", due_by=1030.0)
+        assert (entry["attempt"], entry["error"]) == (2, "boom")
+        assert queue.claim("capture") is None
+        assert queue.pending() == []
+
+
+def test_one_entry_per_task_shared_through_the_file():
+    with temp_dir() as tmp:
+        queue = RetryQueue(tmp / "retries.json")
+        queue.schedule("capture", 2, 60)
+        queue.schedule("decay", 2, 10)
+        queue.schedule("capture", 3, 5)
+        other = RetryQueue(tmp / "retries.json")
+        assert [(entry["task"], entry["attempt"]) for entry in other.pending()] == [("capture", 3), ("decay", 2)]
+        # Claimed by one runner, gone for every other
+        assert other.claim("capture")["attempt"] == 3
+        assert queue.claim("capture") is None
+
+
+def test_dry_run_retries_are_kept_apart():
+    with temp_dir() as tmp:
+        queue = RetryQueue(tmp / "retries.json")
+        queue.schedule("capture", 2, 0)
+        queue.schedule("capture", 3, 0, dry_run=True)
+        assert [entry["attempt"] for entry in queue.pending()] == [2]
+        assert [entry["attempt"] for entry in queue.pending(dry_run=True)] == [3]
+        assert queue.claim("capture", dry_run=True)["attempt"] == 3
+        assert queue.claim("capture", dry_run=True) is None
+        assert queue.claim("capture")["attempt"] == 2
+
+
+def test_backoff_delay_is_jittered_within_the_step():
+    for attempt, step in [(1, 1.0), (3, 4.0), (20, 300.0)]:
+        delays = [backoff_delay(attempt) for _ in range(50)]
+        assert all(step / 2 <= delay <= step for delay in delays), attempt
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
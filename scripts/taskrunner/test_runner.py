@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Tests for runner.py's TaskRunner: the serve scheduler, run-many, coalescing and
+the skip cache."""
+
+import contextlib
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import retries
+import runner
+from runner import EXIT_ERROR, EXIT_LOCKED, EXIT_SUCCESS, TaskRunner
+from tasks.base import Task
+from test_all import run_tests, temp_dir
+
+EPOCH = 1_750_000_000.0
+
+
+def fake_task(
+    *outcomes: bool,
+    on_run: Optional[Callable[[Task], None]] = None,
+    clock: Callable[[], float] = time.monotonic,
+    **attrs,
+) -> type:
+    """
+    A Task class under a unique name (its lockfile and last-run record are
+    shared through /tmp) that succeeds or fails per `outcomes`, repeating
+    the last one (default: always succeed). Each run appends clock() to the
+    class's `runs` list, after calling on_run(task).
+    """
+    remaining = list(outcomes) or [True]
+
+    def run(self):
+        if on_run is not None:
+            on_run(self)
+        type(self).runs.append(clock())
+        success = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        return {"success": success, "message": "done" if success else "failed"}
+
+    attrs.setdefault("max_attempts", 1)
+    return type("FakeTask", (Task,), dict(
+        attrs, name=f"test_{uuid.uuid4().hex[:12]}", description="Test task", run=run, runs=[]
+    ))
+
+
+@contextlib.contextmanager
+def runner_for(*task_classes: type) -> Iterator[TaskRunner]:
+    """A TaskRunner in a scratch workspace that knows `task_classes` by name."""
+    with temp_dir() as workspace:
+        task_runner = TaskRunner(str(workspace))
+        for task_class in task_classes:
+            task_runner._task_classes[task_class.name] = task_class
+        try:
+            yield task_runner
+        finally:
+            for task_class in task_classes:
+                Path(f"/tmp/taskrunner-{task_class.name}.lock").unlink(missing_ok=True)
+                task_runner._last_run_path(task_class.name).unlink(missing_ok=True)
+
+
+class FakeClock(threading.Event):
+    """
+    Stands in for the time module and TaskRunner._stop: wait() advances
+    the clock instead of sleeping, and the event sets itself once the
+    clock reaches `end` seconds.
+    """
+
+    def __init__(self, end: float):
+        super().__init__()
+        self.elapsed = 0.0
+        self.end = end
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def time(self) -> float:
+        return EPOCH + self.elapsed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self.elapsed += timeout
+        if self.elapsed >= self.end:
+            self.set()
+        return self.is_set()
+
+
+@contextlib.contextmanager
+def on_clock(task_runner: TaskRunner, clock: FakeClock) -> Iterator[None]:
+    """Run task_runner on `clock`, with a retry backoff of exactly retry_backoff_base."""
+    with mock.patch.object(runner, "time", clock), mock.patch.object(retries, "time", clock), \
+            mock.patch.object(runner, "backoff_delay", lambda attempt, base: base), \
+            mock.patch.object(task_runner, "_stop", clock):
+        yield
+
+
+def test_serve_runs_ticks_and_retries_on_the_clock():
+    clock = FakeClock(end=25)
+    overridden = fake_task(interval_seconds=60, clock=clock.monotonic)
+    flaky = fake_task(False, True, interval_seconds=30, max_attempts=3, retry_backoff_base=5, clock=clock.monotonic)
+    superseded = fake_task(interval_seconds=100, clock=clock.monotonic)
+    names = [overridden.name, flaky.name, superseded.name]
+    with runner_for(overridden, flaky, superseded) as task_runner, on_clock(task_runner, clock):
+        # Left by an earlier process; the startup tick supersedes it
+        task_runner._retries.schedule(superseded.name, 2, 3)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert task_runner.serve(intervals={overridden.name: 10}, only=names) == EXIT_SUCCESS
+        assert task_runner._retries.pending() == []
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert events[0]["schedule"] == {overridden.name: 10.0, flaky.name: 30.0, superseded.name: 100.0}
+    assert events[-1] == {"event": "serve_stop"}
+    assert overridden.runs == [0, 10, 20]
+    assert flaky.runs == [0, 5]
+    assert superseded.runs == [0]
+    flaky_results = [event for event in events if event.get("task") == flaky.name]
+    assert [result["success"] for result in flaky_results] == [False, True]
+    assert flaky_results[1]["retry_attempts"] == 1
+
+
+def test_serve_skips_missed_ticks():
+    clock = FakeClock(end=45)
+    # The first run overruns two ticks
+    slow = fake_task(interval_seconds=10, clock=clock.monotonic,
+                     on_run=lambda task: None if type(task).runs else clock.wait(25))
+    with runner_for(slow) as task_runner, on_clock(task_runner, clock):
+        with contextlib.redirect_stdout(io.StringIO()):
+            task_runner.serve(only=[slow.name])
+    assert slow.runs == [25, 35]
+
+
+def test_serve_rejects_unknown_interval_overrides():
+    scheduled = fake_task(interval_seconds=10)
+    with runner_for(scheduled) as task_runner:
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            assert task_runner.serve(intervals={"no_such_task": 5}, only=[scheduled.name]) == EXIT_ERROR
+        assert "no_such_task" in err.getvalue()
+        assert scheduled.runs == []
+
+
+def test_run_many_follows_dependencies_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    first = fake_task(on_run=lambda task: barrier.wait())
+    second = fake_task(on_run=lambda task: barrier.wait())
+    joined = fake_task()
+    failing = fake_task(False)
+    skipped = fake_task()
+    with runner_for(first, second, joined, failing, skipped) as task_runner:
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code, summary = task_runner.run_many({
+                joined.name: [first.name, second.name],
+                skipped.name: [failing.name],
+            })
+        skipped_records = task_runner.history.query(skipped.name)
+    # first and second met at the barrier, so they ran at the same time
+    assert len(first.runs) == len(second.runs) == 1
+    assert joined.runs[0] >= max(first.runs[0], second.runs[0])
+    assert skipped.runs == []
+    assert exit_code == EXIT_ERROR
+    assert summary["failed"] == sorted([failing.name, skipped.name])
+    assert summary["tasks"] == sorted([first.name, second.name, joined.name, failing.name, skipped.name])
+    assert [record.get("skipped") for record in skipped_records] == [True]
+
+
+def test_run_many_waits_for_a_retry_before_dependents():
+    flaky = fake_task(False, True, max_attempts=2)
+    dependent = fake_task()
+    with runner_for(flaky, dependent) as task_runner, \
+            mock.patch.object(runner, "backoff_delay", lambda attempt, base: 0.0):
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code, summary = task_runner.run_many({dependent.name: [flaky.name]})
+    assert exit_code == EXIT_SUCCESS and summary["failed"] == []
+    assert len(flaky.runs) == 2
+    assert dependent.runs[0] >= flaky.runs[1]
+
+
+def test_run_many_rejects_cycles():
+    looped = fake_task()
+    with runner_for(looped) as task_runner:
+        try:
+            task_runner.run_many({looped.name: ["other"], "other": [looped.name]})
+        except ValueError as e:
+            assert looped.name in str(e)
+        else:
+            raise AssertionError("cycle accepted")
+    assert looped.runs == []
+
+
+def test_fresh_runs_supersede_retries_of_their_own_mode_only():
+    task = fake_task()
+    with runner_for(task) as task_runner:
+        task_runner._retries.schedule(task.name, 2, 0, dry_run=True)
+        task_runner._execute(task.name)
+        assert [entry["attempt"] for entry in task_runner._retries.pending(dry_run=True)] == [2]
+        task_runner._execute(task.name, dry_run=True)
+        assert task_runner._retries.pending(dry_run=True) == []
+
+
+def coalesce_burst(change_inputs: bool, waiters: int = 3):
+    """
+    Start a run, trigger the task from `waiters` other runners while it
+    is in flight, optionally change its input, then let the run finish.
+
+    Returns:
+        (task class, [(exit code, result)] of the waiters)
+    """
+    in_flight = threading.Event()
+    release = threading.Event()
+    registered = threading.Semaphore(0)
+
+    def hold_first_run(task: Task) -> None:
+        if not type(task).runs:
+            in_flight.set()
+            release.wait(5)
+
+    with temp_dir() as inputs:
+        source = inputs / "input.txt"
+        source.write_text("v1")
+        task = fake_task(input_paths=lambda self: [source], on_run=hold_first_run)
+        with runner_for(task) as task_runner:
+            def trigger(results: list) -> None:
+                other = TaskRunner(str(task_runner.workspace))
+                other._task_classes[task.name] = task
+                coalesce = other._coalesce
+                def registering(*args):
+                    registered.release()
+                    return coalesce(*args)
+                other._coalesce = registering
+                results.append(other._execute(task.name, coalesce=True, coalesce_timeout=10))
+
+            first = threading.Thread(target=task_runner._execute, args=(task.name,))
+            first.start()
+            assert in_flight.wait(5)
+            if change_inputs:
+                source.write_text("v2, longer")
+            results = []
+            threads = [threading.Thread(target=trigger, args=(results,)) for _ in range(waiters)]
+            for thread in threads:
+                thread.start()
+            for _ in threads:
+                assert registered.acquire(timeout=5)
+            time.sleep(0.1)  # registered_at is taken just after the hook
+            release.set()
+            for thread in [first] + threads:
+                thread.join(15)
+    return task, results
+
+
+def test_coalesce_shares_a_run_with_unchanged_inputs():
+    task, results = coalesce_burst(change_inputs=False)
+    assert len(task.runs) == 1
+    assert [exit_code for exit_code, _ in results] == [EXIT_SUCCESS] * 3
+    assert all(result.get("coalesced") for _, result in results)
+
+
+def test_coalesce_follows_changed_inputs_with_one_run():
+    task, results = coalesce_burst(change_inputs=True)
+    # A burst costs at most two runs: one waiter re-runs, the rest share it
+    assert len(task.runs) == 2
+    assert sorted(bool(result.get("coalesced")) for _, result in results) == [False, True, True]
+
+
+def test_coalesce_times_out_as_locked():
+    in_flight = threading.Event()
+    release = threading.Event()
+    task = fake_task(on_run=lambda self: in_flight.set() or release.wait(5))
+    with runner_for(task) as task_runner:
+        first = threading.Thread(target=task_runner._execute, args=(task.name,))
+        first.start()
+        assert in_flight.wait(5)
+        other = TaskRunner(str(task_runner.workspace))
+        other._task_classes[task.name] = task
+        exit_code, result = other._execute(task.name, coalesce=True, coalesce_timeout=0.3)
+        release.set()
+        first.join(5)
+    assert exit_code == EXIT_LOCKED and result["locked"]
+
+
+def test_skip_cache_reuses_results_until_inputs_change():
+    with temp_dir() as inputs:
+        source = inputs / "input.txt"
+        source.write_text("v1")
+        task = fake_task(skip_unchanged=True, input_paths=lambda self: [source],
+                         configure=lambda self, **options: None)
+        with runner_for(task) as task_runner:
+            _, first = task_runner._execute(task.name)
+            exit_code, cached = task_runner._execute(task.name)
+            assert len(task.runs) == 1
+            assert exit_code == EXIT_SUCCESS and cached["cached"] and cached["cached_from"] == first["timestamp"]
+            assert cached["duration_seconds"] == 0.0 and "resources" not in cached
+
+            source.write_text("v2, longer")
+            task_runner._execute(task.name)
+            assert len(task.runs) == 2
+            # Dry runs and runs with options always execute and leave the cache alone
+            task_runner._execute(task.name, dry_run=True)
+            task_runner._execute(task.name, options={"since": "2026-01-01"})
+            assert len(task.runs) == 4
+            assert task_runner._execute(task.name)[1].get("cached")
+            assert len(task.runs) == 4
+
+
+def test_skip_cache_keeps_failures_out_and_fingerprints_after_the_run():
+    with temp_dir() as inputs:
+        source = inputs / "input.txt"
+        source.write_text("v1")
+        # The task appends to its own input, as capture does with its offsets
+        task = fake_task(False, True, skip_unchanged=True, input_paths=lambda self: [source],
+                         on_run=lambda self: source.write_text(source.read_text() + "."))
+        with runner_for(task) as task_runner:
+            task_runner._execute(task.name)
+            task_runner._execute(task.name)
+            assert len(task.runs) == 2
+            assert task_runner._execute(task.name)[1].get("cached")
+            assert len(task.runs) == 2
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for tasks/simjoin.py: the prefix-filtered join against a brute-force scan."""
+
+import random
+import sys
+from pathlib import Path
+from typing import FrozenSet, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.minhash import jaccard
+from tasks.simjoin import SimilarityJoin, dedup_keep_first, frequency_rank
+from test_all import run_tests
+
+
+def brute_force(sets: Sequence[FrozenSet[int]], threshold: float) -> List[Optional[int]]:
+    """Compare each set with every kept set before it (what consolidation used to do)."""
+    kept: List[int] = []
+    result: List[Optional[int]] = []
+    for i, token_ids in enumerate(sets):
+        match = next((j for j in kept if jaccard(token_ids, sets[j]) >= threshold), None)
+        result.append(match)
+        if match is None:
+            kept.append(i)
+    return result
+
+
+def random_sets(rng: random.Random, count: int, vocabulary: int) -> List[FrozenSet[int]]:
+    """Random sets plus near-copies of earlier ones, so duplicates are common."""
+    sets: List[FrozenSet[int]] = []
+    for _ in range(count):
+        if sets and rng.random() < 0.4:
+            base = set(rng.choice(sets))
+            for _ in range(rng.randint(0, 2)):
+                if base and rng.random() < 0.5:
+                    base.discard(rng.choice(sorted(base)))
+                else:
+                    base.add(rng.randrange(vocabulary))
+            sets.append(frozenset(base))
+        else:
+            sets.append(frozenset(rng.sample(range(vocabulary), rng.randint(0, min(12, vocabulary)))))
+    return sets
+
+
+def check_join(sets: Sequence[FrozenSet[int]], threshold: float, result: List[Optional[int]]) -> None:
+    """Same sets kept as the brute-force scan; each duplicate points at an earlier kept match."""
+    expected = brute_force(sets, threshold)
+    assert [j is None for j in result] == [j is None for j in expected]
+    for i, j in enumerate(result):
+        if j is not None:
+            assert j < i and result[j] is None and jaccard(sets[i], sets[j]) >= threshold
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        sets = random_sets(rng, rng.randint(1, 60), rng.choice([8, 30, 200]))
+        threshold = rng.choice([0.3, 0.5, 0.8, 0.9, 1.0])
+        check_join(sets, threshold, dedup_keep_first(sets, threshold))
+
+
+def test_any_token_order_is_exact():
+    rng = random.Random(11)
+    for _ in range(100):
+        sets = random_sets(rng, 40, 25)
+        tokens = sorted(set().union(*sets))
+        rng.shuffle(tokens)
+        join = SimilarityJoin(0.6, {token_id: position for position, token_id in enumerate(tokens)})
+        check_join(sets, 0.6, [join.add(token_ids) for token_ids in sets])
+
+
+def test_frequency_rank_rarest_first():
+    rank = frequency_rank([frozenset({1, 2}), frozenset({2, 3}), frozenset({2})])
+    assert rank[2] == max(rank.values())
+    assert sorted(rank) == [1, 2, 3]
+
+
+def test_empty_sets_are_never_duplicates():
+    assert dedup_keep_first([frozenset(), frozenset(), frozenset({1})], 0.5) == [None, None, None]
+
+
+def test_threshold_must_be_in_range():
+    for threshold in (0, -0.5, 1.5):
+        try:
+            SimilarityJoin(threshold, {})
+        except ValueError:
+            continue
+        raise AssertionError(f"threshold {threshold} accepted")
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
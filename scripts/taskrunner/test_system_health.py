@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Tests for tasks/system_health.py: how gateway probe failures are reported."""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks import aio
+from tasks.system_health import SystemHealthTask
+from test_all import run_tests
+
+
+def check_gateway(probe) -> dict:
+    with mock.patch.object(aio, "http_probe", probe):
+        return asyncio.run(SystemHealthTask(dry_run=True)._check_gateway())
+
+
+def test_timeout_is_not_reported_as_connection_failure():
+    async def hang(url, timeout):
+        raise asyncio.TimeoutError()
+
+    assert check_gateway(hang) == {"status": "unhealthy", "details": "Gateway request timed out"}
+
+
+def test_connection_failure_reports_code_000():
+    async def refuse(url, timeout):
+        raise ConnectionRefusedError()
+
+    assert check_gateway(refuse) == {
+        "status": "unhealthy", "http_code": "000", "details": "Gateway not responding"
+    }
+
+
+def test_redirect_counts_as_running():
+    async def redirect(url, timeout):
+        return 302
+
+    assert check_gateway(redirect)["status"] == "healthy"
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests for tasks/tokens.py: token ID sets and the cache file with its change log."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks.minhash import text_digest, tokenize
+from tasks.tokens import TokenCache
+from test_all import run_tests, temp_dir
+
+TEXTS = [f"memory number {i} about topic {i % 7} and detail {i * 31}" for i in range(40)]
+
+
+def word_sets(cache: TokenCache, texts) -> list:
+    return [set(cache.words(cache.get(text_digest(text)))) for text in texts]
+
+
+def test_ids_map_back_to_the_words():
+    cache = TokenCache()
+    assert set(cache.words(cache.ids("Deploy with make ship"))) == tokenize("Deploy with make ship")
+    assert cache.ids("deploy  WITH make ship") == cache.ids("Deploy with make ship")
+
+
+def test_save_appends_new_words_and_entries():
+    with temp_dir() as tmp:
+        path = tmp / "store.tokens.json"
+        TokenCache.open(path, TEXTS).save(path)
+        snapshot = path.read_bytes()
+
+        texts = TEXTS[1:] + ["a brand new memory"]
+        cache = TokenCache.open(path, texts)
+        cache.save(path)
+        assert path.read_bytes() == snapshot
+        _, vocab, added, removed = [
+            json.loads(line) for line in path.with_suffix(".log").read_text().splitlines()
+        ]
+        assert sorted(vocab["vocab"]) == ["a", "brand", "new"]
+        assert added["key"] == text_digest("a brand new memory")
+        assert removed == {"key": text_digest(TEXTS[0])}
+
+        reopened = TokenCache.open(path, texts)
+        assert not reopened.dirty
+        assert word_sets(reopened, texts) == [tokenize(text) for text in texts]
+
+
+def test_appends_after_a_renumbering_save_use_the_file_ids():
+    with temp_dir() as tmp:
+        path = tmp / "store.tokens.json"
+        TokenCache.open(path, TEXTS).save(path)
+        # A new snapshot renumbers the vocabulary to the words still in use
+        cache = TokenCache.open(path, TEXTS)
+        cache.retain({text_digest(text) for text in TEXTS[30:]})
+        cache._log.compact_ratio = 0
+        cache.save(path)
+        cache._log.compact_ratio = 0.5
+        assert not path.with_suffix(".log").exists()
+        # ...while the in-memory IDs stay as they were
+        cache.ids("detail 961 and 496")
+        cache.save(path)
+        assert path.with_suffix(".log").exists()
+
+        texts = TEXTS[30:] + ["detail 961 and 496"]
+        reopened = TokenCache.open(path, texts)
+        assert not reopened.dirty
+        assert word_sets(reopened, texts) == [tokenize(text) for text in texts]
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Tests for watch.py: FileWatcher's debouncing over inotify and the polling fallback."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks import docstore
+from test_all import run_tests, temp_dir
+from watch import FileWatcher
+
+
+def write_later(path: Path, times: int, gap: float, started: List[float]) -> threading.Thread:
+    """Append to `path` `times` times, `gap` seconds apart, from a thread; started[0] is the first write."""
+    def writes():
+        time.sleep(0.1)
+        for n in range(times):
+            with open(path, "a") as f:
+                f.write(f"line {n}\n")
+            if n == 0:
+                started.append(time.monotonic())
+            time.sleep(gap)
+
+    writer = threading.Thread(target=writes)
+    writer.start()
+    return writer
+
+
+def test_a_burst_of_writes_is_one_change():
+    with temp_dir() as tmp:
+        path = tmp / "2026-02-01.md"
+        watcher = FileWatcher(debounce=0.15, max_delay=2.0)
+        assert watcher.mode == "inotify"
+        try:
+            started: List[float] = []
+            writer = write_later(path, times=5, gap=0.05, started=started)
+            assert watcher.wait([path], timeout=5) == {path}
+            waited = time.monotonic() - started[0]
+            writer.join()
+            # Returned once the writes had been quiet for a debounce period
+            assert 0.35 <= waited < 1.5, waited
+            assert watcher.wait([path], timeout=0.3) == set()
+        finally:
+            watcher.close()
+
+
+def test_a_steady_stream_is_picked_up_after_max_delay():
+    with temp_dir() as tmp:
+        path = tmp / "2026-02-01.md"
+        watcher = FileWatcher(debounce=0.15, max_delay=0.4)
+        try:
+            started: List[float] = []
+            writer = write_later(path, times=30, gap=0.05, started=started)
+            assert watcher.wait([path], timeout=5) == {path}
+            waited = time.monotonic() - started[0]
+            writer.join()
+            assert 0.35 <= waited < 1.0, waited
+        finally:
+            watcher.close()
+
+
+def test_only_watched_paths_count_and_renames_are_seen():
+    with temp_dir() as tmp:
+        path = tmp / "store.json"
+        watcher = FileWatcher(debounce=0.1)
+        try:
+            (tmp / "other.md").write_text("unrelated")
+            assert watcher.wait([path], timeout=0.3) == set()
+            # docstore.save replaces the file by rename
+            threading.Timer(0.1, docstore.save, args=(path, {"memories": []})).start()
+            assert watcher.wait([path], timeout=5) == {path}
+        finally:
+            watcher.close()
+
+
+def test_polling_fallback_sees_changes_and_new_files():
+    with temp_dir() as tmp:
+        existing = tmp / "existing.md"
+        existing.write_text("one\n")
+        missing = tmp / "missing.md"
+        watcher = FileWatcher(poll_interval=0.05)
+        watcher.close()
+        watcher._inotify = None
+        assert watcher.mode == "polling"
+        assert watcher.wait([existing, missing], timeout=0.2) == set()
+        threading.Timer(0.1, missing.write_text, args=("new\n",)).start()
+        assert watcher.wait([existing, missing], timeout=5) == {missing}
+        existing.write_text("one\ntwo\n")
+        assert watcher.wait([existing, missing], timeout=5) == {existing}
+
+
+if __name__ == "__main__":
+    sys.exit(0 if all(run_tests(sys.modules[__name__]).values()) else 1)
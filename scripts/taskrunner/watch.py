@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""File change notification for `runner.py <task> --watch` (inotify, else polling)."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+class Inotify:
+    """
+    Minimal ctypes binding for Linux inotify.
+
+    Raises:
+        OSError: If inotify is unavailable (non-Linux, no libc symbol,
+            or the per-user instance limit is reached)
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+            init = libc.inotify_init1
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, Path] = {}
+
+    def add_watch(self, directory: Path, mask: int = _WATCH_MASK) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(str(directory)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(directory))
+        self._dirs[wd] = directory
+
+    def watched(self) -> Set[Path]:
+        return set(self._dirs.values())
+
+    def read_events(self, timeout: Optional[float]) -> Tuple[Set[Path], bool]:
+        """
+        Wait up to `timeout` seconds and drain pending events.
+
+        Returns:
+            (paths that changed, overflowed); on overflow events were lost
+            and every watched file should be considered changed
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set(), False
+
+        changed: Set[Path] = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                elif mask & IN_IGNORED:
+                    # Directory removed or unmounted; re-added by the watcher
+                    self._dirs.pop(wd, None)
+                elif wd in self._dirs and name:
+                    changed.add(self._dirs[wd] / os.fsdecode(name))
+        return changed, overflowed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class FileWatcher:
+    """
+    Waits for a set of files to change, debouncing bursts of writes.
+
+    Uses inotify on the files' parent directories (so files that do not
+    exist yet, or are replaced by rename, are still seen). Where inotify is
+    unavailable it falls back to comparing stat() results every
+    `poll_interval` seconds.
+
+    After the first change, wait() keeps collecting events until none has
+    arrived for `debounce` seconds, but returns at most `max_delay` seconds
+    after that first change, so a steady stream of writes is still picked
+    up promptly.
+    """
+
+    def __init__(self, debounce: float = 0.25, max_delay: float = 1.0, poll_interval: float = 2.0):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        try:
+            self._inotify: Optional[Inotify] = Inotify()
+        except OSError:
+            self._inotify = None
+        self._stats: Dict[Path, Optional[Tuple[int, int, int]]] = {}
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def _ensure_watches(self, paths: Set[Path]) -> None:
+        watched = self._inotify.watched()
+        for directory in {path.parent for path in paths} - watched:
+            try:
+                self._inotify.add_watch(directory)
+            except OSError:
+                pass  # Not there yet; retried on the next wait()
+
+    def wait(self, paths: Iterable[Path], timeout: float) -> Set[Path]:
+        """
+        Block until some of `paths` change or `timeout` seconds pass.
+
+        Returns:
+            The changed paths (empty on timeout)
+        """
+        paths = set(paths)
+        if self._inotify is None:
+            return self._poll(paths, timeout)
+
+        self._ensure_watches(paths)
+        deadline = time.monotonic() + timeout
+        changed: Set[Path] = set()
+        first_change: Optional[float] = None
+        while True:
+            now = time.monotonic()
+            if first_change is None:
+                if now >= deadline:
+                    return changed
+                # Directories that could not be watched yet are re-checked
+                # every poll interval
+                wait_for = min(deadline - now, self.poll_interval)
+            else:
+                wait_for = min(self.debounce, first_change + self.max_delay - now)
+                if wait_for <= 0:
+                    return changed
+
+            events, overflowed = self._inotify.read_events(wait_for)
+            relevant = paths if overflowed else events & paths
+            if relevant:
+                changed |= relevant
+                if first_change is None:
+                    first_change = time.monotonic()
+            elif first_change is not None and not events:
+                return changed  # Quiet for a whole debounce period
+            elif first_change is None and not events:
+                self._ensure_watches(paths)
+
+    def _poll(self, paths: Set[Path], timeout: float) -> Set[Path]:
+        for path in paths - set(self._stats):
+            self._stats[path] = _stat_key(path)
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in paths:
+                key = _stat_key(path)
+                if key != self._stats.get(path):
+                    self._stats[path] = key
+                    changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()